@@ -24,7 +24,12 @@ from ml_collections.config_flags import config_flags
 from wandb.keras import WandbMetricsLogger
 
 from restorers.callbacks import LowLightEvaluationCallback
-from restorers.dataloader import LOLDataLoader
+from restorers.dataloader import (
+    LOLDataLoader,
+    PipelineOptions,
+    ProgressiveResizing,
+    SharedMemoryDataset,
+)
 from restorers.losses import CharbonnierLoss
 from restorers.metrics import PSNRMetric, SSIMMetric
 from restorers.model import MirNetv2
@@ -72,14 +77,46 @@ def main(_):
     if using_wandb:
         wandb.config.global_batch_size = batch_size
 
+    pipeline_options = PipelineOptions(
+        **FLAGS.experiment_configs.data_loader_configs.pipeline_options.to_dict()
+    )
     data_loader = LOLDataLoader(
         image_size=FLAGS.experiment_configs.data_loader_configs.image_size,
         bit_depth=FLAGS.experiment_configs.data_loader_configs.bit_depth,
         val_split=FLAGS.experiment_configs.data_loader_configs.val_split,
         visualize_on_wandb=FLAGS.experiment_configs.data_loader_configs.visualize_on_wandb,
         dataset_artifact_address=FLAGS.experiment_configs.data_loader_configs.dataset_artifact_address,
+        defer_normalization=FLAGS.experiment_configs.data_loader_configs.defer_normalization,
+        data_service_address=FLAGS.experiment_configs.data_loader_configs.data_service_address,
+        materialize_val_dataset=FLAGS.experiment_configs.data_loader_configs.materialize_val_dataset,
+        pipeline_options=pipeline_options,
     )
-    train_dataset, val_dataset = data_loader.get_datasets(batch_size=batch_size)
+    if FLAGS.experiment_configs.data_loader_configs.share_decoded_images:
+        # The concurrent trials of a sweep on this host decode the images only once.
+        data_loader = SharedMemoryDataset(data_loader).get_data_loader(
+            defer_normalization=FLAGS.experiment_configs.data_loader_configs.defer_normalization,
+            materialize_val_dataset=FLAGS.experiment_configs.data_loader_configs.materialize_val_dataset,
+            pipeline_options=pipeline_options,
+        )
+    if FLAGS.experiment_configs.data_loader_configs.distribute_datasets:
+        train_dataset, val_dataset = data_loader.get_distributed_datasets(
+            strategy, batch_size=batch_size
+        )
+    else:
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=batch_size)
+    if FLAGS.experiment_configs.data_loader_configs.val_bucket_size is not None:
+        val_dataset = data_loader.get_bucketed_val_dataset(
+            batch_size=batch_size,
+            bucket_size=FLAGS.experiment_configs.data_loader_configs.val_bucket_size,
+        )
+    curriculum = None
+    if FLAGS.experiment_configs.data_loader_configs.curriculum_stages is not None:
+        curriculum = ProgressiveResizing(
+            data_loader,
+            stages=FLAGS.experiment_configs.data_loader_configs.curriculum_stages,
+            strategy=strategy,
+            distribute_datasets=FLAGS.experiment_configs.data_loader_configs.distribute_datasets,
+        )
     logging.info("Created Tensorflow Datasets.")
 
     with strategy.scope():
@@ -88,15 +125,23 @@ def main(_):
             channel_factor=FLAGS.experiment_configs.model_configs.channel_factor,
             num_mrb_blocks=FLAGS.experiment_configs.model_configs.num_mrb_blocks,
             add_residual_connection=FLAGS.experiment_configs.model_configs.add_residual_connection,
+            bit_depth=FLAGS.experiment_configs.data_loader_configs.bit_depth
+            if FLAGS.experiment_configs.data_loader_configs.defer_normalization
+            else None,
         )
         loss = CharbonnierLoss(
             epsilon=FLAGS.experiment_configs.training_configs.charbonnier_epsilon,
             reduction=tf.keras.losses.Reduction.SUM,
         )
 
+        # The schedule is counted in steps, which depend on the batch size of every
+        # stage of the curriculum and on the number of patches per image.
         decay_steps = (
-            len(data_loader.train_input_images) // batch_size
-        ) * FLAGS.experiment_configs.training_configs.epochs
+            curriculum.get_total_steps(FLAGS.experiment_configs.training_configs.epochs)
+            if curriculum is not None
+            else data_loader.get_steps_per_epoch(batch_size)
+            * FLAGS.experiment_configs.training_configs.epochs
+        )
         lr_schedule_fn = tf.keras.optimizers.schedules.CosineDecay(
             initial_learning_rate=FLAGS.experiment_configs.training_configs.initial_learning_rate,
             decay_steps=decay_steps,
@@ -132,12 +177,20 @@ def main(_):
         callbacks.append(WandbMetricsLogger(log_freq="batch"))
 
     logging.info("Starting Training...")
-    model.fit(
-        train_dataset,
-        validation_data=val_dataset,
-        epochs=FLAGS.experiment_configs.training_configs.epochs,
-        callbacks=callbacks,
-    )
+    if curriculum is not None:
+        curriculum.fit(
+            model,
+            epochs=FLAGS.experiment_configs.training_configs.epochs,
+            validation_data=val_dataset,
+            callbacks=callbacks,
+        )
+    else:
+        model.fit(
+            train_dataset,
+            validation_data=val_dataset,
+            epochs=FLAGS.experiment_configs.training_configs.epochs,
+            callbacks=callbacks,
+        )
     logging.info("Training Completed.")
 
     if using_wandb:
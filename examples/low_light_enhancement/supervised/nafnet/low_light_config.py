@@ -1,4 +1,20 @@
 import ml_collections
+from ml_collections.config_dict import placeholder
+
+
+def get_pipeline_options_configs() -> ml_collections.ConfigDict:
+    config = ml_collections.ConfigDict()
+
+    # tf.data performance options, see `restorers.dataloader.PipelineOptions`,
+    # the options left to `None` keep the defaults of tf.data
+    config.private_threadpool_size = placeholder(int)
+    config.max_intra_op_parallelism = placeholder(int)
+    config.autotune_ram_budget = placeholder(int)
+    config.deterministic = placeholder(bool)
+    config.shuffle_buffer_size = placeholder(int)
+    config.reshuffle_each_iteration = True
+
+    return config
 
 
 def get_dataloader_configs() -> ml_collections.ConfigDict:
@@ -9,7 +25,21 @@ def get_dataloader_configs() -> ml_collections.ConfigDict:
     config.val_split = 0.2
     config.local_batch_size = 4
     config.visualize_on_wandb = False
+    config.defer_normalization = False
+    config.distribute_datasets = False
+    # e.g. "grpc://localhost:5000", see `restorers.dataloader.LocalDataService`
+    config.data_service_address = placeholder(str)
+    # Validate at native resolution, padded to multiples of `val_bucket_size`
+    config.val_bucket_size = placeholder(int)
+    # Read and decode the val images once, then reuse the stored batches
+    config.materialize_val_dataset = False
+    # Progressive resizing stages of start_epoch:image_size:local_batch_size,
+    # e.g. "0:128:16,30:192:8,60:256:4"
+    config.curriculum_stages = placeholder(str)
+    # Decode the images once into shared memory for all the trials on the host
+    config.share_decoded_images = False
     config.dataset_artifact_address = "ml-colabs/dataset/LoL:v0"
+    config.pipeline_options = get_pipeline_options_configs()
 
     return config
 
@@ -1,15 +1,38 @@
 import ml_collections
+from ml_collections.config_dict import placeholder
+
+
+def get_pipeline_options_configs() -> ml_collections.ConfigDict:
+    config = ml_collections.ConfigDict()
+
+    # tf.data performance options, see `restorers.dataloader.PipelineOptions`,
+    # the options left to `None` keep the defaults of tf.data
+    config.private_threadpool_size = placeholder(int)
+    config.max_intra_op_parallelism = placeholder(int)
+    config.autotune_ram_budget = placeholder(int)
+    config.deterministic = placeholder(bool)
+    config.shuffle_buffer_size = placeholder(int)
+    config.reshuffle_each_iteration = True
+
+    return config
 
 
 def get_dataloader_configs() -> ml_collections.ConfigDict:
     config = ml_collections.ConfigDict()
 
-    config.image_size = 512
+    # Size of the random training crops, the LoL images being 400x600
+    config.image_size = 256
     config.bit_depth = 8
     config.val_split = 0.2
     config.local_batch_size = 8
     config.visualize_on_wandb = False
     config.dataset_artifact_address = "ml-colabs/mirnet-v2/lol-dataset:v0"
+    config.train_on_all_images = False
+    config.defer_normalization = False
+    # Glob patterns of additional unpaired images or TFRecord shards streamed along
+    # with the LoL images, e.g. ("/data/unlabeled/*.jpg", "gs://bucket/*.tfrecord")
+    config.image_sources = ()
+    config.pipeline_options = get_pipeline_options_configs()
 
     return config
 
@@ -14,9 +14,6 @@ train.py:
   --experiment_configs.training_configs.learning_rate 2e-4
 """
 
-import os
-from glob import glob
-
 import tensorflow as tf
 
 tf.get_logger().setLevel("ERROR")
@@ -27,6 +24,7 @@ from low_light_config import get_config
 from ml_collections.config_flags import config_flags
 from wandb.keras import WandbMetricsLogger
 
+from restorers.dataloader import PipelineOptions, UnsupervisedLOLDataLoader
 from restorers.model.zero_dce import ZeroDCE, FastZeroDce
 from restorers.utils import get_model_checkpoint_callback, initialize_device
 
@@ -70,45 +68,21 @@ def main(_) -> None:
     )
     wandb.config.global_batch_size = batch_size
 
-    def load_data(image_path: str) -> tf.Tensor:
-        image = tf.io.read_file(image_path)
-        image = tf.image.decode_png(image, channels=3)
-        image = tf.image.resize(
-            images=image,
-            size=[
-                FLAGS.experiment_configs.data_loader_configs.image_size,
-                FLAGS.experiment_configs.data_loader_configs.image_size,
-            ],
-        )
-        image = image / (
-            (2**FLAGS.experiment_configs.data_loader_configs.bit_depth) - 1
-        )
-        return image
-
-    def data_generator(low_light_images: tf.TypeSpec) -> tf.data.Dataset:
-        dataset = tf.data.Dataset.from_tensor_slices((low_light_images))
-        dataset = dataset.map(load_data, num_parallel_calls=tf.data.AUTOTUNE)
-        dataset = dataset.batch(batch_size, drop_remainder=True)
-        return dataset
-
-    artifact = wandb.use_artifact(
-        FLAGS.experiment_configs.data_loader_configs.dataset_artifact_address,
-        type="dataset",
+    data_loader_configs = FLAGS.experiment_configs.data_loader_configs
+    data_loader = UnsupervisedLOLDataLoader(
+        image_size=data_loader_configs.image_size,
+        bit_depth=data_loader_configs.bit_depth,
+        val_split=data_loader_configs.val_split,
+        visualize_on_wandb=data_loader_configs.visualize_on_wandb,
+        dataset_artifact_address=data_loader_configs.dataset_artifact_address,
+        train_on_all_images=data_loader_configs.train_on_all_images,
+        defer_normalization=data_loader_configs.defer_normalization,
+        pipeline_options=PipelineOptions(
+            **data_loader_configs.pipeline_options.to_dict()
+        ),
+        image_sources=data_loader_configs.image_sources,
     )
-    artifact_dir = artifact.download()
-
-    train_low_light_images = sorted(
-        glob(os.path.join(artifact_dir, "our485", "low", "*"))
-    )
-    num_train_images = int(
-        (1 - FLAGS.experiment_configs.data_loader_configs.val_split)
-        * len(train_low_light_images)
-    )
-    val_low_light_images = train_low_light_images[num_train_images:]
-    train_low_light_images = train_low_light_images[:num_train_images]
-
-    train_dataset = data_generator(train_low_light_images)
-    val_dataset = data_generator(val_low_light_images)
+    train_dataset, val_dataset = data_loader.get_datasets(batch_size=batch_size)
 
     with strategy.scope():
         model = (
@@ -116,12 +90,18 @@ def main(_) -> None:
                 num_intermediate_filters=FLAGS.experiment_configs.model_configs.num_intermediate_filters,
                 num_iterations=FLAGS.experiment_configs.model_configs.num_iterations,
                 decoder_channel_factor=FLAGS.experiment_configs.model_configs.decoder_channel_factor,
+                bit_depth=data_loader_configs.bit_depth
+                if data_loader_configs.defer_normalization
+                else None,
             )
             if not FLAGS.experiment_configs.model_configs.use_faster_variant
             else FastZeroDce(
                 num_intermediate_filters=FLAGS.experiment_configs.model_configs.num_intermediate_filters,
                 num_iterations=FLAGS.experiment_configs.model_configs.num_iterations,
                 decoder_channel_factor=FLAGS.experiment_configs.model_configs.decoder_channel_factor,
+                bit_depth=data_loader_configs.bit_depth
+                if data_loader_configs.defer_normalization
+                else None,
             )
         )
         model.compile(
@@ -0,0 +1,337 @@
+import os
+import re
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import IO, Dict, Optional
+
+import wandb
+from absl import logging
+
+_INDEX_FILE = "index.json"
+_LOCK_FILE = ".lock"
+# Aliases of a single version of an artifact, unlike e.g. `latest`.
+_VERSION_ALIAS = r"v\d+"
+# The locks held on the artifacts in use by this process, until it exits.
+_OBJECT_LOCKS: Dict[str, IO] = {}
+
+
+def get_directory_size(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, filename))
+        for root, _, filenames in os.walk(directory)
+        for filename in filenames
+    )
+
+
+class ArtifactStore(ABC):
+    """The remote store the artifacts are downloaded from."""
+
+    @abstractmethod
+    def get_digest(self, artifact_address: str, artifact_type: str) -> str:
+        """Resolves an artifact address, e.g. with an alias, to the digest of its content."""
+        raise NotImplementedError(f"{self.__class__.__name__ }.get_digest")
+
+    @abstractmethod
+    def download(self, artifact_address: str, artifact_type: str, root: str) -> None:
+        """Downloads the content of an artifact into the directory `root`."""
+        raise NotImplementedError(f"{self.__class__.__name__ }.download")
+
+    def use(self, artifact_address: str, artifact_type: str) -> None:
+        """Records the use of an artifact whose content may be fetched from the cache
+        without reaching the store, nothing to record by default."""
+
+
+class WandbArtifactStore(ArtifactStore):
+    """Artifacts stored on WandB, used through the current run if there is one so that
+    the artifacts are tracked as its inputs."""
+
+    def __init__(self) -> None:
+        self.artifacts: Dict[str, wandb.Artifact] = {}
+
+    def get_artifact(self, artifact_address: str, artifact_type: str) -> wandb.Artifact:
+        key = f"{artifact_type}:{artifact_address}"
+        if key not in self.artifacts:
+            self.artifacts[key] = (
+                wandb.Api().artifact(artifact_address, type=artifact_type)
+                if wandb.run is None
+                else wandb.use_artifact(artifact_address, type=artifact_type)
+            )
+        return self.artifacts[key]
+
+    def get_digest(self, artifact_address: str, artifact_type: str) -> str:
+        return self.get_artifact(artifact_address, artifact_type).digest
+
+    def download(self, artifact_address: str, artifact_type: str, root: str) -> None:
+        self.get_artifact(artifact_address, artifact_type).download(root=root)
+
+    def use(self, artifact_address: str, artifact_type: str) -> None:
+        # Using the artifact only records it as an input of the run, the artifact is
+        # not downloaded.
+        if wandb.run is not None:
+            self.get_artifact(artifact_address, artifact_type)
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifacts stored in a local directory, `<root>/<name>/<alias>` holding the content
+    of the artifact `<name>:<alias>`. It stands in for the remote store in tests.
+
+    Parameters:
+        root (`str`): Root directory of the store.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def get_artifact_path(self, artifact_address: str) -> str:
+        name, _, alias = artifact_address.rpartition(":")
+        return os.path.join(self.root, name, alias)
+
+    def get_digest(self, artifact_address: str, artifact_type: str) -> str:
+        artifact_path = self.get_artifact_path(artifact_address)
+        if not os.path.isdir(artifact_path):
+            raise ValueError(f"Artifact {artifact_address} not found in {self.root}.")
+        sha256 = hashlib.sha256()
+        for root, directories, filenames in os.walk(artifact_path):
+            directories.sort()
+            for filename in sorted(filenames):
+                file_path = os.path.join(root, filename)
+                sha256.update(os.path.relpath(file_path, artifact_path).encode())
+                with open(file_path, "rb") as artifact_file:
+                    sha256.update(artifact_file.read())
+        return sha256.hexdigest()
+
+    def download(self, artifact_address: str, artifact_type: str, root: str) -> None:
+        shutil.copytree(self.get_artifact_path(artifact_address), root)
+
+
+class ArtifactCache:
+    """
+    Content-addressed local cache of artifacts, keyed by the digest of their content.
+
+    The artifacts are downloaded into a temporary directory which is then renamed
+    into place, so a partially downloaded artifact is never visible. The downloads run
+    outside of the lock on the cache directory, which is only held to update the index,
+    so that concurrent processes sharing the cache are not blocked by the download of
+    another artifact. The least recently used artifacts are evicted to keep the cache
+    below `max_size` bytes, except the artifacts fetched by a running process, which
+    holds a shared lock on them until it exits.
+
+    The aliases resolved by the store are remembered, so that artifacts with a version
+    alias, e.g. `"name:v3"`, are fetched from the cache without reaching the store. The
+    other aliases, e.g. `"name:latest"`, can move to another version, hence they are
+    resolved by the store again, unless in `offline` mode.
+
+    The artifacts fetched from the cache are still recorded as used by the store, e.g.
+    as inputs of the current WandB run, except in `offline` mode, where the lineage of
+    the artifacts is not tracked.
+
+    Parameters:
+        cache_dir (`str`): Directory of the cache.
+        store (`Optional[ArtifactStore]`): The store the artifacts are downloaded from,
+            defaults to `WandbArtifactStore`.
+        max_size (`Optional[int]`): Maximum size of the cache in bytes, unbounded if
+            `None`.
+        offline (`bool`): Only fetch artifacts from the cache.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        store: Optional[ArtifactStore] = None,
+        max_size: Optional[int] = None,
+        offline: bool = False,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.store = store or WandbArtifactStore()
+        self.max_size = max_size
+        self.offline = offline
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+
+    @contextmanager
+    def lock(self):
+        with open(os.path.join(self.cache_dir, _LOCK_FILE), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_index(self) -> Dict:
+        try:
+            with open(os.path.join(self.cache_dir, _INDEX_FILE), "r") as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {"aliases": {}, "objects": {}}
+
+    def write_index(self, index: Dict) -> None:
+        index_path = os.path.join(self.cache_dir, _INDEX_FILE)
+        with open(f"{index_path}.tmp", "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(f"{index_path}.tmp", index_path)
+
+    def get_object_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest)
+
+    def get_object_lock_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", f".{digest}.lock")
+
+    def get_object_lock(self, digest: str) -> IO:
+        """Returns the lock file of an artifact, which is locked exclusively while the
+        artifact is downloaded or evicted, and shared while it is in use. The lock files
+        are never removed, so that all the processes always lock the same file."""
+        lock_path = self.get_object_lock_path(digest)
+        if lock_path not in _OBJECT_LOCKS:
+            _OBJECT_LOCKS[lock_path] = open(lock_path, "a")
+        return _OBJECT_LOCKS[lock_path]
+
+    def is_cached(self, digest: str) -> bool:
+        return digest in self.read_index()["objects"] and os.path.isdir(
+            self.get_object_path(digest)
+        )
+
+    def resolve_digest(
+        self, artifact_address: str, artifact_type: str, refresh: bool
+    ) -> str:
+        """Resolves an artifact address to its digest through the index of the cache,
+        only reaching the store for aliases which can move or if `refresh` is set."""
+        key = f"{artifact_type}:{artifact_address}"
+        digest = self.read_index()["aliases"].get(key)
+        if self.offline:
+            if digest is None:
+                raise ValueError(
+                    f"Artifact {artifact_address} is not in the cache {self.cache_dir}, "
+                    "it cannot be fetched in offline mode."
+                )
+            return digest
+        alias = artifact_address.rpartition(":")[2]
+        if digest is None or refresh or re.fullmatch(_VERSION_ALIAS, alias) is None:
+            digest = self.store.get_digest(artifact_address, artifact_type)
+        return digest
+
+    def evict(self, index: Dict, keep_digest: str) -> None:
+        """Evicts the least recently used artifacts until the cache fits in `max_size`,
+        skipping the artifacts in use by any process. Must be called with the lock
+        held."""
+        if self.max_size is None:
+            return
+        objects = index["objects"]
+        total_size = sum(entry["size"] for entry in objects.values())
+        for digest in sorted(
+            objects, key=lambda digest: objects[digest]["last_access"]
+        ):
+            if total_size <= self.max_size:
+                break
+            if digest == keep_digest:
+                continue
+            with open(self.get_object_lock_path(digest), "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    logging.info(f"Not evicting artifact {digest}, it is in use.")
+                    continue
+                logging.info(f"Evicting artifact {digest} from {self.cache_dir}.")
+                shutil.rmtree(self.get_object_path(digest), ignore_errors=True)
+                total_size -= objects.pop(digest)["size"]
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        index["aliases"] = {
+            key: digest for key, digest in index["aliases"].items() if digest in objects
+        }
+
+    def fetch(
+        self, artifact_address: str, artifact_type: str, refresh: bool = False
+    ) -> str:
+        """
+        Fetches an artifact, downloading it from the store only if its content is not in
+        the cache yet. The artifact is not evicted before the process exits.
+
+        Args:
+            artifact_address (`str`): Address of the artifact, e.g. `"entity/project/name:v0"`.
+            artifact_type (`str`): Type of the artifact, e.g. `"dataset"` or `"model"`.
+            refresh (`bool`): Resolve the address by the store even for a version alias
+                which is in the cache.
+
+        Returns:
+            The path of the artifact in the cache.
+        """
+        digest = self.resolve_digest(artifact_address, artifact_type, refresh)
+        object_path = self.get_object_path(digest)
+        object_lock = self.get_object_lock(digest)
+
+        # The shared lock keeps the artifact from being evicted while it is in use.
+        fcntl.flock(object_lock, fcntl.LOCK_SH)
+        if not self.is_cached(digest):
+            if self.offline:
+                raise ValueError(f"Artifact {artifact_address} was evicted.")
+            # The exclusive lock only makes the processes fetching the same artifact
+            # wait for a single download. The shared lock is released first, so that
+            # two processes waiting for it do not deadlock.
+            fcntl.flock(object_lock, fcntl.LOCK_UN)
+            fcntl.flock(object_lock, fcntl.LOCK_EX)
+            temp_path = os.path.join(
+                self.cache_dir, "objects", f".{digest}.{os.getpid()}.tmp"
+            )
+            try:
+                if not self.is_cached(digest):
+                    shutil.rmtree(temp_path, ignore_errors=True)
+                    self.store.download(artifact_address, artifact_type, temp_path)
+                    size = get_directory_size(temp_path)
+                    with self.lock():
+                        shutil.rmtree(object_path, ignore_errors=True)
+                        os.rename(temp_path, object_path)
+                        index = self.read_index()
+                        index["objects"][digest] = {
+                            "size": size,
+                            "last_access": time.time(),
+                        }
+                        self.write_index(index)
+            finally:
+                shutil.rmtree(temp_path, ignore_errors=True)
+                # The artifacts are evicted with the lock of the cache held, so that
+                # the artifact is not evicted while its lock is converted.
+                with self.lock():
+                    fcntl.flock(object_lock, fcntl.LOCK_SH)
+
+        with self.lock():
+            index = self.read_index()
+            index["objects"][digest]["last_access"] = time.time()
+            index["aliases"][f"{artifact_type}:{artifact_address}"] = digest
+            self.evict(index, keep_digest=digest)
+            self.write_index(index)
+        if not self.offline:
+            self.store.use(artifact_address, artifact_type)
+        return object_path
+
+    def release(self, artifact_path: str) -> None:
+        """Releases an artifact fetched by this process, which can then be evicted."""
+        lock_path = self.get_object_lock_path(os.path.basename(artifact_path))
+        if lock_path in _OBJECT_LOCKS:
+            _OBJECT_LOCKS.pop(lock_path).close()
+
+
+def get_default_artifact_cache() -> ArtifactCache:
+    """
+    Returns the artifact cache used by `restorers.utils.fetch_wandb_artifact`, which is
+    configured by the following environment variables:
+
+    - `RESTORERS_ARTIFACT_CACHE_DIR`: directory of the cache, defaults to
+        `~/.cache/restorers/artifacts`.
+    - `RESTORERS_ARTIFACT_CACHE_MAX_SIZE`: maximum size of the cache in bytes.
+    - `RESTORERS_ARTIFACT_CACHE_OFFLINE`: set to `1` to only fetch artifacts from the
+        cache, which is also the case if `WANDB_MODE` is `offline`.
+    """
+    max_size = os.environ.get("RESTORERS_ARTIFACT_CACHE_MAX_SIZE")
+    return ArtifactCache(
+        cache_dir=os.environ.get(
+            "RESTORERS_ARTIFACT_CACHE_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "restorers", "artifacts"),
+        ),
+        max_size=int(max_size) if max_size is not None else None,
+        offline=os.environ.get("RESTORERS_ARTIFACT_CACHE_OFFLINE") == "1"
+        or os.environ.get("WANDB_MODE") == "offline",
+    )
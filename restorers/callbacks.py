@@ -21,11 +21,16 @@ class LowLightEvaluationCallback(WandbEvalCallback):
         ).numpy()
 
     def postprocess(self, image):
+        # Images of data loaders with `defer_normalization` are already `uint8`.
+        if image.dtype == np.uint8:
+            return image
         return (image * 255.0).clip(0, 255).astype(np.uint8)
 
     def add_ground_truth(self, logs=None):
-        for _ in tqdm(range(self.dataset_cardinality)):
-            input_image_batch, ground_truth_batch = next(iter(self.validation_data))
+        # Iterate the dataset once, so that a materialized val dataset is reused.
+        for input_image_batch, ground_truth_batch in tqdm(
+            self.validation_data, total=self.dataset_cardinality
+        ):
             input_image_batch, ground_truth_batch = (
                 input_image_batch.numpy(),
                 ground_truth_batch.numpy(),
@@ -38,9 +43,14 @@ class LowLightEvaluationCallback(WandbEvalCallback):
                 )
 
     def add_model_predictions(self, epoch, logs=None):
-        for count in tqdm(range(self.dataset_cardinality)):
-            input_image_batch, ground_truth_batch = next(iter(self.validation_data))
+        count = 0
+        for input_image_batch, ground_truth_batch in tqdm(
+            self.validation_data, total=self.dataset_cardinality
+        ):
             prediction_batch = self.model.predict(input_image_batch, verbose=0)
+            ground_truth_batch = tf.image.convert_image_dtype(
+                ground_truth_batch, tf.float32
+            )
             psnr = tf.image.psnr(
                 ground_truth_batch, prediction_batch, max_val=1.0
             ).numpy()
@@ -58,3 +68,4 @@ class LowLightEvaluationCallback(WandbEvalCallback):
                     psnr[idx],
                     ssim[idx],
                 )
+            count += len(prediction_batch)
@@ -1,2 +1,13 @@
 from .lol_dataloader import LOLDataLoader, UnsupervisedLOLDataLoader
 from .mit_adobe_5k_dataloader import MITAdobe5KDataLoader
+from .tfrecord_dataloader import TFRecordDataLoader
+from .memmap_dataloader import MemoryMappedDataLoader
+from .data_service import LocalDataService
+from .folder_dataloader import ImageFolderDataLoader
+from .mixture_dataloader import MixtureDataLoader
+from .base.storage import FsspecStorage, HTTPStorage, LocalStorage, RemoteFileReader
+from .curriculum import ProgressiveResizing
+from .synthetic_dataloader import SyntheticDegradationDataLoader
+from .base.degradations import RandomDegradation
+from .shared_memory import SharedMemoryDataset
+from .base.options import PipelineOptions
@@ -1,2 +1,3 @@
 from .base_dataloader import DatasetFactory
 from .base_low_light_dataloader import LowLightDatasetFactory
+from .options import PipelineOptions
@@ -1,10 +1,29 @@
+import os
+import tempfile
 from abc import ABC, abstractmethod
 from functools import partial
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import tensorflow as tf
 
-from .commons import read_image, random_horiontal_flip, random_vertical_flip
+from .commons import (
+    decode_image,
+    decode_image_for_size,
+    normalize_image,
+    quantize_image,
+    fingerprint_image_files,
+    get_bucket_key,
+    materialize_dataset,
+    pad_to_bucket,
+    random_crop_window,
+    random_crop_patches,
+    random_paired_batched_augmentation,
+    shard_image_files,
+    write_dataset_info,
+)
+from .memmap_utils import write_memory_map
+from .options import PipelineOptions
+from .tfrecord_utils import write_tfrecord_shards
 
 _AUTOTUNE = tf.data.AUTOTUNE
 
@@ -18,6 +37,29 @@ class DatasetFactory(ABC):
         bit_depth (`int`): Bit depth for normalization.
         val_split (`float`): The percentage of validation split.
         visualize_on_wandb (`bool`): Flag to visualize the dataset on wandb.
+        cache_decoded_images (`bool`): Flag to cache the decoded images before cropping.
+        cache_dir (`Optional[str]`): Directory (e.g. on a local SSD or `/dev/shm`) for
+            the decoded image cache, which persists across runs. The cache is kept in
+            memory if `None`.
+        photometric_jitter (`float`): Maximum relative change in brightness and contrast
+            applied by the augmentations.
+        patches_per_image (`int`): Number of random crops extracted from every decoded
+            training image.
+        defer_normalization (`bool`): Flag to keep the images as `uint8` through the input
+            pipeline, so that they are normalized by the model on the accelerator. Only
+            supported for a `bit_depth` of at most 8, as the images are decoded to
+            `uint8`.
+        data_service_address (`Optional[str]`): Address of a `tf.data` service
+            dispatcher, e.g. started by `restorers.dataloader.LocalDataService`, whose
+            workers run the decoding and cropping instead of the training process.
+            The images must be read by TensorFlow ops, not from a zip archive, a
+            remote storage or a memory-map.
+        materialize_val_dataset (`bool`): Flag to store the batched val dataset the first
+            time it is iterated, so that it is read and decoded only once per run.
+        max_val_memory_bytes (`int`): Maximum size of the val dataset stored in memory,
+            larger val datasets being stored on disk in `cache_dir`.
+        pipeline_options (`Optional[PipelineOptions]`): Performance options of the
+            `tf.data` pipelines, e.g. the thread pool size or the shuffle buffer size.
     """
 
     def __init__(
@@ -26,9 +68,35 @@ class DatasetFactory(ABC):
         bit_depth: int,
         val_split: float,
         visualize_on_wandb: bool,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
     ) -> None:
+        if defer_normalization and bit_depth > 8:
+            # The images are decoded and quantized to uint8, which a model normalizing
+            # images of a higher bit depth would divide by the wrong factor.
+            raise ValueError(
+                f"defer_normalization is not supported for a bit_depth of {bit_depth}, "
+                "the images are decoded to uint8."
+            )
         self.image_size = image_size
+        self.bit_depth = bit_depth
         self.normalization_factor = (2**bit_depth) - 1
+        self.cache_decoded_images = cache_decoded_images
+        self.cache_dir = cache_dir
+        self.photometric_jitter = photometric_jitter
+        self.patches_per_image = patches_per_image
+        self.defer_normalization = defer_normalization
+        self.data_service_address = data_service_address
+        self.materialize_val_dataset = materialize_val_dataset
+        self.max_val_memory_bytes = max_val_memory_bytes
+        self.pipeline_options = pipeline_options or PipelineOptions()
         self.fetch_dataset(val_split, visualize_on_wandb)
 
     @abstractmethod
@@ -72,6 +140,35 @@ class DatasetFactory(ABC):
 
         return cropped_input_image, cropped_enhanced_image
 
+    def random_crop_patches(
+        self, input_image: tf.Tensor, enhanced_image: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        """
+        Function to extract `patches_per_image` independent random crops, each of them
+        applied identically to the low light and enhanced image.
+
+        Args:
+            input_image (`tf.Tensor`): Low light image.
+            enhanced_image (`tf.Tensor`): Enhanced image.
+
+        Returns:
+            A tuple of stacked patches of shape `(patches_per_image, image_size, image_size, 3)`.
+        """
+        concatenated_image = tf.concat([input_image, enhanced_image], axis=-1)
+        patches = random_crop_patches(
+            concatenated_image, self.image_size, self.patches_per_image
+        )
+        input_patches, enhanced_patches = tf.split(
+            patches, num_or_size_splits=2, axis=-1
+        )
+
+        # Ensuring the dataset tensor_spec is not None is the spatial dimensions
+        patches_shape = [self.patches_per_image, self.image_size, self.image_size, 3]
+        input_patches.set_shape(patches_shape)
+        enhanced_patches.set_shape(patches_shape)
+
+        return input_patches, enhanced_patches
+
     def resize(
         self, input_image: tf.Tensor, enhanced_image: tf.Tensor
     ) -> Tuple[tf.Tensor]:
@@ -103,6 +200,163 @@ class DatasetFactory(ABC):
 
         return input_image, enhanced_image
 
+    def read_image_bytes(
+        self, input_image_path: tf.Tensor, enhanced_image_path: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        """
+        Function to read the encoded bytes of an image pair from the elements produced
+        by `create_dataset`.
+
+        Args:
+            input_image_path (`tf.Tensor`): The file path for low light image.
+            enhanced_image_path (`tf.Tensor`): The file path for enhanced image.
+
+        Returns:
+            A tuple of encoded images.
+        """
+        return tf.io.read_file(input_image_path), tf.io.read_file(enhanced_image_path)
+
+    def read_images(
+        self, input_image_path: tf.Tensor, enhanced_image_path: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        """
+        Function to read and decode an image pair from the elements produced by
+        `create_dataset`.
+
+        Args:
+            input_image_path (`tf.Tensor`): The file path for low light image.
+            enhanced_image_path (`tf.Tensor`): The file path for enhanced image.
+
+        Returns:
+            A tuple of decoded images which are not normalized yet.
+        """
+        input_image_bytes, enhanced_image_bytes = self.read_image_bytes(
+            input_image_path, enhanced_image_path
+        )
+        return decode_image(input_image_bytes), decode_image(enhanced_image_bytes)
+
+    def read_cached_images(
+        self, input_image_path: tf.Tensor, enhanced_image_path: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        """
+        Function to read and decode the images stored in the decoded image cache, which
+        are the image pair returned by `read_images` unless overridden.
+
+        Args:
+            input_image_path (`tf.Tensor`): The file path for low light image.
+            enhanced_image_path (`tf.Tensor`): The file path for enhanced image.
+
+        Returns:
+            The decoded images to cache, which are paired by `pair_cached_images`.
+        """
+        return self.read_images(input_image_path, enhanced_image_path)
+
+    def pair_cached_images(self, *images: tf.Tensor) -> Tuple[tf.Tensor]:
+        """
+        Function to restore the decoded image pair from the images read from the decoded
+        image cache.
+
+        Args:
+            images (`tf.Tensor`): The images returned by `read_cached_images`.
+
+        Returns:
+            A tuple of decoded images which are not normalized yet.
+        """
+        return images
+
+    def decode_and_random_crop(
+        self, input_image_bytes: tf.Tensor, enhanced_image_bytes: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        """
+        Function to decode and apply the same random crop to an encoded image pair.
+        If both images are JPEGs of the same size, only the crop window is decoded,
+        otherwise this falls back to decoding the full images before `random_crop`.
+
+        Args:
+            input_image_bytes (`tf.Tensor`): Encoded low light image.
+            enhanced_image_bytes (`tf.Tensor`): Encoded enhanced image.
+
+        Returns:
+            A tuple of decoded random crops which are not normalized yet.
+        """
+
+        def decode_then_crop():
+            return self.random_crop(
+                decode_image(input_image_bytes), decode_image(enhanced_image_bytes)
+            )
+
+        def decode_crop_window():
+            crop_window = random_crop_window(
+                tf.image.extract_jpeg_shape(input_image_bytes), self.image_size
+            )
+            return (
+                tf.image.decode_and_crop_jpeg(
+                    input_image_bytes, crop_window, channels=3
+                ),
+                tf.image.decode_and_crop_jpeg(
+                    enhanced_image_bytes, crop_window, channels=3
+                ),
+            )
+
+        def decode_jpeg_crops():
+            # The crop window can only be shared if both the images have the same size.
+            have_same_size = tf.reduce_all(
+                tf.image.extract_jpeg_shape(input_image_bytes)
+                == tf.image.extract_jpeg_shape(enhanced_image_bytes)
+            )
+            return tf.cond(have_same_size, decode_crop_window, decode_then_crop)
+
+        are_jpegs = tf.logical_and(
+            tf.io.is_jpeg(input_image_bytes), tf.io.is_jpeg(enhanced_image_bytes)
+        )
+        input_image, enhanced_image = tf.cond(
+            are_jpegs, decode_jpeg_crops, decode_then_crop
+        )
+
+        # Ensuring the dataset tensor_spec is not None is the spatial dimensions
+        input_image.set_shape([self.image_size, self.image_size, 3])
+        enhanced_image.set_shape([self.image_size, self.image_size, 3])
+
+        return input_image, enhanced_image
+
+    def normalize(self, image: tf.Tensor) -> tf.Tensor:
+        """
+        Function to normalize an image, or to keep it as `uint8` if the normalization is
+        deferred to the model.
+
+        Args:
+            image (`tf.Tensor`): Decoded, cropped or resized image.
+        """
+        if self.defer_normalization:
+            return quantize_image(image)
+        return normalize_image(image, self.normalization_factor)
+
+    def normalize_images(
+        self, input_image: tf.Tensor, enhanced_image: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        return self.normalize(input_image), self.normalize(enhanced_image)
+
+    def preprocess_images(
+        self, input_image: tf.Tensor, enhanced_image: tf.Tensor, apply_crop: bool
+    ) -> Tuple[tf.Tensor]:
+        """
+        Mapping function for `tf.data.Dataset`. Applies `random_crop` or `resize` based
+        on a boolean flag on a decoded image pair and normalizes it.
+
+        Args:
+            input_image (`tf.Tensor`): Decoded low light image.
+            enhanced_image (`tf.Tensor`): Decoded enhanced image.
+            apply_crop (`bool`): Boolean flag to condition random cropping.
+        """
+        # Apply random cropping based on the boolean flag. Cropping before the
+        # normalization ensures that only the pixels which are kept are cast.
+        input_image, enhanced_image = (
+            self.random_crop(input_image, enhanced_image)
+            if apply_crop
+            else self.resize(input_image, enhanced_image)
+        )
+        return self.normalize_images(input_image, enhanced_image)
+
     def load_image(
         self, input_image_path: str, enhanced_image_path: str, apply_crop: bool
     ):
@@ -116,80 +370,433 @@ class DatasetFactory(ABC):
             apply_crop (`bool`): Boolean flag to condition random cropping.
         """
         # Read the image off the file path.
-        input_image = read_image(input_image_path, self.normalization_factor)
-        enhanced_image = read_image(enhanced_image_path, self.normalization_factor)
+        input_image_bytes, enhanced_image_bytes = self.read_image_bytes(
+            input_image_path, enhanced_image_path
+        )
 
-        # Apply random cropping based on the boolean flag.
-        input_image, enhanced_image = (
-            self.random_crop(input_image, enhanced_image)
-            if apply_crop
-            else self.resize(input_image, enhanced_image)
+        # Decode only the random crops whenever possible.
+        if apply_crop:
+            input_image, enhanced_image = self.decode_and_random_crop(
+                input_image_bytes, enhanced_image_bytes
+            )
+            return self.normalize_images(input_image, enhanced_image)
+
+        # The images are only resized, so that JPEGs are decoded at a reduced scale.
+        input_image = decode_image_for_size(input_image_bytes, self.image_size)
+        enhanced_image = decode_image_for_size(enhanced_image_bytes, self.image_size)
+        return self.preprocess_images(input_image, enhanced_image, apply_crop)
+
+    def augment_batch(
+        self, images: Tuple[tf.Tensor, tf.Tensor], seed: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        """
+        Mapping function for a batched `tf.data.Dataset`. Applies the same random flips,
+        rotations and photometric jitter to the low light and enhanced images.
+
+        Args:
+            images (`Tuple[tf.Tensor, tf.Tensor]`): Batches of low light and enhanced images.
+            seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        """
+        input_images, enhanced_images = images
+        return random_paired_batched_augmentation(
+            input_images, enhanced_images, seed, self.photometric_jitter
         )
-        return input_image, enhanced_image
 
-    def build_dataset(
+    def get_dataset_source(self) -> str:
+        """Returns an identifier of the source the dataset was fetched from."""
+        return self.__class__.__name__
+
+    def get_cache_path(self, input_images: List[str], enhanced_images: List[str]):
+        """
+        Function to get the path of the decoded image cache, which is keyed by a
+        fingerprint of the image files, the bit depth and the source of the dataset.
+
+        Args:
+            input_images (`List[str]`): A list of image filenames.
+            enhanced_images (`List[str]`): A list of image filenames.
+
+        Returns:
+            The cache filename prefix, or an empty string for an in-memory cache.
+        """
+        if self.cache_dir is None:
+            return ""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fingerprint = fingerprint_image_files(
+            list(input_images) + list(enhanced_images),
+            self.bit_depth,
+            self.get_dataset_source(),
+        )
+        return os.path.join(self.cache_dir, f"decoded-{fingerprint}")
+
+    def create_dataset(
+        self, input_images: List[str], enhanced_images: List[str]
+    ) -> tf.data.Dataset:
+        """
+        Function to create the source `tf.data.Dataset` whose elements are consumed by
+        `read_images`.
+
+        Args:
+            input_images (`List[str]`): A list of image filenames.
+            enhanced_images (`List[str]`): A list of image filenames.
+        """
+        return tf.data.Dataset.from_tensor_slices((input_images, enhanced_images))
+
+    def create_shuffled_dataset(
+        self, input_images: List[str], enhanced_images: List[str]
+    ) -> tf.data.Dataset:
+        """
+        Function to create the source `tf.data.Dataset` of the training images, shuffled
+        following `pipeline_options`.
+
+        Args:
+            input_images (`List[str]`): A list of image filenames.
+            enhanced_images (`List[str]`): A list of image filenames.
+        """
+        return self.pipeline_options.shuffle(
+            self.create_dataset(input_images, enhanced_images)
+        )
+
+    def distribute_dataset(self, dataset: tf.data.Dataset) -> tf.data.Dataset:
+        """
+        Function to offload the per-image preprocessing of a dataset to the `tf.data`
+        service workers, if `data_service_address` is set.
+
+        The images are dynamically sharded across the workers, so that every image is
+        still visited once per epoch.
+
+        Args:
+            dataset (`tf.data.Dataset`): Dataset of preprocessed images.
+        """
+        if self.data_service_address is None:
+            return dataset
+        return dataset.apply(
+            tf.data.experimental.service.distribute(
+                processing_mode=tf.data.experimental.service.ShardingPolicy.DYNAMIC,
+                service=self.data_service_address,
+            )
+        )
+
+    def build_element_dataset(
         self,
         input_images: List[str],
         enhanced_images: List[str],
         batch_size: int,
         apply_crop: bool,
-        apply_augmentations: bool,
     ) -> tf.data.Dataset:
         """
-        Function to build the dataset.
+        Function to build the dataset of preprocessed image pairs, before batching.
 
         Args:
             input_images (`List[str]`): A list of image filenames.
             enhanced_images (`List[str]`): A list of image filenames.
             batch_size (`int`): Number of images in a single batch.
             apply_crop (`bool`): Boolean flag to condition cropping.
-            apply_augmentations (`bool`): Boolean flag to condition augmentations.
         """
         # Build a `tf.data.Dataset` from the filenames.
-        dataset = tf.data.Dataset.from_tensor_slices((input_images, enhanced_images))
+        if apply_crop and not self.cache_decoded_images:
+            # Only the training images are shuffled, before they are read.
+            dataset = self.create_shuffled_dataset(input_images, enhanced_images)
+        else:
+            dataset = self.create_dataset(input_images, enhanced_images)
 
         # Build the mapping function and apply it to the dataset.
-        map_fn = partial(self.load_image, apply_crop=apply_crop)
+        extract_patches = apply_crop and self.patches_per_image > 1
+        if self.cache_decoded_images or extract_patches:
+            if self.cache_decoded_images:
+                # Decode once and cache the full resolution images, the cropping and
+                # augmentations after the cache still run fresh on every epoch.
+                dataset = dataset.map(
+                    self.read_cached_images, num_parallel_calls=_AUTOTUNE
+                )
+                dataset = dataset.cache(
+                    self.get_cache_path(input_images, enhanced_images)
+                )
+                if apply_crop:
+                    # The cache replays the order it was written in, so the decoded
+                    # images are shuffled after it to get a new order every epoch.
+                    dataset = self.pipeline_options.shuffle(dataset)
+                dataset = dataset.map(
+                    self.pair_cached_images, num_parallel_calls=_AUTOTUNE
+                )
+            else:
+                dataset = dataset.map(self.read_images, num_parallel_calls=_AUTOTUNE)
+            if extract_patches:
+                # Amortize every decode over several patches, which are shuffled so
+                # that the patches of an image are spread across batches.
+                dataset = dataset.map(
+                    self.random_crop_patches, num_parallel_calls=_AUTOTUNE
+                )
+                dataset = dataset.unbatch()
+                dataset = dataset.shuffle(self.patches_per_image * batch_size)
+                map_fn = self.normalize_images
+            else:
+                map_fn = partial(self.preprocess_images, apply_crop=apply_crop)
+        else:
+            map_fn = partial(self.load_image, apply_crop=apply_crop)
         dataset = dataset.map(
             map_fn,
             num_parallel_calls=_AUTOTUNE,
         )
+        return self.distribute_dataset(dataset)
+
+    def build_dataset(
+        self,
+        input_images: List[str],
+        enhanced_images: List[str],
+        batch_size: int,
+        apply_crop: bool,
+        apply_augmentations: bool,
+    ) -> tf.data.Dataset:
+        """
+        Function to build the dataset.
+
+        Args:
+            input_images (`List[str]`): A list of image filenames.
+            enhanced_images (`List[str]`): A list of image filenames.
+            batch_size (`int`): Number of images in a single batch.
+            apply_crop (`bool`): Boolean flag to condition cropping.
+            apply_augmentations (`bool`): Boolean flag to condition augmentations.
+        """
+        dataset = self.build_element_dataset(
+            input_images, enhanced_images, batch_size, apply_crop
+        )
+        dataset = dataset.batch(batch_size, drop_remainder=True)
 
-        # Apply augmentations.
+        # Apply augmentations on whole batches with a fresh stateless seed per batch.
         if apply_augmentations:
+            seeds = tf.data.Dataset.random(rerandomize_each_iteration=True).batch(2)
+            dataset = tf.data.Dataset.zip((dataset, seeds))
             dataset = dataset.map(
-                random_horiontal_flip,
-                num_parallel_calls=_AUTOTUNE,
-            )
-            dataset = dataset.map(
-                random_vertical_flip,
+                self.augment_batch,
                 num_parallel_calls=_AUTOTUNE,
             )
-        dataset = dataset.batch(batch_size, drop_remainder=True)
-        return dataset.prefetch(_AUTOTUNE)
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
 
-    def get_datasets(self, batch_size: int) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
+    def materialize(
+        self, dataset: tf.data.Dataset, input_images: List[str], batch_size: int
+    ) -> tf.data.Dataset:
         """
-        Function to retrieve the train and val dataset.
+        Function to store a batched deterministic dataset, e.g. the val dataset, the
+        first time it is iterated, so that the later epochs, callbacks and evaluators
+        iterating it reuse the stored batches instead of reading the images again.
+
+        The batches are stored in memory if they fit in `max_val_memory_bytes`, and on
+        disk in `cache_dir` otherwise, or in a temporary directory removed with the data
+        loader if `cache_dir` is `None`.
 
         Args:
+            dataset (`tf.data.Dataset`): The batched dataset.
+            input_images (`List[str]`): A list of image filenames the dataset is built from.
             batch_size (`int`): Number of images in a single batch.
+        """
+        if self.cache_dir is None:
+            if not hasattr(self, "_materialized_dataset_dir"):
+                self._materialized_dataset_dir = tempfile.TemporaryDirectory(
+                    prefix="restorers-"
+                )
+            cache_dir = self._materialized_dataset_dir.name
+        else:
+            cache_dir = self.cache_dir
+        fingerprint = fingerprint_image_files(
+            input_images,
+            self.bit_depth,
+            self.image_size,
+            batch_size,
+            self.defer_normalization,
+            self.__class__.__name__,
+            self.get_dataset_source(),
+        )
+        dataset = materialize_dataset(
+            dataset,
+            self.max_val_memory_bytes,
+            os.path.join(cache_dir, f"materialized-{fingerprint}"),
+        )
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
+
+    def get_steps_per_epoch(self, batch_size: int) -> int:
+        """Returns the number of batches of the training dataset, every training image
+        yielding `patches_per_image` examples."""
+        return len(self.train_input_images) * self.patches_per_image // batch_size
+
+    def get_datasets(
+        self,
+        batch_size: int,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
+        """
+        Function to retrieve the train and val dataset.
+
+        Args:
+            batch_size (`int`): Number of images in a single batch, the global batch size
+                if `input_context` is passed.
+            input_context (`Optional[tf.distribute.InputContext]`): Input context passed by
+                `tf.distribute.Strategy.distribute_datasets_from_function`. The images are
+                then sharded across the input pipelines and batched at the per-replica
+                batch size.
 
         Returns:
             A tuple of `tf.data.Dataset` for training and validation.
         """
+        if input_context is not None:
+            batch_size = input_context.get_per_replica_batch_size(batch_size)
         train_dataset = self.build_dataset(
-            input_images=self.train_input_images,
-            enhanced_images=self.train_enhanced_images,
+            input_images=shard_image_files(self.train_input_images, input_context),
+            enhanced_images=shard_image_files(
+                self.train_enhanced_images, input_context
+            ),
             batch_size=batch_size,
             apply_crop=True,
             apply_augmentations=True,
         )
         val_dataset = self.build_dataset(
-            input_images=self.val_input_images,
-            enhanced_images=self.val_enhanced_images,
+            input_images=shard_image_files(self.val_input_images, input_context),
+            enhanced_images=shard_image_files(self.val_enhanced_images, input_context),
             batch_size=batch_size,
             apply_crop=False,
             apply_augmentations=False,
         )
+        if self.materialize_val_dataset:
+            val_dataset = self.materialize(
+                val_dataset,
+                shard_image_files(self.val_input_images, input_context),
+                batch_size,
+            )
         return train_dataset, val_dataset
+
+    def pad_images_to_bucket(
+        self, input_image: tf.Tensor, enhanced_image: tf.Tensor, bucket_size: int
+    ) -> Tuple[tf.Tensor]:
+        input_image, mask = pad_to_bucket(self.normalize(input_image), bucket_size)
+        enhanced_image, _ = pad_to_bucket(self.normalize(enhanced_image), bucket_size)
+        return input_image, enhanced_image, mask
+
+    def get_bucketed_val_dataset(
+        self,
+        batch_size: int,
+        bucket_size: int = 64,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> tf.data.Dataset:
+        """
+        Function to retrieve the val dataset at the native resolution of the images,
+        instead of resizing them to `image_size`.
+
+        Every image is padded to the next multiple of `bucket_size` in height and width,
+        and batched with the images padded to the same resolution, so that the model
+        only runs on a few distinct shapes. The elements are `(input_image,
+        enhanced_image, mask)` tuples, the mask being 1 on the pixels of the original
+        images, which Keras passes to `CharbonnierLoss`, `PSNRMetric` and `SSIMMetric`
+        as `sample_weight` so that the padding is ignored.
+
+        Args:
+            batch_size (`int`): Maximum number of images in a single batch, the global
+                batch size if `input_context` is passed.
+            bucket_size (`int`): The granularity of the padded resolutions, which should be
+                a multiple of the downsampling factor of the model.
+            input_context (`Optional[tf.distribute.InputContext]`): Input context passed by
+                `tf.distribute.Strategy.distribute_datasets_from_function`.
+        """
+        if input_context is not None:
+            batch_size = input_context.get_per_replica_batch_size(batch_size)
+        dataset = self.create_dataset(
+            shard_image_files(self.val_input_images, input_context),
+            shard_image_files(self.val_enhanced_images, input_context),
+        )
+        dataset = dataset.map(self.read_images, num_parallel_calls=_AUTOTUNE)
+        dataset = dataset.map(
+            partial(self.pad_images_to_bucket, bucket_size=bucket_size),
+            num_parallel_calls=_AUTOTUNE,
+        )
+        dataset = dataset.group_by_window(
+            key_func=lambda input_image, *_: get_bucket_key(input_image, bucket_size),
+            reduce_func=lambda _, window: window.batch(batch_size),
+            window_size=batch_size,
+        )
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
+
+    def get_distributed_datasets(
+        self, strategy: tf.distribute.Strategy, batch_size: int
+    ) -> Tuple[tf.distribute.DistributedDataset, tf.distribute.DistributedDataset]:
+        """
+        Function to retrieve the train and val dataset distributed by `strategy`, with one
+        input pipeline per worker reading its own shard of the images.
+
+        Args:
+            strategy (`tf.distribute.Strategy`): The distribution strategy.
+            batch_size (`int`): Global number of images in a single batch.
+
+        Returns:
+            A tuple of `tf.distribute.DistributedDataset` for training and validation.
+        """
+        train_dataset = strategy.distribute_datasets_from_function(
+            lambda input_context: self.get_datasets(batch_size, input_context)[0]
+        )
+        val_dataset = strategy.distribute_datasets_from_function(
+            lambda input_context: self.get_datasets(batch_size, input_context)[1]
+        )
+        return train_dataset, val_dataset
+
+    def export_to_tfrecords(
+        self,
+        output_dir: str,
+        num_shards: int = 8,
+        compression_type: Optional[str] = None,
+    ) -> None:
+        """
+        Function to export the train and val splits into sharded TFRecord files which
+        can be read back using `TFRecordDataLoader`.
+
+        Args:
+            output_dir (`str`): Directory in which the shards are written.
+            num_shards (`int`): Number of shards per split.
+            compression_type (`Optional[str]`): One of `None`, `"GZIP"` or `"ZLIB"`.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        dataset_info = {
+            "bit_depth": self.bit_depth,
+            "compression_type": compression_type,
+            "splits": {},
+        }
+        for split, input_images, enhanced_images in [
+            ("train", self.train_input_images, self.train_enhanced_images),
+            ("val", self.val_input_images, self.val_enhanced_images),
+        ]:
+            if len(input_images) == 0:
+                continue
+            shard_paths = write_tfrecord_shards(
+                input_images,
+                enhanced_images,
+                output_dir=output_dir,
+                split=split,
+                num_shards=num_shards,
+                compression_type=compression_type,
+            )
+            dataset_info["splits"][split] = {
+                "num_examples": len(input_images),
+                "shards": [os.path.basename(path) for path in shard_paths],
+            }
+        write_dataset_info(output_dir, dataset_info)
+
+    def export_to_memory_map(self, output_dir: str) -> None:
+        """
+        Function to decode the train and val splits once and pack them into a `uint8`
+        memory-map which can be read back using `MemoryMappedDataLoader`.
+
+        Args:
+            output_dir (`str`): Directory in which the memory-map is written.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        write_memory_map(
+            list(self.train_input_images) + list(self.val_input_images),
+            list(self.train_enhanced_images) + list(self.val_enhanced_images),
+            output_dir=output_dir,
+        )
+        write_dataset_info(
+            output_dir,
+            {
+                "bit_depth": self.bit_depth,
+                "splits": {
+                    "train": {"num_examples": len(self.train_input_images)},
+                    "val": {"num_examples": len(self.val_input_images)},
+                },
+            },
+        )
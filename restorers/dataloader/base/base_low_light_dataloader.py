@@ -1,13 +1,21 @@
+import io
+import random
+import posixpath
 from abc import abstractmethod
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 
 import tensorflow as tf
 import wandb
 from absl import logging
-from PIL import Image
 from tqdm.autonotebook import tqdm
 
 from .base_dataloader import DatasetFactory
+from .commons import load_thumbnail
+from .manifest import DatasetManifest
+from .options import PipelineOptions
+from .storage import RemoteFileReader
+from .zip_utils import ZipArchive
 from restorers.utils import fetch_wandb_artifact
 
 
@@ -20,14 +28,56 @@ class LowLightDatasetFactory(DatasetFactory):
         visualize_on_wandb: bool,
         dataset_artifact_address: Union[str, None] = None,
         dataset_url: Union[str, None] = None,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        thumbnail_size: int = 256,
+        max_visualizations_per_split: Optional[int] = 100,
+        read_from_zip: bool = False,
+        file_reader: Optional[RemoteFileReader] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
     ):
+        if data_service_address is not None and (
+            read_from_zip or file_reader is not None
+        ):
+            # The zip archive and the remote storage are read by python code wrapped
+            # in `tf.numpy_function`, which can not be serialized to the workers.
+            raise ValueError(
+                "data_service_address is not supported when reading the images from "
+                "a zip archive or a file_reader, as the tf.data service workers can "
+                "not run their readers."
+            )
+        self.read_from_zip = read_from_zip
+        self.file_reader = file_reader
+        self.zip_archive = None
+        self.thumbnail_size = thumbnail_size
+        self.max_visualizations_per_split = max_visualizations_per_split
         if visualize_on_wandb:
             self.table = wandb.Table(
                 columns=["Image-ID", "Split", "Low-Light-Image", "Ground-Truth-Image"]
             )
         self.dataset_url = dataset_url
         self.dataset_artifact_address = dataset_artifact_address
-        super().__init__(image_size, bit_depth, val_split, visualize_on_wandb)
+        super().__init__(
+            image_size,
+            bit_depth,
+            val_split,
+            visualize_on_wandb,
+            cache_decoded_images,
+            cache_dir,
+            photometric_jitter,
+            patches_per_image,
+            defer_normalization,
+            data_service_address,
+            materialize_val_dataset,
+            max_val_memory_bytes,
+            pipeline_options,
+        )
 
     @abstractmethod
     def define_dataset_structure(self, dataset_path, val_split):
@@ -38,17 +88,140 @@ class LowLightDatasetFactory(DatasetFactory):
     def __len__(self):
         return self.num_data_points
 
+    def get_dataset_source(self) -> str:
+        if self.file_reader is not None:
+            return self.file_reader.storage.url
+        return str(self.dataset_artifact_address or self.dataset_url)
+
+    def get_image_pairs(
+        self, dataset_path: Optional[str], splits: Dict[str, Tuple[str, str]]
+    ) -> Dict[str, Tuple[List[str], List[str]]]:
+        """
+        Lists the input and target images of every split, from the manifest of the
+        dataset directory, from the zip archive or from the remote storage the dataset
+        is read from.
+
+        Args:
+            dataset_path (`Optional[str]`): Root directory of the dataset.
+            splits (`Dict[str, Tuple[str, str]]`): The input and target image directories
+                of every split, relative to `dataset_path`.
+        """
+        if self.file_reader is not None:
+            image_pairs = {}
+            for split, (input_directory, target_directory) in splits.items():
+                try:
+                    image_pairs[split] = self.file_reader.get_image_pairs(
+                        input_directory, target_directory
+                    )
+                except (OSError, ValueError):
+                    image_pairs[split] = ([], [])
+            return image_pairs
+        if self.zip_archive is None:
+            self.manifest = DatasetManifest(
+                dataset_path, splits, manifest_dir=self.cache_dir
+            )
+            return {split: self.manifest.get_image_pairs(split) for split in splits}
+        image_pairs = {}
+        for split, (input_directory, target_directory) in splits.items():
+            try:
+                root = self.zip_archive.find_root(input_directory)
+            except ValueError:
+                image_pairs[split] = ([], [])
+                continue
+            image_pairs[split] = self.zip_archive.get_image_pairs(
+                posixpath.join(root, input_directory),
+                posixpath.join(root, target_directory),
+            )
+        return image_pairs
+
+    def read_file(self, image_path: tf.Tensor) -> tf.Tensor:
+        if self.file_reader is not None:
+            return self.file_reader.read_tensor(image_path)
+        if self.zip_archive is None:
+            return tf.io.read_file(image_path)
+        return self.zip_archive.read_tensor(image_path)
+
+    def read_image_bytes(
+        self, input_image_path: tf.Tensor, enhanced_image_path: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        return self.read_file(input_image_path), self.read_file(enhanced_image_path)
+
+    def create_dataset(
+        self, input_images: List[str], enhanced_images: List[str]
+    ) -> tf.data.Dataset:
+        if self.file_reader is not None:
+            # The pairs are read one after the other, which is the read-ahead order.
+            return self.file_reader.create_path_dataset(input_images, enhanced_images)
+        return super().create_dataset(input_images, enhanced_images)
+
+    def create_shuffled_dataset(
+        self, input_images: List[str], enhanced_images: List[str]
+    ) -> tf.data.Dataset:
+        if (
+            self.file_reader is None
+            or self.pipeline_options.shuffle_buffer_size is None
+        ):
+            return super().create_shuffled_dataset(input_images, enhanced_images)
+        # The reader shuffles the pairs itself, so that it reads ahead in their order.
+        return self.file_reader.create_path_dataset(
+            input_images,
+            enhanced_images,
+            shuffle=True,
+            reshuffle_each_iteration=self.pipeline_options.reshuffle_each_iteration,
+        )
+
+    def _open_image_file(self, image_path: str):
+        if self.file_reader is not None:
+            return io.BytesIO(self.file_reader.read(image_path))
+        if self.zip_archive is None:
+            return image_path
+        return io.BytesIO(self.zip_archive.read(image_path))
+
+    def get_image_id(self, image_path: str):
+        """Returns the Image-ID of an image in the visualization table, i.e. the number
+        the image is named after."""
+        return int(image_path.split("/")[-1][:-4])
+
+    def _create_data_row(self, low_light_image_path, enhanced_image_path, split):
+        return (
+            self.get_image_id(low_light_image_path),
+            split,
+            wandb.Image(
+                load_thumbnail(
+                    self._open_image_file(low_light_image_path), self.thumbnail_size
+                )
+            ),
+            wandb.Image(
+                load_thumbnail(
+                    self._open_image_file(enhanced_image_path), self.thumbnail_size
+                )
+            ),
+        )
+
     def _create_data_table(self, low_light_images, enhanced_images, split):
-        for idx in tqdm(
-            range(len(low_light_images)),
-            desc=f"Generating visualizations for {split} images",
+        indices = range(len(low_light_images))
+        if (
+            self.max_visualizations_per_split is not None
+            and len(indices) > self.max_visualizations_per_split
         ):
-            self.table.add_data(
-                int(low_light_images[idx].split("/")[-1][:-4]),
-                split,
-                wandb.Image(Image.open(low_light_images[idx])),
-                wandb.Image(Image.open(enhanced_images[idx])),
+            # A fixed seed visualizes the same images on every run.
+            indices = sorted(
+                random.Random(0).sample(indices, self.max_visualizations_per_split)
             )
+        with ThreadPoolExecutor() as executor:
+            rows = executor.map(
+                lambda idx: self._create_data_row(
+                    low_light_images[idx], enhanced_images[idx], split
+                ),
+                indices,
+            )
+            # Rows are added as soon as they are ready, only thumbnails are in memory.
+            for row in tqdm(
+                rows,
+                total=len(indices),
+                desc=f"Generating visualizations for {split} images",
+            ):
+                self.table.add_data(*row)
 
     def sanity_tests(self):
         try:
@@ -75,7 +248,18 @@ class LowLightDatasetFactory(DatasetFactory):
         wandb.log({f"Lol-Dataset": self.table})
 
     def fetch_dataset(self, val_split, visualize_on_wandb: bool):
-        if self.dataset_url is not None:
+        if self.file_reader is not None:
+            # The images are read from the remote storage, which is not copied.
+            dataset_path = None
+        elif self.dataset_url is not None and self.read_from_zip:
+            # The images are read straight from the archive, which is not extracted.
+            self.zip_archive = ZipArchive(
+                tf.keras.utils.get_file(
+                    fname="lol_dataset.zip", origin=self.dataset_url
+                )
+            )
+            dataset_path = None
+        elif self.dataset_url is not None:
             dataset_path = tf.keras.utils.get_file(
                 fname="lol_dataset.zip",
                 origin=self.dataset_url,
@@ -1,7 +1,14 @@
+import os
+import json
 import random
-from typing import Tuple
+import hashlib
+from functools import partial
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
 import tensorflow as tf
+from PIL import Image
+
+DATASET_INFO_FILE = "dataset_info.json"
 
 
 def random_horiontal_flip(low_image, enhanced_image) -> Tuple[tf.Tensor, tf.Tensor]:
@@ -30,8 +37,310 @@ def random_unpaired_vertical_flip(low_image) -> tf.Tensor:
     return low_image
 
 
-def read_image(image_path: str, normalization_factor: float = 1.0) -> tf.Tensor:
-    image = tf.io.read_file(image_path)
-    image = tf.io.decode_image(image, channels=3, expand_animations=False)
-    image = tf.cast(image, dtype=tf.float32) / normalization_factor
+def _random_batch_mask(batch_size: tf.Tensor, seed: tf.Tensor) -> tf.Tensor:
+    return tf.random.stateless_uniform([batch_size, 1, 1, 1], seed=seed) < 0.5
+
+
+def random_batched_augmentation(
+    images: tf.Tensor, seed: tf.Tensor, photometric_jitter: float = 0.0
+) -> tf.Tensor:
+    """
+    Applies random flips, 90 degree rotations and photometric jitter to a batch of
+    images, using stateless per-sample random masks so that each sample gets its own
+    transform. Paired images should be concatenated along the channel axis so that
+    they are transformed identically.
+
+    Args:
+        images (`tf.Tensor`): A batch of images of shape `(batch, height, width, channels)`.
+        seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        photometric_jitter (`float`): Maximum relative change in brightness and contrast.
+    """
+    batch_size = tf.shape(images)[0]
+    seeds = tf.random.experimental.stateless_split(seed, num=5)
+
+    # Any composition of flips and 90 degree rotations is a transpose followed by
+    # a horizontal and a vertical flip, which keeps every step a single `tf.where`.
+    if images.shape[1] is not None and images.shape[1] == images.shape[2]:
+        images = tf.where(
+            _random_batch_mask(batch_size, seeds[0]),
+            tf.transpose(images, perm=[0, 2, 1, 3]),
+            images,
+        )
+    images = tf.where(
+        _random_batch_mask(batch_size, seeds[1]), tf.reverse(images, axis=[2]), images
+    )
+    images = tf.where(
+        _random_batch_mask(batch_size, seeds[2]), tf.reverse(images, axis=[1]), images
+    )
+
+    if photometric_jitter > 0:
+        dtype = images.dtype
+        images = tf.cast(images, tf.float32)
+        brightness = tf.random.stateless_uniform(
+            [batch_size, 1, 1, 1],
+            seed=seeds[3],
+            minval=1.0 - photometric_jitter,
+            maxval=1.0 + photometric_jitter,
+        )
+        contrast = tf.random.stateless_uniform(
+            [batch_size, 1, 1, 1],
+            seed=seeds[4],
+            minval=1.0 - photometric_jitter,
+            maxval=1.0 + photometric_jitter,
+        )
+        mean = tf.reduce_mean(images, axis=[1, 2], keepdims=True)
+        images = ((images - mean) * contrast + mean) * brightness
+        if dtype.is_integer:
+            # Integer images are normalized by the model, see `defer_normalization`.
+            images = quantize_image(tf.clip_by_value(images, 0.0, dtype.max), dtype)
+        else:
+            images = tf.clip_by_value(images, 0.0, 1.0)
+    return images
+
+
+def random_paired_batched_augmentation(
+    low_images: tf.Tensor,
+    enhanced_images: tf.Tensor,
+    seed: tf.Tensor,
+    photometric_jitter: float = 0.0,
+) -> Tuple[tf.Tensor, tf.Tensor]:
+    images = random_batched_augmentation(
+        tf.concat([low_images, enhanced_images], axis=-1), seed, photometric_jitter
+    )
+    low_images, enhanced_images = tf.split(images, num_or_size_splits=2, axis=-1)
+    return low_images, enhanced_images
+
+
+def random_crop_window(image_shape: tf.Tensor, crop_size: int) -> tf.Tensor:
+    """
+    Samples a random square crop window `[offset_y, offset_x, size, size]` inside an
+    image of shape `image_shape`, as expected by `tf.image.decode_and_crop_jpeg`.
+    """
+    height, width = image_shape[0], image_shape[1]
+    crop_size = tf.minimum(crop_size, tf.minimum(height, width))
+    offset_y = tf.random.uniform((), maxval=height - crop_size + 1, dtype=tf.int32)
+    offset_x = tf.random.uniform((), maxval=width - crop_size + 1, dtype=tf.int32)
+    return tf.stack([offset_y, offset_x, crop_size, crop_size])
+
+
+def pad_to_bucket(image: tf.Tensor, bucket_size: int) -> Tuple[tf.Tensor, tf.Tensor]:
+    """
+    Pads an image on the bottom and right to the next multiple of `bucket_size` in
+    height and width, and returns the padded image with its `float32` mask, which is 1
+    on the pixels of the original image and 0 on the padding.
+    """
+    height, width = tf.shape(image)[0], tf.shape(image)[1]
+    bucket_height = -(-height // bucket_size) * bucket_size
+    bucket_width = -(-width // bucket_size) * bucket_size
+    padded_image = tf.image.pad_to_bounding_box(
+        image, 0, 0, bucket_height, bucket_width
+    )
+    mask = tf.image.pad_to_bounding_box(
+        tf.ones([height, width, 1]), 0, 0, bucket_height, bucket_width
+    )
+    return padded_image, mask
+
+
+def get_bucket_key(image: tf.Tensor, bucket_size: int) -> tf.Tensor:
+    """Returns a unique `int64` key for the resolution of an image padded by
+    `pad_to_bucket`."""
+    image_shape = tf.cast(tf.shape(image), tf.int64) // bucket_size
+    return image_shape[0] * (2**32) + image_shape[1]
+
+
+def random_crop_patches(
+    image: tf.Tensor, patch_size: int, num_patches: int
+) -> tf.Tensor:
+    """
+    Extracts `num_patches` independent random square crops from an image, which are
+    stacked into a tensor of shape `(num_patches, patch_size, patch_size, channels)`.
+    """
+    image_shape = tf.shape(image)
+    patch_size = tf.minimum(patch_size, image_shape[0])
+    offsets = tf.stack(
+        [
+            tf.random.uniform(
+                [num_patches], maxval=image_shape[0] - patch_size + 1, dtype=tf.int32
+            ),
+            tf.random.uniform(
+                [num_patches], maxval=image_shape[1] - patch_size + 1, dtype=tf.int32
+            ),
+        ],
+        axis=-1,
+    )
+    return tf.map_fn(
+        lambda offset: tf.slice(
+            image, [offset[0], offset[1], 0], [patch_size, patch_size, -1]
+        ),
+        offsets,
+        fn_output_signature=image.dtype,
+    )
+
+
+def decode_image(image_bytes: tf.Tensor) -> tf.Tensor:
+    return tf.io.decode_image(image_bytes, channels=3, expand_animations=False)
+
+
+_JPEG_DECODE_RATIOS = (1, 2, 4, 8)
+
+
+def get_jpeg_decode_ratio_index(
+    image_shape: tf.Tensor, target_size: Union[int, Tuple[int, int]]
+) -> tf.Tensor:
+    """Returns the index in `(1, 2, 4, 8)` of the largest DCT scaling ratio of libjpeg
+    at which a JPEG image of shape `image_shape` is decoded to at least `target_size`,
+    i.e. `0` if the image is smaller than `target_size`."""
+    target_size = tf.broadcast_to(tf.cast(target_size, tf.int32), [2])
+    ratios = tf.constant(_JPEG_DECODE_RATIOS)
+    # libjpeg rounds the scaled dimensions up.
+    scaled_shapes = -(-tf.cast(image_shape[None, :2], tf.int32) // ratios[:, None])
+    covers_target = tf.reduce_all(scaled_shapes >= target_size[None], axis=1)
+    covers_target = tf.logical_or(covers_target, tf.equal(ratios, 1))
+    return tf.cast(tf.reduce_max(tf.where(covers_target)), tf.int32)
+
+
+def decode_image_for_size(
+    image_bytes: tf.Tensor, target_size: Union[int, Tuple[int, int]]
+) -> tf.Tensor:
+    """
+    Decodes an image which is going to be resized to `target_size`. JPEG images are
+    decoded at the smallest of the 1/2, 1/4 or 1/8 scales of libjpeg which still covers
+    `target_size`, which skips most of the inverse DCT of large images, while the other
+    formats are decoded at full resolution.
+
+    Args:
+        image_bytes (`tf.Tensor`): Encoded image.
+        target_size (`Union[int, Tuple[int, int]]`): The `(height, width)` the image is
+            resized to afterwards, or the size of a square.
+    """
+
+    def decode_reduced_jpeg():
+        ratio_index = get_jpeg_decode_ratio_index(
+            tf.image.extract_jpeg_shape(image_bytes), target_size
+        )
+        return tf.switch_case(
+            ratio_index,
+            [
+                partial(tf.io.decode_jpeg, image_bytes, channels=3, ratio=ratio)
+                for ratio in _JPEG_DECODE_RATIOS
+            ],
+        )
+
+    image = tf.cond(
+        tf.io.is_jpeg(image_bytes),
+        decode_reduced_jpeg,
+        lambda: decode_image(image_bytes),
+    )
+    image.set_shape([None, None, 3])
     return image
+
+
+def normalize_image(image: tf.Tensor, normalization_factor: float = 1.0) -> tf.Tensor:
+    return tf.cast(image, dtype=tf.float32) / normalization_factor
+
+
+def quantize_image(image: tf.Tensor, dtype: tf.dtypes.DType = tf.uint8) -> tf.Tensor:
+    """Rounds an image, e.g. the output of `tf.image.resize`, back to an integer dtype."""
+    if image.dtype == dtype:
+        return image
+    return tf.saturate_cast(tf.round(image), dtype)
+
+
+def load_thumbnail(
+    image_path: Union[str, BinaryIO], thumbnail_size: int
+) -> Image.Image:
+    """
+    Loads an image, from a path or a file object, downscaled to fit in `thumbnail_size` x `thumbnail_size`. JPEG images
+    are decoded directly at a reduced scale using the DCT scaling of PIL's draft mode,
+    so that full resolution images are never held in memory.
+    """
+    with Image.open(image_path) as image:
+        image.draft("RGB", (thumbnail_size, thumbnail_size))
+        image = image.convert("RGB")
+    image.thumbnail((thumbnail_size, thumbnail_size))
+    return image
+
+
+def resize_image(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Resizes an image opened by PIL to `size`, i.e. `(width, height)`, as an RGB
+    image. A JPEG image which is not loaded yet is decoded at the smallest of the 1/2,
+    1/4 or 1/8 scales which still covers `size`, using the DCT scaling of PIL's draft
+    mode. Other images are converted to RGB before being resized, as palette images
+    would otherwise be resized with the nearest neighbour."""
+    if image.format == "JPEG":
+        image.draft("RGB", size)
+    return image.convert("RGB").resize(size)
+
+
+def read_image(image_path: str, normalization_factor: float = 1.0) -> tf.Tensor:
+    image = decode_image(tf.io.read_file(image_path))
+    return normalize_image(image, normalization_factor)
+
+
+def shard_image_files(
+    image_files: List, input_context: Optional[tf.distribute.InputContext] = None
+) -> List:
+    """Returns the image files read by the input pipeline of `input_context`, every
+    pipeline reading a disjoint, interleaved subset of the files."""
+    if input_context is None or input_context.num_input_pipelines == 1:
+        return image_files
+    return image_files[
+        input_context.input_pipeline_id :: input_context.num_input_pipelines
+    ]
+
+
+def get_dataset_size(dataset: tf.data.Dataset) -> Optional[int]:
+    """Returns the size in bytes of a finite dataset whose elements have fully defined
+    shapes, or `None` if it cannot be known without iterating the dataset."""
+    cardinality = int(dataset.cardinality())
+    if cardinality < 0:
+        return None
+    element_size = 0
+    for spec in tf.nest.flatten(dataset.element_spec):
+        if not spec.shape.is_fully_defined():
+            return None
+        element_size += spec.shape.num_elements() * spec.dtype.size
+    return cardinality * element_size
+
+
+def materialize_dataset(
+    dataset: tf.data.Dataset, max_memory_bytes: int, cache_path: str
+) -> tf.data.Dataset:
+    """
+    Stores the elements of a deterministic dataset the first time it is fully iterated,
+    in memory if they fit in `max_memory_bytes` and in files prefixed by `cache_path`
+    otherwise, so that the later iterations never run the pipeline again.
+    """
+    dataset_size = get_dataset_size(dataset)
+    if dataset_size is not None and dataset_size <= max_memory_bytes:
+        return dataset.cache()
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    return dataset.cache(cache_path)
+
+
+def fingerprint_image_files(image_files: List[str], *args) -> str:
+    """
+    Computes a fingerprint of a list of image files, so that anything derived from
+    the files, such as a cache of the decoded images, is never reused once the files
+    or any of the extra `args` change.
+    """
+    hasher = hashlib.sha256()
+    for arg in args:
+        hasher.update(repr(arg).encode())
+    for image_file in image_files:
+        image_file = str(image_file)
+        hasher.update(image_file.encode())
+        if os.path.exists(image_file):
+            file_stat = os.stat(image_file)
+            hasher.update(f"{file_stat.st_size}:{file_stat.st_mtime_ns}".encode())
+    return hasher.hexdigest()
+
+
+def write_dataset_info(output_dir: str, dataset_info: Dict) -> None:
+    with open(os.path.join(output_dir, DATASET_INFO_FILE), "w") as info_file:
+        json.dump(dataset_info, info_file, indent=4)
+
+
+def read_dataset_info(dataset_dir: str) -> Dict:
+    with open(os.path.join(dataset_dir, DATASET_INFO_FILE), "r") as info_file:
+        return json.load(info_file)
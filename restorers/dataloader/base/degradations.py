@@ -0,0 +1,250 @@
+from typing import Optional, Sequence, Tuple
+
+import tensorflow as tf
+
+
+def _random_batch_uniform(
+    batch_size: tf.Tensor, seed: tf.Tensor, value_range: Tuple[float, float]
+) -> tf.Tensor:
+    return tf.random.stateless_uniform(
+        [batch_size, 1, 1, 1], seed=seed, minval=value_range[0], maxval=value_range[1]
+    )
+
+
+def random_exposure(
+    images: tf.Tensor,
+    seed: tf.Tensor,
+    gamma_range: Tuple[float, float] = (1.0, 1.0),
+    exposure_range: Tuple[float, float] = (1.0, 1.0),
+) -> tf.Tensor:
+    """
+    Darkens a batch of images with a random gamma curve followed by a random exposure
+    scaling, one per image, mimicking an underexposed photograph.
+
+    Args:
+        images (`tf.Tensor`): A batch of images in `[0, 1]` of shape `(batch, height,
+            width, channels)`.
+        seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        gamma_range (`Tuple[float, float]`): Range of the gamma, above 1 to darken.
+        exposure_range (`Tuple[float, float]`): Range of the exposure scale, below 1 to
+            darken.
+    """
+    batch_size = tf.shape(images)[0]
+    seeds = tf.random.experimental.stateless_split(seed, num=2)
+    gamma = _random_batch_uniform(batch_size, seeds[0], gamma_range)
+    exposure = _random_batch_uniform(batch_size, seeds[1], exposure_range)
+    return tf.clip_by_value(tf.pow(images, gamma) * exposure, 0.0, 1.0)
+
+
+def random_poisson_gaussian_noise(
+    images: tf.Tensor,
+    seed: tf.Tensor,
+    shot_noise_range: Tuple[float, float] = (0.0, 0.01),
+    read_noise_range: Tuple[float, float] = (0.0, 0.02),
+) -> tf.Tensor:
+    """
+    Adds the heteroscedastic noise of a camera sensor to a batch of images, i.e. a
+    signal dependent shot noise of variance `shot_noise * image` and a signal
+    independent read noise of standard deviation `read_noise`, with random noise levels
+    per image. The shot noise is approximated by a Gaussian, so that the whole batch is
+    noised by a single `stateless_normal`.
+
+    Args:
+        images (`tf.Tensor`): A batch of images in `[0, 1]` of shape `(batch, height,
+            width, channels)`.
+        seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        shot_noise_range (`Tuple[float, float]`): Range of the shot noise gain.
+        read_noise_range (`Tuple[float, float]`): Range of the read noise standard
+            deviation.
+    """
+    batch_size = tf.shape(images)[0]
+    seeds = tf.random.experimental.stateless_split(seed, num=3)
+    shot_noise = _random_batch_uniform(batch_size, seeds[0], shot_noise_range)
+    read_noise = _random_batch_uniform(batch_size, seeds[1], read_noise_range)
+    variance = shot_noise * images + tf.square(read_noise)
+    noise = tf.random.stateless_normal(tf.shape(images), seed=seeds[2])
+    return tf.clip_by_value(images + tf.sqrt(variance) * noise, 0.0, 1.0)
+
+
+def random_gaussian_kernels(
+    batch_size: tf.Tensor,
+    seed: tf.Tensor,
+    kernel_size: int,
+    sigma_range: Tuple[float, float],
+) -> tf.Tensor:
+    """Samples a random anisotropic Gaussian blur kernel of shape `(kernel_size,
+    kernel_size)` per image, returned as a tensor of shape `(batch, kernel_size,
+    kernel_size)`."""
+    seeds = tf.random.experimental.stateless_split(seed, num=2)
+    sigma_y = tf.random.stateless_uniform(
+        [batch_size, 1, 1], seed=seeds[0], minval=sigma_range[0], maxval=sigma_range[1]
+    )
+    sigma_x = tf.random.stateless_uniform(
+        [batch_size, 1, 1], seed=seeds[1], minval=sigma_range[0], maxval=sigma_range[1]
+    )
+    coordinates = tf.range(kernel_size, dtype=tf.float32) - (kernel_size - 1) / 2
+    kernels = tf.exp(
+        -tf.square(coordinates)[None, :, None] / (2 * tf.square(sigma_y))
+        - tf.square(coordinates)[None, None, :] / (2 * tf.square(sigma_x))
+    )
+    return kernels / tf.reduce_sum(kernels, axis=[1, 2], keepdims=True)
+
+
+def batched_depthwise_blur(images: tf.Tensor, kernels: tf.Tensor) -> tf.Tensor:
+    """
+    Blurs every image of a batch with its own kernel in a single depthwise convolution,
+    the batch being folded into the channels so that every image and channel is
+    convolved with the kernel of its image.
+
+    Args:
+        images (`tf.Tensor`): A batch of images of shape `(batch, height, width,
+            channels)`, with a static number of images and channels.
+        kernels (`tf.Tensor`): A batch of kernels of shape `(batch, kernel_size,
+            kernel_size)`.
+    """
+    batch_size, _, _, num_channels = images.shape
+    kernel_size = kernels.shape[-1]
+    height, width = tf.shape(images)[1], tf.shape(images)[2]
+    # Reflect the borders, so that the blur does not darken them.
+    padding = [kernel_size // 2, kernel_size - 1 - kernel_size // 2]
+    images = tf.pad(images, [[0, 0], padding, padding, [0, 0]], mode="REFLECT")
+    folded_images = tf.reshape(
+        tf.transpose(images, perm=[1, 2, 0, 3]),
+        [
+            1,
+            height + kernel_size - 1,
+            width + kernel_size - 1,
+            batch_size * num_channels,
+        ],
+    )
+    filters = tf.reshape(
+        tf.repeat(tf.transpose(kernels, perm=[1, 2, 0]), num_channels, axis=-1),
+        [kernel_size, kernel_size, batch_size * num_channels, 1],
+    )
+    blurred_images = tf.nn.depthwise_conv2d(
+        folded_images, filters, strides=[1, 1, 1, 1], padding="VALID"
+    )
+    return tf.transpose(
+        tf.reshape(blurred_images, [height, width, batch_size, num_channels]),
+        perm=[2, 0, 1, 3],
+    )
+
+
+def random_blur(
+    images: tf.Tensor,
+    seed: tf.Tensor,
+    kernel_size: int = 9,
+    sigma_range: Tuple[float, float] = (0.2, 2.0),
+) -> tf.Tensor:
+    """
+    Blurs a batch of images, each with its own random anisotropic Gaussian kernel.
+
+    Args:
+        images (`tf.Tensor`): A batch of images of shape `(batch, height, width,
+            channels)`, with a static number of images and channels.
+        seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        kernel_size (`int`): Size of the blur kernels.
+        sigma_range (`Tuple[float, float]`): Range of the standard deviations of the
+            kernels along each axis.
+    """
+    kernels = random_gaussian_kernels(images.shape[0], seed, kernel_size, sigma_range)
+    return batched_depthwise_blur(images, kernels)
+
+
+def random_downsampling(
+    images: tf.Tensor, seed: tf.Tensor, scale_factors: Sequence[int] = (2,)
+) -> tf.Tensor:
+    """
+    Downsamples a batch of images by a scale factor drawn from `scale_factors`, then
+    upsamples it back to its original resolution, so that the model is trained to
+    recover the lost details at the same resolution. The scale factor is drawn once
+    per batch, as every image of a batch has to be resized to the same resolution.
+
+    Args:
+        images (`tf.Tensor`): A batch of images of shape `(batch, height, width,
+            channels)`.
+        seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        scale_factors (`Sequence[int]`): The possible downsampling factors.
+    """
+    scale_factor = tf.gather(
+        tf.constant(scale_factors, dtype=tf.int32),
+        tf.random.stateless_uniform(
+            [], seed=seed, maxval=len(scale_factors), dtype=tf.int32
+        ),
+    )
+    size = tf.shape(images)[1:3]
+    downsampled_images = tf.image.resize(
+        images, tf.maximum(size // scale_factor, 1), method="area"
+    )
+    upsampled_images = tf.image.resize(downsampled_images, size, method="bilinear")
+    return tf.clip_by_value(upsampled_images, 0.0, 1.0)
+
+
+class RandomDegradation:
+    """
+    Synthetic degradation of a batch of clean images, run inside `tf.data` on whole
+    batches. The degradations are applied in the order of a camera pipeline, i.e. the
+    blur of the optics, the downsampling, the underexposure and finally the sensor
+    noise, every degradation being skipped if its parameters are `None`.
+
+    Parameters:
+        gamma_range (`Optional[Tuple[float, float]]`): Range of the darkening gamma.
+        exposure_range (`Optional[Tuple[float, float]]`): Range of the exposure scale.
+        shot_noise_range (`Optional[Tuple[float, float]]`): Range of the shot noise gain.
+        read_noise_range (`Optional[Tuple[float, float]]`): Range of the read noise
+            standard deviation.
+        blur_kernel_size (`Optional[int]`): Size of the random blur kernels.
+        blur_sigma_range (`Tuple[float, float]`): Range of the standard deviations of
+            the blur kernels.
+        scale_factors (`Optional[Sequence[int]]`): The possible downsampling factors.
+    """
+
+    def __init__(
+        self,
+        gamma_range: Optional[Tuple[float, float]] = None,
+        exposure_range: Optional[Tuple[float, float]] = None,
+        shot_noise_range: Optional[Tuple[float, float]] = None,
+        read_noise_range: Optional[Tuple[float, float]] = None,
+        blur_kernel_size: Optional[int] = None,
+        blur_sigma_range: Tuple[float, float] = (0.2, 2.0),
+        scale_factors: Optional[Sequence[int]] = None,
+    ) -> None:
+        self.gamma_range = gamma_range
+        self.exposure_range = exposure_range
+        self.shot_noise_range = shot_noise_range
+        self.read_noise_range = read_noise_range
+        self.blur_kernel_size = blur_kernel_size
+        self.blur_sigma_range = blur_sigma_range
+        self.scale_factors = scale_factors
+
+    def __call__(self, images: tf.Tensor, seed: tf.Tensor) -> tf.Tensor:
+        """
+        Degrades a batch of images.
+
+        Args:
+            images (`tf.Tensor`): A batch of images in `[0, 1]` of shape `(batch, height,
+                width, channels)`.
+            seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+        """
+        seeds = tf.random.experimental.stateless_split(seed, num=4)
+        if self.blur_kernel_size is not None:
+            images = random_blur(
+                images, seeds[0], self.blur_kernel_size, self.blur_sigma_range
+            )
+        if self.scale_factors is not None:
+            images = random_downsampling(images, seeds[1], self.scale_factors)
+        if self.gamma_range is not None or self.exposure_range is not None:
+            images = random_exposure(
+                images,
+                seeds[2],
+                self.gamma_range or (1.0, 1.0),
+                self.exposure_range or (1.0, 1.0),
+            )
+        if self.shot_noise_range is not None or self.read_noise_range is not None:
+            images = random_poisson_gaussian_noise(
+                images,
+                seeds[3],
+                self.shot_noise_range or (0.0, 0.0),
+                self.read_noise_range or (0.0, 0.0),
+            )
+        return images
@@ -0,0 +1,250 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from absl import logging
+from PIL import Image
+
+MANIFEST_FILE = "manifest.json"
+_MANIFEST_VERSION = 1
+
+
+def get_default_manifest_dir() -> str:
+    """Returns the directory of the manifests, `RESTORERS_MANIFEST_DIR` or
+    `~/.cache/restorers/manifests` by default."""
+    return os.environ.get(
+        "RESTORERS_MANIFEST_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "restorers", "manifests"),
+    )
+
+
+def _get_directory_mtime(directory: str) -> Optional[int]:
+    try:
+        return os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _list_image_files(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        entry.name
+        for entry in os.scandir(directory)
+        if entry.is_file() and not entry.name.startswith(".")
+    )
+
+
+def create_image_record(image_path: str) -> Dict:
+    """Returns the byte size, modification time, resolution and content hash of an
+    image file, the resolution being read off the image header only."""
+    stat = os.stat(image_path)
+    sha256 = hashlib.sha256()
+    with open(image_path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(1 << 20), b""):
+            sha256.update(chunk)
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+    except OSError:
+        width, height = None, None
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "width": width,
+        "height": height,
+        "sha256": sha256.hexdigest(),
+    }
+
+
+def pair_image_files(
+    input_files: List[str], target_files: List[str]
+) -> List[Tuple[str, str]]:
+    """Pairs the input and target images sharing the same filename (without the
+    extension), in the sorted order of the input images."""
+    targets = {
+        os.path.splitext(os.path.basename(path))[0]: path for path in target_files
+    }
+    pairs = []
+    for input_file in sorted(input_files):
+        stem = os.path.splitext(os.path.basename(input_file))[0]
+        if stem not in targets:
+            logging.warning(f"No target image found for {input_file}, skipping it.")
+            continue
+        pairs.append((input_file, targets[stem]))
+    return pairs
+
+
+class DatasetManifest:
+    """
+    Index of the image pairs of a dataset, stored as a single JSON file with the byte
+    size, resolution and content hash of every image.
+
+    The manifest is stored in `manifest_dir`, keyed by the absolute path of the dataset,
+    and not in the dataset directory, which may be read-only or an entry of the
+    content-addressed `ArtifactCache`. A manifest served with a dataset, e.g. by
+    `HTTPStorage`, is written in the dataset directory with `manifest_path`.
+
+    The manifest is built once with `num_workers` threads and loaded with a single file
+    read afterwards. It is validated against the modification times of the image
+    directories, and only the directories in which images were added, removed or
+    renamed are listed again, only the new or changed images being hashed again.
+    Images modified in place without touching their directory are not detected.
+
+    Parameters:
+        dataset_path (`str`): Root directory of the dataset.
+        splits (`Dict[str, Tuple[str, str]]`): The input and target image directories
+            of every split, relative to `dataset_path`.
+        manifest_path (`Optional[str]`): Path of the manifest file, overriding
+            `manifest_dir`, e.g. `manifest.json` in `dataset_path`.
+        manifest_dir (`Optional[str]`): Directory of the manifests, defaults to
+            `get_default_manifest_dir()`.
+        num_workers (`Optional[int]`): Number of threads reading the images when the
+            manifest is built.
+    """
+
+    def __init__(
+        self,
+        dataset_path: str,
+        splits: Dict[str, Tuple[str, str]],
+        manifest_path: Optional[str] = None,
+        manifest_dir: Optional[str] = None,
+        num_workers: Optional[int] = None,
+    ) -> None:
+        self.dataset_path = dataset_path
+        self.splits = {
+            split: list(directories) for split, directories in splits.items()
+        }
+        if manifest_path is None:
+            dataset_key = hashlib.sha256(
+                os.path.abspath(dataset_path).encode()
+            ).hexdigest()
+            manifest_path = os.path.join(
+                manifest_dir or get_default_manifest_dir(),
+                f"manifest-{dataset_key[:32]}.json",
+            )
+        self.manifest_path = manifest_path
+        self.num_workers = num_workers
+        self.manifest = self.load()
+        if self.update():
+            self.save()
+
+    def load(self) -> Dict:
+        try:
+            with open(self.manifest_path, "r") as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get("version") == _MANIFEST_VERSION:
+                return manifest
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {
+            "version": _MANIFEST_VERSION,
+            "directories": {},
+            "files": {},
+            "splits": {},
+        }
+
+    def save(self) -> None:
+        # Write to a temporary file first so that readers never see a partial manifest.
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        temp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as manifest_file:
+                json.dump(self.manifest, manifest_file)
+            os.replace(temp_path, self.manifest_path)
+        except OSError:
+            logging.error(f"Unable to write the manifest {self.manifest_path}.")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def update(self) -> bool:
+        """Updates the stale directories and splits of the manifest, returns whether
+        anything changed."""
+        directories = self.manifest["directories"]
+        files = self.manifest["files"]
+        previous_files = dict(files)
+        stale_directories = set()
+        for directory in sorted({d for dirs in self.splits.values() for d in dirs}):
+            mtime_ns = _get_directory_mtime(os.path.join(self.dataset_path, directory))
+            if (
+                directory in directories
+                and directories[directory]["mtime_ns"] == mtime_ns
+            ):
+                continue
+            stale_directories.add(directory)
+            for filename in directories.get(directory, {}).get("files", []):
+                files.pop(os.path.join(directory, filename), None)
+            directories[directory] = {
+                "mtime_ns": mtime_ns,
+                "files": _list_image_files(os.path.join(self.dataset_path, directory)),
+            }
+
+        # Only hash the images that are new or whose size or mtime changed.
+        image_paths = []
+        for directory in stale_directories:
+            for filename in directories[directory]["files"]:
+                image_path = os.path.join(directory, filename)
+                record = previous_files.get(image_path)
+                stat = os.stat(os.path.join(self.dataset_path, image_path))
+                if record is not None and (record["size"], record["mtime_ns"]) == (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    files[image_path] = record
+                else:
+                    image_paths.append(image_path)
+        with ThreadPoolExecutor(self.num_workers) as executor:
+            records = executor.map(
+                lambda image_path: create_image_record(
+                    os.path.join(self.dataset_path, image_path)
+                ),
+                image_paths,
+            )
+            files.update(zip(image_paths, records))
+
+        splits = self.manifest["splits"]
+        updated = bool(stale_directories)
+        for split, (input_directory, target_directory) in self.splits.items():
+            if (
+                split in splits
+                and splits[split]["directories"] == [input_directory, target_directory]
+                and input_directory not in stale_directories
+                and target_directory not in stale_directories
+            ):
+                continue
+            pairs = pair_image_files(
+                [
+                    os.path.join(input_directory, filename)
+                    for filename in directories[input_directory]["files"]
+                ],
+                [
+                    os.path.join(target_directory, filename)
+                    for filename in directories[target_directory]["files"]
+                ],
+            )
+            splits[split] = {
+                "directories": [input_directory, target_directory],
+                # Stored as lists, as they are read back from the JSON file.
+                "pairs": [list(pair) for pair in pairs],
+            }
+            updated = True
+        return updated
+
+    def get_image_pairs(self, split: str) -> Tuple[List[str], List[str]]:
+        """Returns the paths of the input and target images of a split."""
+        pairs = self.manifest["splits"][split]["pairs"]
+        input_images = [os.path.join(self.dataset_path, pair[0]) for pair in pairs]
+        target_images = [os.path.join(self.dataset_path, pair[1]) for pair in pairs]
+        return input_images, target_images
+
+    def get_image_records(self, split: str) -> List[Tuple[Dict, Dict]]:
+        """Returns the records, i.e. the byte size, resolution and content hash, of the
+        input and target images of a split."""
+        files = self.manifest["files"]
+        return [
+            (files[input_image], files[target_image])
+            for input_image, target_image in self.manifest["splits"][split]["pairs"]
+        ]
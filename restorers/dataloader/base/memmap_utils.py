@@ -0,0 +1,79 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tqdm.autonotebook import tqdm
+
+from .commons import decode_image
+
+MEMORY_MAP_FILE = "images.bin"
+MEMORY_MAP_INDEX_FILE = "index.npy"
+
+
+def write_memory_map(
+    input_images: List[str], enhanced_images: List[str], output_dir: str
+) -> np.ndarray:
+    """Decodes image pairs once and packs them into a raw `uint8` memory-map file.
+
+    Every pair is stored as a single `(height, width, 6)` array, the low light image
+    in the first 3 channels and the enhanced image in the last 3 channels, so that an
+    aligned crop of both images is a single slice of the memory-map.
+
+    Args:
+        input_images (`List[str]`): A list of image filenames.
+        enhanced_images (`List[str]`): A list of image filenames.
+        output_dir (`str`): Directory in which the memory-map and its index are written.
+
+    Returns:
+        The index of the memory-map, an array of `(offset, height, width)` rows.
+    """
+    index = np.zeros((len(input_images), 3), dtype=np.int64)
+    offset = 0
+    with open(os.path.join(output_dir, MEMORY_MAP_FILE), "wb") as memory_map_file:
+        for idx, (input_image_path, enhanced_image_path) in tqdm(
+            enumerate(zip(input_images, enhanced_images)),
+            total=len(input_images),
+            desc="Writing memory-map",
+        ):
+            input_image = decode_image(tf.io.read_file(input_image_path)).numpy()
+            enhanced_image = decode_image(tf.io.read_file(enhanced_image_path)).numpy()
+            if input_image.shape != enhanced_image.shape:
+                raise ValueError(
+                    f"{input_image_path} has shape {input_image.shape} but "
+                    f"{enhanced_image_path} has shape {enhanced_image.shape}."
+                )
+            image_pair = np.concatenate([input_image, enhanced_image], axis=-1)
+            memory_map_file.write(image_pair.tobytes())
+            index[idx] = (offset, image_pair.shape[0], image_pair.shape[1])
+            offset += image_pair.size
+    np.save(os.path.join(output_dir, MEMORY_MAP_INDEX_FILE), index)
+    return index
+
+
+def open_memory_map(memory_map_dir: str) -> Tuple[np.memmap, np.ndarray]:
+    memory_map = np.memmap(
+        os.path.join(memory_map_dir, MEMORY_MAP_FILE), dtype=np.uint8, mode="r"
+    )
+    index = np.load(os.path.join(memory_map_dir, MEMORY_MAP_INDEX_FILE))
+    return memory_map, index
+
+
+def read_memory_map_window(
+    memory_map: np.memmap,
+    offset: int,
+    height: int,
+    width: int,
+    window: np.ndarray,
+) -> np.ndarray:
+    """Reads the `[offset_y, offset_x, window_height, window_width]` window of an image
+    pair, the crop slice being the only copy made."""
+    offset_y, offset_x, window_height, window_width = window
+    image_pair = memory_map[offset : offset + height * width * 6].reshape(
+        height, width, 6
+    )
+    return np.ascontiguousarray(
+        image_pair[
+            offset_y : offset_y + window_height, offset_x : offset_x + window_width
+        ]
+    )
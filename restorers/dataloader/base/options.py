@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import tensorflow as tf
+
+
+@dataclass
+class PipelineOptions:
+    """
+    Performance options of the `tf.data` pipelines of a data loader, which bound the
+    threads and the memory taken by a pipeline, e.g. to pack several training jobs on a
+    shared host. The options left to `None` keep the defaults of `tf.data`.
+
+    The training images are shuffled before they are read if `shuffle_buffer_size` is
+    set. The images read by a `RemoteFileReader` are instead fully shuffled by the
+    reader, which then reads ahead in the shuffled order. With `cache_decoded_images`, the decoded
+    images are shuffled after the cache instead, as the cache replays the order it was
+    written in, so that the buffer then holds decoded images.
+
+    Parameters:
+        private_threadpool_size (`Optional[int]`): Number of threads of a thread pool
+            private to the pipeline, instead of the thread pool shared by the process.
+        max_intra_op_parallelism (`Optional[int]`): Maximum number of threads used by a
+            single op of the pipeline, e.g. `1` so that the parallelism comes from the
+            parallel maps only.
+        autotune_ram_budget (`Optional[int]`): Maximum memory in bytes taken by the
+            buffers which are sized by the autotuner, e.g. the prefetch buffers.
+        deterministic (`Optional[bool]`): Flag to produce the elements in a deterministic
+            order, `False` letting the parallel maps produce the elements out of order
+            so that a slow image does not stall the pipeline.
+        shuffle_buffer_size (`Optional[int]`): Size of the buffer the training image
+            files are shuffled with, the files are not shuffled if `None`.
+        reshuffle_each_iteration (`bool`): Flag to shuffle the training image files
+            differently on every epoch.
+    """
+
+    private_threadpool_size: Optional[int] = None
+    max_intra_op_parallelism: Optional[int] = None
+    autotune_ram_budget: Optional[int] = None
+    deterministic: Optional[bool] = None
+    shuffle_buffer_size: Optional[int] = None
+    reshuffle_each_iteration: bool = True
+
+    def get_tf_data_options(self) -> tf.data.Options:
+        options = tf.data.Options()
+        if self.private_threadpool_size is not None:
+            options.threading.private_threadpool_size = self.private_threadpool_size
+        if self.max_intra_op_parallelism is not None:
+            options.threading.max_intra_op_parallelism = self.max_intra_op_parallelism
+        if self.autotune_ram_budget is not None:
+            options.autotune.ram_budget = self.autotune_ram_budget
+        if self.deterministic is not None:
+            options.deterministic = self.deterministic
+        return options
+
+    def apply(self, dataset: tf.data.Dataset) -> tf.data.Dataset:
+        """Sets the options on a dataset, which apply to its whole pipeline."""
+        return dataset.with_options(self.get_tf_data_options())
+
+    def shuffle(self, dataset: tf.data.Dataset) -> tf.data.Dataset:
+        """Shuffles a dataset of image files, if `shuffle_buffer_size` is set."""
+        if self.shuffle_buffer_size is None:
+            return dataset
+        return dataset.shuffle(
+            self.shuffle_buffer_size,
+            reshuffle_each_iteration=self.reshuffle_each_iteration,
+        )
@@ -0,0 +1,385 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import posixpath
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+from absl import logging
+
+from .manifest import MANIFEST_FILE, pair_image_files
+
+
+class StorageBackend(ABC):
+    """
+    A store of files addressed by paths relative to its root, e.g. a bucket of an
+    object store.
+
+    Parameters:
+        url (`str`): URL of the root of the store.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+
+    @abstractmethod
+    def read(self, path: str) -> bytes:
+        """Reads the content of a file."""
+        raise NotImplementedError(f"{self.__class__.__name__ }.read")
+
+    @abstractmethod
+    def list_directory(self, directory: str) -> List[str]:
+        """Lists the files directly in a directory, as paths relative to the root."""
+        raise NotImplementedError(f"{self.__class__.__name__ }.list_directory")
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files stored in a local directory, which stands in for a remote store in tests.
+
+    Parameters:
+        root (`str`): Root directory of the store.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        super().__init__(f"file://{self.root}")
+
+    def read(self, path: str) -> bytes:
+        with open(os.path.join(self.root, path), "rb") as file:
+            return file.read()
+
+    def list_directory(self, directory: str) -> List[str]:
+        directory = directory.strip("/")
+        return sorted(
+            posixpath.join(directory, entry.name)
+            for entry in os.scandir(os.path.join(self.root, directory))
+            if entry.is_file() and not entry.name.startswith(".")
+        )
+
+
+class HTTPStorage(StorageBackend):
+    """
+    Files served over HTTP(S), e.g. by an object store behind a public or presigned URL.
+
+    HTTP has no directory listing, so the directories are listed from the
+    `manifest.json` written by `DatasetManifest` at the root of the store, i.e. the
+    manifest has to be built with `manifest_path` in the dataset directory before the
+    dataset is uploaded.
+
+    Parameters:
+        url (`str`): URL of the root of the store.
+        timeout (`float`): Timeout of every request in seconds.
+        num_retries (`int`): Number of times a failed request is retried, with an
+            exponential backoff.
+    """
+
+    def __init__(self, url: str, timeout: float = 60.0, num_retries: int = 3) -> None:
+        super().__init__(url)
+        self.timeout = timeout
+        self.num_retries = num_retries
+        self.manifest: Optional[Dict] = None
+
+    def read(self, path: str) -> bytes:
+        url = f"{self.url}/{urllib.parse.quote(path.lstrip('/'))}"
+        for attempt in range(self.num_retries + 1):
+            try:
+                with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                    return response.read()
+            except urllib.error.HTTPError as error:
+                # Client errors, e.g. a missing file, will not go away by retrying.
+                if error.code < 500 or attempt == self.num_retries:
+                    raise
+            except urllib.error.URLError:
+                if attempt == self.num_retries:
+                    raise
+            logging.warning(f"Retrying the download of {url}.")
+            time.sleep(2**attempt)
+
+    def list_directory(self, directory: str) -> List[str]:
+        if self.manifest is None:
+            self.manifest = json.loads(self.read(MANIFEST_FILE))
+        directory = directory.strip("/")
+        try:
+            filenames = self.manifest["directories"][directory]["files"]
+        except KeyError:
+            raise ValueError(f"{directory} is not in the manifest of {self.url}.")
+        return [posixpath.join(directory, filename) for filename in filenames]
+
+
+class FsspecStorage(StorageBackend):
+    """
+    Files in any filesystem supported by `fsspec`, e.g. `s3://` or `gs://` buckets,
+    which requires `fsspec` and the package of the filesystem, e.g. `s3fs` or `gcsfs`.
+
+    Parameters:
+        url (`str`): URL of the root of the store, e.g. `"s3://bucket/lol_dataset"`.
+        storage_options: Options passed to the `fsspec` filesystem, e.g. credentials.
+    """
+
+    def __init__(self, url: str, **storage_options) -> None:
+        try:
+            import fsspec
+        except ImportError:
+            raise ImportError(
+                "FsspecStorage requires fsspec, install it with `pip install fsspec`."
+            )
+        super().__init__(url)
+        self.filesystem, self.root = fsspec.core.url_to_fs(self.url, **storage_options)
+
+    def read(self, path: str) -> bytes:
+        return self.filesystem.cat_file(posixpath.join(self.root, path))
+
+    def list_directory(self, directory: str) -> List[str]:
+        directory = directory.strip("/")
+        return sorted(
+            posixpath.join(directory, posixpath.basename(name))
+            for name in self.filesystem.ls(
+                posixpath.join(self.root, directory), detail=False
+            )
+            if self.filesystem.isfile(name)
+            and not posixpath.basename(name).startswith(".")
+        )
+
+
+class RemoteFileReader:
+    """
+    Reads the files of a `StorageBackend` with a bounded pool of fetching threads.
+
+    The order in which the files will be read is registered with `schedule`, and every
+    read starts fetching the next `read_ahead` files in that order, so that the latency
+    of the store is hidden behind the decoding of the files already fetched. The
+    datasets created by `create_path_dataset` register the order of every epoch,
+    shuffled or not, before producing its paths in that same order. The
+    fetched files are spilled to a local disk cache, from which they are read on the
+    next epochs, the least recently read files being evicted to keep the cache below
+    `max_cache_size` bytes.
+
+    Parameters:
+        storage (`StorageBackend`): The store the files are read from.
+        cache_dir (`Optional[str]`): Directory of the disk cache, which persists across
+            runs. A temporary directory, removed with the reader, is used if `None`.
+        num_workers (`int`): Maximum number of files fetched concurrently.
+        read_ahead (`int`): Number of files fetched ahead of the file being read.
+        max_cache_size (`Optional[int]`): Maximum size of the disk cache in bytes,
+            unbounded if `None`.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        cache_dir: Optional[str] = None,
+        num_workers: int = 16,
+        read_ahead: int = 64,
+        max_cache_size: Optional[int] = None,
+    ) -> None:
+        self.storage = storage
+        if cache_dir is None:
+            self.temp_dir = tempfile.TemporaryDirectory(prefix="restorers-")
+            cache_dir = self.temp_dir.name
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.num_workers = num_workers
+        self.read_ahead = read_ahead
+        self.max_cache_size = max_cache_size
+        self.executor = ThreadPoolExecutor(
+            num_workers, thread_name_prefix="RemoteFileReader"
+        )
+        self.lock = threading.Lock()
+        self.pending: "OrderedDict[str, Future]" = OrderedDict()
+        # The registered orders, with whether their read-ahead wraps around.
+        self.orders: Dict[Hashable, Tuple[List[str], bool]] = {}
+        self.positions: Dict[str, Tuple[Hashable, int]] = {}
+        # Sizes of the cached files, from the least to the most recently read.
+        self.cached_files: "OrderedDict[str, int]" = OrderedDict(
+            (entry.name, entry.stat().st_size)
+            for entry in sorted(
+                os.scandir(cache_dir), key=lambda entry: entry.stat().st_atime
+            )
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        )
+        self.cache_size = sum(self.cached_files.values())
+
+    def get_cache_key(self, path: str) -> str:
+        return hashlib.sha256(f"{self.storage.url}/{path}".encode()).hexdigest()
+
+    def schedule(
+        self,
+        paths: Sequence[str],
+        key: Optional[Hashable] = None,
+        wrap_around: bool = True,
+    ) -> None:
+        """Registers the order in which `paths` will be read, the read-ahead wrapping
+        around to the first path after the last one, i.e. into the next epoch, if
+        `wrap_around`. The order replaces the one registered with the same `key`, e.g.
+        the order of the previous epoch."""
+        paths = [str(path) for path in paths]
+        with self.lock:
+            if key is None:
+                key = object()
+            self.orders[key] = (paths, wrap_around)
+            for position, path in enumerate(paths):
+                self.positions[path] = (key, position)
+
+    def create_path_dataset(
+        self,
+        *path_lists: Sequence[str],
+        shuffle: bool = False,
+        reshuffle_each_iteration: bool = True,
+        seed: Optional[int] = None,
+    ) -> tf.data.Dataset:
+        """
+        Creates a dataset of the paths of one or several lists of the same length, e.g.
+        the input and enhanced images, whose elements are read one after the other.
+
+        Every iteration of the dataset registers its order with `schedule` before
+        producing the paths in that order, so that the read-ahead fetches the files
+        which are read next, even when they are shuffled.
+
+        Args:
+            path_lists (`Sequence[str]`): The lists of paths, whose elements at the same
+                index form an element of the dataset.
+            shuffle (`bool`): Flag to produce the elements in a random order.
+            reshuffle_each_iteration (`bool`): Flag to draw a new order on every
+                iteration, i.e. epoch, instead of using the same one.
+            seed (`Optional[int]`): Seed of the random orders.
+        """
+        path_lists = [[str(path) for path in paths] for paths in path_lists]
+        num_elements = len(path_lists[0])
+        random_state = np.random.RandomState(seed)
+        permutation = random_state.permutation(num_elements)
+        key = object()
+
+        def generate_paths():
+            if not shuffle:
+                indices = range(num_elements)
+            elif reshuffle_each_iteration:
+                indices = random_state.permutation(num_elements)
+            else:
+                indices = permutation
+            # A new order is drawn on the next epoch, which the read-ahead can not
+            # wrap around to.
+            self.schedule(
+                [paths[idx] for idx in indices for paths in path_lists],
+                key=key,
+                wrap_around=not (shuffle and reshuffle_each_iteration),
+            )
+            for idx in indices:
+                yield tuple(paths[idx] for paths in path_lists)
+
+        dataset = tf.data.Dataset.from_generator(
+            generate_paths,
+            output_signature=tuple(
+                tf.TensorSpec([], tf.string) for _ in range(len(path_lists))
+            ),
+        )
+        if len(path_lists) == 1:
+            # Single paths instead of 1-tuples, like `from_tensor_slices`.
+            dataset = dataset.map(lambda path: path)
+        return dataset
+
+    def fetch(self, path: str) -> bytes:
+        cache_key = self.get_cache_key(path)
+        cache_path = os.path.join(self.cache_dir, cache_key)
+        try:
+            with open(cache_path, "rb") as cache_file:
+                data = cache_file.read()
+            with self.lock:
+                if cache_key in self.cached_files:
+                    self.cached_files.move_to_end(cache_key)
+            return data
+        except FileNotFoundError:
+            pass
+        data = self.storage.read(path)
+        # Write to a temporary file first so that readers never see a partial file.
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(data)
+        os.replace(temp_path, cache_path)
+        with self.lock:
+            self.cache_size += len(data) - self.cached_files.pop(cache_key, 0)
+            self.cached_files[cache_key] = len(data)
+            self.evict(keep_key=cache_key)
+        return data
+
+    def evict(self, keep_key: str) -> None:
+        """Evicts the least recently read files until the cache fits in
+        `max_cache_size`, must be called with the lock held."""
+        if self.max_cache_size is None:
+            return
+        for cache_key in list(self.cached_files):
+            if self.cache_size <= self.max_cache_size:
+                break
+            if cache_key == keep_key:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, cache_key))
+            except FileNotFoundError:
+                pass
+            self.cache_size -= self.cached_files.pop(cache_key)
+
+    def submit_read_ahead(self, path: str) -> None:
+        """Starts fetching the files following `path`, must be called with the lock
+        held."""
+        if path not in self.positions:
+            return
+        key, position = self.positions[path]
+        order, wrap_around = self.orders[key]
+        for offset in range(1, min(self.read_ahead, len(order) - 1) + 1):
+            if not wrap_around and position + offset >= len(order):
+                break
+            next_path = order[(position + offset) % len(order)]
+            if next_path not in self.pending:
+                self.pending[next_path] = self.executor.submit(self.fetch, next_path)
+        # Drop the stalest fetches, whose files were never read, e.g. at the end of
+        # the dataset, so that they do not pile up.
+        while len(self.pending) > self.read_ahead:
+            _, future = self.pending.popitem(last=False)
+            future.cancel()
+
+    def read(self, path: str) -> bytes:
+        """Reads a file, from the read-ahead, the disk cache or the store."""
+        path = str(path)
+        with self.lock:
+            future = self.pending.pop(path, None)
+            if future is None:
+                future = self.executor.submit(self.fetch, path)
+            self.submit_read_ahead(path)
+        return future.result()
+
+    def read_tensor(self, path: tf.Tensor) -> tf.Tensor:
+        """Reads a file inside a `tf.data` pipeline."""
+        data = tf.numpy_function(
+            lambda path: np.array(self.read(path.decode()), dtype=object),
+            [path],
+            Tout=tf.string,
+            # The reads fill the disk cache and start the read-ahead, they must
+            # neither be folded nor deduplicated.
+            stateful=True,
+        )
+        data.set_shape([])
+        return data
+
+    def get_image_pairs(
+        self, input_directory: str, target_directory: str
+    ) -> Tuple[List[str], List[str]]:
+        """Returns the paths of the input and target images in two directories of the
+        store, paired by filename."""
+        pairs = pair_image_files(
+            self.storage.list_directory(input_directory),
+            self.storage.list_directory(target_directory),
+        )
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
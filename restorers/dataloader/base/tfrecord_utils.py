@@ -0,0 +1,124 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tqdm.autonotebook import tqdm
+
+_AUTOTUNE = tf.data.AUTOTUNE
+
+_FEATURE_DESCRIPTION = {
+    "input_image": tf.io.FixedLenFeature([], tf.string),
+    "enhanced_image": tf.io.FixedLenFeature([], tf.string),
+}
+
+
+def _bytes_feature(value: bytes) -> tf.train.Feature:
+    return tf.train.Feature(bytes_list=tf.train.BytesList(value=[value]))
+
+
+def serialize_image_pair(input_image_path: str, enhanced_image_path: str) -> bytes:
+    """Serializes the encoded bytes of an image pair into a `tf.train.Example`.
+
+    The images are stored exactly as they are on disk (PNG/JPEG), so the shards are
+    no larger than the source dataset and decoding stays in the `tf.data` pipeline.
+    """
+    with open(input_image_path, "rb") as input_file:
+        input_image = input_file.read()
+    with open(enhanced_image_path, "rb") as enhanced_file:
+        enhanced_image = enhanced_file.read()
+    example = tf.train.Example(
+        features=tf.train.Features(
+            feature={
+                "input_image": _bytes_feature(input_image),
+                "enhanced_image": _bytes_feature(enhanced_image),
+            }
+        )
+    )
+    return example.SerializeToString()
+
+
+def parse_image_pair(serialized_example: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Parses a serialized `tf.train.Example` into the encoded bytes of an image pair."""
+    features = tf.io.parse_single_example(serialized_example, _FEATURE_DESCRIPTION)
+    return features["input_image"], features["enhanced_image"]
+
+
+def get_shard_paths(output_dir: str, split: str, num_shards: int) -> List[str]:
+    return [
+        os.path.join(output_dir, f"{split}-{idx:05d}-of-{num_shards:05d}.tfrecord")
+        for idx in range(num_shards)
+    ]
+
+
+def write_tfrecord_shards(
+    input_images: List[str],
+    enhanced_images: List[str],
+    output_dir: str,
+    split: str,
+    num_shards: int,
+    compression_type: Optional[str] = None,
+) -> List[str]:
+    """Writes the image pairs of a split into `num_shards` TFRecord files.
+
+    Args:
+        input_images (`List[str]`): A list of image filenames.
+        enhanced_images (`List[str]`): A list of image filenames.
+        output_dir (`str`): Directory in which the shards are written.
+        split (`str`): Name of the split, used as the prefix of the shard filenames.
+        num_shards (`int`): Number of shards to write.
+        compression_type (`Optional[str]`): One of `None`, `"GZIP"` or `"ZLIB"`.
+
+    Returns:
+        The list of written shard filenames.
+    """
+    if len(input_images) != len(enhanced_images):
+        raise ValueError(
+            f"Number of input images ({len(input_images)}) and enhanced images "
+            f"({len(enhanced_images)}) should be the same."
+        )
+    # Never write empty shards for tiny splits.
+    num_shards = max(1, min(num_shards, len(input_images)))
+    shard_paths = get_shard_paths(output_dir, split, num_shards)
+    options = tf.io.TFRecordOptions(compression_type=compression_type)
+    shard_indices = np.array_split(np.arange(len(input_images)), num_shards)
+    for shard_path, indices in tqdm(
+        zip(shard_paths, shard_indices),
+        total=num_shards,
+        desc=f"Writing {split} shards",
+    ):
+        with tf.io.TFRecordWriter(shard_path, options=options) as writer:
+            for idx in indices:
+                writer.write(
+                    serialize_image_pair(input_images[idx], enhanced_images[idx])
+                )
+    return shard_paths
+
+
+def read_tfrecord_shards(
+    shard_paths: List[str],
+    compression_type: Optional[str] = None,
+    cycle_length: Optional[int] = None,
+    shuffle_shards: bool = False,
+) -> tf.data.Dataset:
+    """Builds a `tf.data.Dataset` of encoded image pairs reading the shards in parallel.
+
+    Args:
+        shard_paths (`List[str]`): A list of TFRecord shard filenames.
+        compression_type (`Optional[str]`): One of `None`, `"GZIP"` or `"ZLIB"`.
+        cycle_length (`Optional[int]`): Number of shards read concurrently, defaults to
+            the number of shards.
+        shuffle_shards (`bool`): Shuffle the order of the shards on every iteration.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices(shard_paths)
+    if shuffle_shards:
+        dataset = dataset.shuffle(len(shard_paths), reshuffle_each_iteration=True)
+    dataset = dataset.interleave(
+        lambda shard_path: tf.data.TFRecordDataset(
+            shard_path, compression_type=compression_type
+        ),
+        cycle_length=cycle_length or len(shard_paths),
+        num_parallel_calls=_AUTOTUNE,
+        deterministic=not shuffle_shards,
+    )
+    return dataset.map(parse_image_pair, num_parallel_calls=_AUTOTUNE)
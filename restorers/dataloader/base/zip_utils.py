@@ -0,0 +1,114 @@
+import os
+import zlib
+import struct
+import zipfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from .manifest import pair_image_files
+
+# Signature and length of the fixed part of a local file header.
+_LOCAL_HEADER_FORMAT = "<4s22xHH"
+_LOCAL_HEADER_SIZE = struct.calcsize(_LOCAL_HEADER_FORMAT)
+
+
+class ZipArchive:
+    """
+    Reads the members of a zip archive without extracting it.
+
+    The central directory is indexed once, then every member is read with a single
+    positional read at its data offset, stored members being returned as they are and
+    deflated members being inflated in memory. Positional reads do not share a file
+    position, so members can be read concurrently, e.g. by the parallel calls of a
+    `tf.data` map.
+
+    Parameters:
+        zip_path (`str`): Path of the zip archive.
+    """
+
+    def __init__(self, zip_path: str) -> None:
+        self.zip_path = zip_path
+        self.file_descriptor = os.open(zip_path, os.O_RDONLY)
+        self.members: Dict[str, Tuple[int, int, int]] = {}
+        with zipfile.ZipFile(zip_path) as zip_file:
+            for info in zip_file.infolist():
+                if info.is_dir():
+                    continue
+                if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                    raise ValueError(
+                        f"{info.filename} in {zip_path} uses an unsupported compression."
+                    )
+                # The extra field of the local header may differ from the central one.
+                signature, filename_length, extra_length = struct.unpack(
+                    _LOCAL_HEADER_FORMAT,
+                    os.pread(
+                        self.file_descriptor, _LOCAL_HEADER_SIZE, info.header_offset
+                    ),
+                )
+                if signature != b"PK\x03\x04":
+                    raise ValueError(f"{zip_path} has a corrupted local file header.")
+                data_offset = (
+                    info.header_offset
+                    + _LOCAL_HEADER_SIZE
+                    + filename_length
+                    + extra_length
+                )
+                self.members[info.filename] = (
+                    data_offset,
+                    info.compress_size,
+                    info.compress_type,
+                )
+
+    def __del__(self) -> None:
+        if hasattr(self, "file_descriptor"):
+            os.close(self.file_descriptor)
+
+    def read(self, name: str) -> bytes:
+        data_offset, compress_size, compress_type = self.members[name]
+        data = os.pread(self.file_descriptor, compress_size, data_offset)
+        if compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        return data
+
+    def read_tensor(self, name: tf.Tensor) -> tf.Tensor:
+        """Reads a member inside a `tf.data` pipeline."""
+        data = tf.numpy_function(
+            lambda name: np.array(self.read(name.decode()), dtype=object),
+            [name],
+            Tout=tf.string,
+            stateful=False,
+        )
+        data.set_shape([])
+        return data
+
+    def list_directory(self, directory: str) -> List[str]:
+        """Lists the files directly in a directory of the archive."""
+        directory = directory.rstrip("/") + "/"
+        return sorted(
+            name
+            for name in self.members
+            if name.startswith(directory) and "/" not in name[len(directory) :]
+        )
+
+    def find_root(self, directory: str) -> str:
+        """Finds the directory of the archive containing `directory`, e.g. the top-level
+        directory of archives created by zipping the whole dataset directory."""
+        directory = "/" + directory.strip("/") + "/"
+        for name in sorted(self.members):
+            position = ("/" + name).find(directory)
+            if position >= 0:
+                return name[:position].rstrip("/")
+        raise ValueError(f"{directory} not found in {self.zip_path}.")
+
+    def get_image_pairs(
+        self, input_directory: str, target_directory: str
+    ) -> Tuple[List[str], List[str]]:
+        """Returns the members of the input and target image directories paired by
+        filename."""
+        pairs = pair_image_files(
+            self.list_directory(input_directory),
+            self.list_directory(target_directory),
+        )
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
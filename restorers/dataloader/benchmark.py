@@ -0,0 +1,330 @@
+"""
+Benchmark of the input pipelines of the data loaders, run without a model on a
+synthetic dataset written to local disk, e.g.
+
+```
+python -m restorers.dataloader.benchmark --data_loaders lol unsupervised_lol \
+    --output benchmark.json
+```
+"""
+
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+from absl import logging
+from PIL import Image
+
+from .base import DatasetFactory
+from .lol_dataloader import LOLDataLoader, UnsupervisedLOLDataLoader
+from .mit_adobe_5k_dataloader import MITAdobe5KDataLoader
+
+# The input and target directories of every dataset layout.
+_LAYOUTS = {
+    "lol": [("our485/low", "our485/high"), ("eval15/low", "eval15/high")],
+    "mit_adobe_5k": [("original", "expert_c")],
+}
+_DATA_LOADERS = {
+    "lol": (LOLDataLoader, "lol"),
+    "unsupervised_lol": (UnsupervisedLOLDataLoader, "lol"),
+    "mit_adobe_5k": (MITAdobe5KDataLoader, "mit_adobe_5k"),
+}
+
+
+def create_synthetic_dataset(
+    dataset_path: str,
+    layout: str = "lol",
+    num_images: int = 64,
+    image_shape: Tuple[int, int] = (400, 600),
+    extension: str = "png",
+    seed: int = 0,
+) -> str:
+    """
+    Writes a dataset of random image pairs with the directory layout of a real dataset.
+
+    Args:
+        dataset_path (`str`): Root directory of the dataset.
+        layout (`str`): The directory layout, `"lol"` or `"mit_adobe_5k"`.
+        num_images (`int`): Number of image pairs in every split.
+        image_shape (`Tuple[int, int]`): The height and width of the images.
+        extension (`str`): The image format, e.g. `"png"` or `"jpg"`.
+        seed (`int`): Seed of the random images.
+    """
+    random_state = np.random.RandomState(seed)
+    # Smooth gradients with noise compress like photographs, unlike pure noise.
+    gradient = np.linspace(0, 192, image_shape[1], dtype=np.float32)[None, :, None]
+    for directories in _LAYOUTS[layout]:
+        for directory in directories:
+            os.makedirs(os.path.join(dataset_path, directory), exist_ok=True)
+        for idx in range(num_images):
+            for directory in directories:
+                noise = random_state.randint(0, 64, size=(*image_shape, 3))
+                image = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+                Image.fromarray(image).save(
+                    os.path.join(dataset_path, directory, f"{idx + 1}.{extension}")
+                )
+    return dataset_path
+
+
+def get_local_data_loader(name: str, dataset_path: str, **kwargs) -> DatasetFactory:
+    """
+    Builds a data loader reading a dataset from a local directory instead of wandb.
+
+    Args:
+        name (`str`): The data loader, `"lol"`, `"unsupervised_lol"` or
+            `"mit_adobe_5k"`.
+        dataset_path (`str`): Root directory of the dataset.
+        kwargs: Arguments passed to the data loader, e.g. `image_size`.
+    """
+    data_loader_class, _ = _DATA_LOADERS[name]
+
+    class LocalDataLoader(data_loader_class):
+        def fetch_dataset(self, val_split: float, visualize_on_wandb: bool):
+            self.define_dataset_structure(
+                dataset_path=dataset_path, val_split=val_split
+            )
+
+        def get_dataset_source(self) -> str:
+            return os.path.abspath(dataset_path)
+
+    return LocalDataLoader(**kwargs)
+
+
+def _get_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def time_dataset(
+    dataset: tf.data.Dataset, num_elements: int, num_warmup_elements: int = 1
+) -> Dict[str, float]:
+    """
+    Times the iteration over the elements of a dataset, after warming it up so that the
+    tracing and the filling of the buffers are not timed.
+
+    Args:
+        dataset (`tf.data.Dataset`): The dataset, which is repeated.
+        num_elements (`int`): Number of elements timed.
+        num_warmup_elements (`int`): Number of elements iterated before the timing.
+
+    Returns:
+        The wall time and the CPU time of the process in seconds.
+    """
+    iterator = iter(dataset.repeat())
+    for _ in range(num_warmup_elements):
+        next(iterator)
+    start_time, start_cpu_time = time.perf_counter(), _get_cpu_time()
+    for _ in range(num_elements):
+        next(iterator)
+    return {
+        "wall_time": time.perf_counter() - start_time,
+        "cpu_time": _get_cpu_time() - start_cpu_time,
+    }
+
+
+def build_stage_datasets(
+    data_loader: DatasetFactory, batch_size: int
+) -> Dict[str, tf.data.Dataset]:
+    """
+    Builds the training pipeline of a data loader up to every stage, without any
+    parallelism, so that the latency of a stage is the difference between the time
+    spent per sample by the pipeline ending with it and by the pipeline before it.
+
+    Args:
+        data_loader (`DatasetFactory`): The data loader.
+        batch_size (`int`): Number of images in a single batch.
+    """
+    if isinstance(data_loader, UnsupervisedLOLDataLoader):
+        dataset = data_loader.create_image_dataset(data_loader.train_input_images)
+        read_fn = data_loader.read_file
+    else:
+        dataset = data_loader.create_dataset(
+            data_loader.train_input_images, data_loader.train_enhanced_images
+        )
+        read_fn = data_loader.read_image_bytes
+    seeds = tf.data.Dataset.random(seed=0).batch(2)
+    stage_datasets = {
+        "read": dataset.map(read_fn),
+        "decode": dataset.map(data_loader.read_images),
+        "crop": dataset.map(partial(data_loader.load_image, apply_crop=True)),
+    }
+    stage_datasets["batch"] = stage_datasets["crop"].batch(
+        batch_size, drop_remainder=True
+    )
+    stage_datasets["augment"] = tf.data.Dataset.zip(
+        (stage_datasets["batch"], seeds)
+    ).map(data_loader.augment_batch)
+    return stage_datasets
+
+
+def benchmark_data_loader(
+    data_loader: DatasetFactory,
+    batch_size: int,
+    num_batches: int,
+    num_warmup_batches: int = 2,
+) -> Dict:
+    """
+    Benchmarks the training pipeline of a data loader.
+
+    Args:
+        data_loader (`DatasetFactory`): The data loader.
+        batch_size (`int`): Number of images in a single batch.
+        num_batches (`int`): Number of batches timed.
+        num_warmup_batches (`int`): Number of batches iterated before the timing.
+
+    Returns:
+        The throughput in samples per second and the CPU utilization of the training
+        pipeline, and the latency of every stage in milliseconds per sample.
+    """
+    train_dataset, _ = data_loader.get_datasets(batch_size=batch_size)
+    timing = time_dataset(train_dataset, num_batches, num_warmup_batches)
+    num_samples = num_batches * batch_size
+
+    stage_latencies, previous_latency = {}, 0.0
+    for stage, dataset in build_stage_datasets(data_loader, batch_size).items():
+        is_batched = stage in ("batch", "augment")
+        stage_timing = time_dataset(
+            dataset,
+            num_batches if is_batched else num_samples,
+            num_warmup_batches if is_batched else num_warmup_batches * batch_size,
+        )
+        latency = 1000 * stage_timing["wall_time"] / num_samples
+        # Every pipeline includes the stages before it, the difference being clipped
+        # as decoding only the crop window can be faster than decoding the image.
+        stage_latencies[stage] = max(latency - previous_latency, 0.0)
+        previous_latency = latency
+    return {
+        "samples_per_second": num_samples / timing["wall_time"],
+        "cpu_utilization": timing["cpu_time"]
+        / timing["wall_time"]
+        / (os.cpu_count() or 1),
+        "stage_latency_ms": stage_latencies,
+    }
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    data_loaders: Sequence[str],
+    dataset_dir: str,
+    image_size: int = 128,
+    batch_size: int = 16,
+    num_batches: int = 20,
+    num_images: int = 64,
+    image_shape: Tuple[int, int] = (400, 600),
+    extension: str = "png",
+) -> Dict:
+    """
+    Benchmarks the training pipelines of several data loaders on synthetic datasets.
+
+    Args:
+        data_loaders (`Sequence[str]`): The data loaders, among `"lol"`,
+            `"unsupervised_lol"` and `"mit_adobe_5k"`.
+        dataset_dir (`str`): Directory in which the synthetic datasets are written,
+            existing datasets being reused.
+        image_size (`int`): The crop size.
+        batch_size (`int`): Number of images in a single batch.
+        num_batches (`int`): Number of batches timed.
+        num_images (`int`): Number of image pairs of the synthetic datasets.
+        image_shape (`Tuple[int, int]`): The height and width of the synthetic images.
+        extension (`str`): The format of the synthetic images.
+
+    Returns:
+        The results of every data loader, along with the configuration and the
+        environment of the benchmark.
+    """
+    config = dict(
+        image_size=image_size,
+        batch_size=batch_size,
+        num_batches=num_batches,
+        num_images=num_images,
+        image_shape=list(image_shape),
+        extension=extension,
+    )
+    results = {}
+    for name in data_loaders:
+        _, layout = _DATA_LOADERS[name]
+        dataset_path = os.path.join(
+            dataset_dir,
+            f"{layout}-{num_images}-{image_shape[0]}x{image_shape[1]}-{extension}",
+        )
+        if not os.path.isdir(dataset_path):
+            create_synthetic_dataset(
+                dataset_path, layout, num_images, image_shape, extension
+            )
+        data_loader = get_local_data_loader(
+            name,
+            dataset_path,
+            image_size=image_size,
+            bit_depth=8,
+            val_split=0.1,
+            visualize_on_wandb=False,
+        )
+        results[name] = benchmark_data_loader(data_loader, batch_size, num_batches)
+        logging.info(f"{name}: {results[name]}")
+    return {
+        "commit": get_commit(),
+        "environment": {
+            "tensorflow_version": tf.__version__,
+            "python_version": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": config,
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the input pipelines of the data loaders."
+    )
+    parser.add_argument(
+        "--data_loaders", nargs="+", default=list(_DATA_LOADERS), choices=_DATA_LOADERS
+    )
+    parser.add_argument("--dataset_dir", default=None)
+    parser.add_argument("--image_size", type=int, default=128)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--num_batches", type=int, default=20)
+    parser.add_argument("--num_images", type=int, default=64)
+    parser.add_argument("--image_shape", type=int, nargs=2, default=[400, 600])
+    parser.add_argument("--extension", default="png")
+    parser.add_argument("--output", default="input_pipeline_benchmark.json")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report = run_benchmarks(
+            args.data_loaders,
+            args.dataset_dir or temp_dir,
+            image_size=args.image_size,
+            batch_size=args.batch_size,
+            num_batches=args.num_batches,
+            num_images=args.num_images,
+            image_shape=tuple(args.image_shape),
+            extension=args.extension,
+        )
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
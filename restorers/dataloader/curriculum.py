@@ -0,0 +1,177 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import tensorflow as tf
+from absl import logging
+
+from .base import DatasetFactory
+
+
+def parse_curriculum_stages(stages: str) -> List[Tuple[int, int, int]]:
+    """Parses curriculum stages written as comma separated `start_epoch:image_size:
+    local_batch_size` triplets, e.g. `"0:128:16,30:192:8,60:256:4"`, which can be
+    passed on the command line."""
+    parsed_stages = []
+    for stage in stages.split(","):
+        values = stage.strip().split(":")
+        if len(values) != 3:
+            raise ValueError(
+                f"Invalid curriculum stage {stage!r}, expected "
+                "'start_epoch:image_size:local_batch_size'."
+            )
+        parsed_stages.append(tuple(int(value) for value in values))
+    return parsed_stages
+
+
+class ProgressiveResizing:
+    """
+    Curriculum training on small crops with large batches first, then on progressively
+    larger crops, e.g. 128 → 192 → 256, which makes the early epochs several times
+    faster.
+
+    The training dataset of every stage is built by `DatasetFactory.get_datasets` at the
+    crop size of the stage, and the model is trained one stage after the other by
+    `fit`, so that the pipelines are rebuilt at the epoch boundaries. Every batch of a
+    stage has the same shape, hence the model is compiled for one training step shape
+    per stage only. The validation dataset is left untouched, so that the validation
+    metrics of all the stages are comparable.
+
+    Usage:
+
+    ```py
+    curriculum = ProgressiveResizing(
+        data_loader, stages=[(0, 128, 16), (30, 192, 8), (60, 256, 4)]
+    )
+    lr_schedule_fn = tf.keras.optimizers.schedules.CosineDecay(
+        initial_learning_rate=2e-4, decay_steps=curriculum.get_total_steps(epochs=100)
+    )
+    ...
+    curriculum.fit(model, epochs=100, validation_data=val_dataset)
+    ```
+
+    Parameters:
+        data_loader (`DatasetFactory`): The data loader of the training images.
+        stages (`Union[str, Sequence[Tuple[int, int, int]]]`): The `(start_epoch,
+            image_size, local_batch_size)` of every stage, the first stage starting at
+            epoch 0, or a string of stages parsed by `parse_curriculum_stages`.
+        strategy (`Optional[tf.distribute.Strategy]`): Distribution strategy the model is
+            trained with, whose number of replicas multiplies the `local_batch_size` of
+            every stage into the global batch size.
+        distribute_datasets (`bool`): Flag to distribute the training datasets with
+            `tf.distribute.Strategy.distribute_datasets_from_function`, one input
+            pipeline per worker, instead of letting Keras split the global batches.
+    """
+
+    def __init__(
+        self,
+        data_loader: DatasetFactory,
+        stages: Union[str, Sequence[Tuple[int, int, int]]],
+        strategy: Optional[tf.distribute.Strategy] = None,
+        distribute_datasets: bool = True,
+    ) -> None:
+        if isinstance(stages, str):
+            stages = parse_curriculum_stages(stages)
+        stages = sorted(tuple(stage) for stage in stages)
+        if len(stages) == 0 or stages[0][0] != 0:
+            raise ValueError("The first stage of the curriculum must start at epoch 0.")
+        if len({stage[0] for stage in stages}) != len(stages):
+            raise ValueError("Two stages of the curriculum start at the same epoch.")
+        self.data_loader = data_loader
+        self.stages = stages
+        self.strategy = strategy
+        self.distribute_datasets = distribute_datasets and strategy is not None
+        self.num_replicas = 1 if strategy is None else strategy.num_replicas_in_sync
+
+    def get_stage(self, epoch: int) -> Tuple[int, int, int]:
+        """Returns the `(start_epoch, image_size, local_batch_size)` of the stage of an
+        epoch."""
+        return [stage for stage in self.stages if stage[0] <= epoch][-1]
+
+    def get_stage_bounds(self, epochs: int) -> List[Tuple[int, int, int, int]]:
+        """Returns the `(start_epoch, end_epoch, image_size, local_batch_size)` of the
+        stages run in a training of `epochs` epochs."""
+        stage_bounds = []
+        for idx, (start_epoch, image_size, local_batch_size) in enumerate(self.stages):
+            if start_epoch >= epochs:
+                break
+            end_epoch = (
+                self.stages[idx + 1][0] if idx + 1 < len(self.stages) else epochs
+            )
+            stage_bounds.append(
+                (start_epoch, min(end_epoch, epochs), image_size, local_batch_size)
+            )
+        return stage_bounds
+
+    def get_steps_per_epoch(self, epoch: int) -> int:
+        _, _, local_batch_size = self.get_stage(epoch)
+        return self.data_loader.get_steps_per_epoch(
+            local_batch_size * self.num_replicas
+        )
+
+    def get_total_steps(self, epochs: int) -> int:
+        """Returns the number of training steps of `epochs` epochs, e.g. the
+        `decay_steps` of a learning rate schedule, which is counted in steps and not in
+        epochs, the number of steps per epoch changing with the batch size."""
+        return sum(self.get_steps_per_epoch(epoch) for epoch in range(epochs))
+
+    def get_train_dataset(self, epoch: int) -> tf.data.Dataset:
+        """Builds the training dataset of the stage of an epoch."""
+        _, image_size, local_batch_size = self.get_stage(epoch)
+        batch_size = local_batch_size * self.num_replicas
+        data_loader_image_size = self.data_loader.image_size
+        # The crop size is read when the pipeline is traced, i.e. by `get_datasets`.
+        self.data_loader.image_size = image_size
+        try:
+            if not self.distribute_datasets:
+                return self.data_loader.get_datasets(batch_size)[0]
+            return self.strategy.distribute_datasets_from_function(
+                lambda input_context: self.data_loader.get_datasets(
+                    batch_size, input_context
+                )[0]
+            )
+        finally:
+            self.data_loader.image_size = data_loader_image_size
+
+    def fit(
+        self,
+        model: tf.keras.Model,
+        epochs: int,
+        validation_data=None,
+        callbacks: Optional[List[tf.keras.callbacks.Callback]] = None,
+        **kwargs,
+    ) -> Dict[str, List[float]]:
+        """
+        Trains a model through all the stages of the curriculum.
+
+        Args:
+            model (`tf.keras.Model`): The compiled model.
+            epochs (`int`): Total number of epochs.
+            validation_data: The validation data passed to `tf.keras.Model.fit`.
+            callbacks (`Optional[List[tf.keras.callbacks.Callback]]`): The callbacks passed
+                to `tf.keras.Model.fit`.
+            kwargs: Other arguments passed to `tf.keras.Model.fit`.
+
+        Returns:
+            The history of the metrics of all the epochs.
+        """
+        history: Dict[str, List[float]] = {}
+        for (
+            start_epoch,
+            end_epoch,
+            image_size,
+            local_batch_size,
+        ) in self.get_stage_bounds(epochs):
+            logging.info(
+                f"Training on {image_size}x{image_size} crops in batches of "
+                f"{local_batch_size} per replica from epoch {start_epoch} to {end_epoch}."
+            )
+            stage_history = model.fit(
+                self.get_train_dataset(start_epoch),
+                validation_data=validation_data,
+                initial_epoch=start_epoch,
+                epochs=end_epoch,
+                callbacks=callbacks,
+                **kwargs,
+            )
+            for key, values in stage_history.history.items():
+                history.setdefault(key, []).extend(values)
+        return history
@@ -0,0 +1,123 @@
+import argparse
+import subprocess
+import sys
+from typing import List, Optional
+
+import tensorflow as tf
+from absl import logging
+
+
+def start_data_service_worker(
+    dispatcher_address: str,
+    worker_address: Optional[str] = None,
+    port: int = 0,
+) -> subprocess.Popen:
+    """
+    Starts a `tf.data` service worker in a new process, which is the process doing the
+    decoding and cropping offloaded by `DatasetFactory.distribute_dataset`.
+
+    Workers on other hosts are started by running
+    `python -m restorers.dataloader.data_service --dispatcher_address <address>` there.
+
+    Args:
+        dispatcher_address (`str`): Address of the dispatcher, e.g. `"localhost:5000"`.
+        worker_address (`Optional[str]`): Address under which the dispatcher reaches the
+            worker, `"%port%"` being replaced by the port of the worker. Defaults to
+            `"localhost:%port%"`.
+        port (`int`): Port of the worker, `0` to pick any free port.
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "restorers.dataloader.data_service",
+        "--dispatcher_address",
+        dispatcher_address,
+        "--port",
+        str(port),
+    ]
+    if worker_address is not None:
+        command += ["--worker_address", worker_address]
+    return subprocess.Popen(command)
+
+
+class LocalDataService:
+    """
+    A `tf.data` service made of a dispatcher running in the current process and
+    `num_workers` worker processes on the same host.
+
+    Usage:
+
+    ```py
+    with LocalDataService(num_workers=4) as data_service:
+        data_loader = LOLDataLoader(..., data_service_address=data_service.address)
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=batch_size)
+        model.fit(train_dataset, ...)
+    ```
+
+    Parameters:
+        num_workers (`int`): Number of worker processes.
+        port (`int`): Port of the dispatcher, `0` to pick any free port.
+        work_dir (`Optional[str]`): Directory in which the dispatcher journals its state,
+            so that it can be restarted without losing the registered workers.
+    """
+
+    def __init__(
+        self, num_workers: int, port: int = 0, work_dir: Optional[str] = None
+    ) -> None:
+        self.dispatcher = tf.data.experimental.service.DispatchServer(
+            tf.data.experimental.service.DispatcherConfig(
+                port=port,
+                work_dir=work_dir,
+                fault_tolerant_mode=work_dir is not None,
+            )
+        )
+        self.workers: List[subprocess.Popen] = [
+            start_data_service_worker(self.dispatcher_address)
+            for _ in range(num_workers)
+        ]
+        logging.info(
+            f"Started a tf.data service at {self.address} with {num_workers} workers."
+        )
+
+    @property
+    def address(self) -> str:
+        """Address of the service, to be passed as `data_service_address`."""
+        return self.dispatcher.target
+
+    @property
+    def dispatcher_address(self) -> str:
+        """Address of the dispatcher, to be passed to the workers."""
+        return self.dispatcher.target.split("://")[-1]
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.terminate()
+        for worker in self.workers:
+            worker.wait()
+        self.workers = []
+        self.dispatcher.stop()
+
+    def __enter__(self) -> "LocalDataService":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Runs a tf.data service worker.")
+    parser.add_argument("--dispatcher_address", required=True)
+    parser.add_argument("--worker_address", default=None)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args(argv)
+    worker_config = dict(dispatcher_address=args.dispatcher_address, port=args.port)
+    if args.worker_address is not None:
+        worker_config["worker_address"] = args.worker_address
+    worker = tf.data.experimental.service.WorkerServer(
+        tf.data.experimental.service.WorkerConfig(**worker_config)
+    )
+    worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+from typing import Optional
+
+import wandb
+
+from .base import LowLightDatasetFactory
+from .base.options import PipelineOptions
+from .base.storage import RemoteFileReader
+
+
+class ImageFolderDataLoader(LowLightDatasetFactory):
+    """
+    Data loader for a custom dataset of image pairs stored in a local directory, the
+    input and enhanced images being paired by filename.
+
+    Parameters:
+        dataset_path (`str`): Root directory of the dataset.
+        image_size (`int`): The image resolution.
+        bit_depth (`int`): Bit depth for normalization.
+        val_split (`float`): The percentage of validation split.
+        visualize_on_wandb (`bool`): Flag to visualize the dataset on wandb.
+        input_directory (`str`): Directory of the input images, relative to
+            `dataset_path`.
+        enhanced_directory (`str`): Directory of the enhanced images, relative to
+            `dataset_path`.
+        file_reader (`Optional[RemoteFileReader]`): Reader of the remote storage the
+            images are read from, instead of `dataset_path`.
+        pipeline_options (`Optional[PipelineOptions]`): Performance options of the
+            `tf.data` pipelines.
+    """
+
+    def __init__(
+        self,
+        dataset_path: str,
+        image_size: int,
+        bit_depth: int,
+        val_split: float,
+        visualize_on_wandb: bool,
+        input_directory: str = "low",
+        enhanced_directory: str = "high",
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        thumbnail_size: int = 256,
+        max_visualizations_per_split: Optional[int] = 100,
+        file_reader: Optional[RemoteFileReader] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
+    ):
+        self.dataset_path = dataset_path
+        self.input_directory = input_directory
+        self.enhanced_directory = enhanced_directory
+        super().__init__(
+            image_size,
+            bit_depth,
+            val_split,
+            visualize_on_wandb,
+            None,
+            None,
+            cache_decoded_images,
+            cache_dir,
+            photometric_jitter,
+            patches_per_image,
+            defer_normalization,
+            data_service_address,
+            thumbnail_size,
+            max_visualizations_per_split,
+            False,
+            file_reader,
+            materialize_val_dataset,
+            max_val_memory_bytes,
+            pipeline_options,
+        )
+
+    def get_dataset_source(self) -> str:
+        if self.file_reader is not None:
+            return super().get_dataset_source()
+        return os.path.abspath(self.dataset_path)
+
+    def get_image_id(self, image_path: str) -> str:
+        # The images of a custom dataset are not necessarily named after numbers.
+        return os.path.splitext(os.path.basename(image_path))[0]
+
+    def define_dataset_structure(self, dataset_path, val_split):
+        low_light_images, enhanced_images = self.get_image_pairs(
+            dataset_path,
+            splits={"images": (self.input_directory, self.enhanced_directory)},
+        )["images"]
+        self.num_data_points = len(low_light_images)
+        num_train_images = int(self.num_data_points * (1 - val_split))
+        self.train_input_images = low_light_images[:num_train_images]
+        self.train_enhanced_images = enhanced_images[:num_train_images]
+        self.val_input_images = low_light_images[num_train_images:]
+        self.val_enhanced_images = enhanced_images[num_train_images:]
+
+    def fetch_dataset(self, val_split, visualize_on_wandb: bool):
+        self.define_dataset_structure(
+            dataset_path=self.dataset_path, val_split=val_split
+        )
+        if visualize_on_wandb and wandb.run is not None:
+            self.sanity_tests()
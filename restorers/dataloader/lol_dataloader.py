@@ -1,18 +1,29 @@
 import os
-from glob import glob
+import fnmatch
+import posixpath
 from functools import partial
-from typing import Union, Tuple, List
+from typing import List, Optional, Sequence, Tuple, Union
 
 import tensorflow as tf
 
 from .base import LowLightDatasetFactory
+from .base.options import PipelineOptions
+from .base.storage import RemoteFileReader
+from .base.tfrecord_utils import parse_image_pair
 from .base.commons import (
-    read_image,
-    random_unpaired_horiontal_flip,
-    random_unpaired_vertical_flip,
+    DATASET_INFO_FILE,
+    decode_image,
+    decode_image_for_size,
+    get_bucket_key,
+    pad_to_bucket,
+    random_crop_patches,
+    random_batched_augmentation,
+    read_dataset_info,
+    shard_image_files,
 )
 
 _AUTOTUNE = tf.data.AUTOTUNE
+_TFRECORD_EXTENSIONS = (".tfrecord", ".tfrec")
 
 
 class LOLDataLoader(LowLightDatasetFactory):
@@ -24,6 +35,19 @@ class LOLDataLoader(LowLightDatasetFactory):
         visualize_on_wandb: bool,
         dataset_artifact_address: Union[str, None] = None,
         dataset_url: Union[str, None] = None,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        thumbnail_size: int = 256,
+        max_visualizations_per_split: Optional[int] = 100,
+        read_from_zip: bool = False,
+        file_reader: Optional[RemoteFileReader] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
     ):
         super().__init__(
             image_size,
@@ -32,17 +56,31 @@ class LOLDataLoader(LowLightDatasetFactory):
             visualize_on_wandb,
             dataset_artifact_address,
             dataset_url,
+            cache_decoded_images,
+            cache_dir,
+            photometric_jitter,
+            patches_per_image,
+            defer_normalization,
+            data_service_address,
+            thumbnail_size,
+            max_visualizations_per_split,
+            read_from_zip,
+            file_reader,
+            materialize_val_dataset,
+            max_val_memory_bytes,
+            pipeline_options,
         )
 
     def define_dataset_structure(self, dataset_path, val_split):
-        low_light_images = sorted(glob(os.path.join(dataset_path, "our485/low/*")))
-        enhanced_images = sorted(glob(os.path.join(dataset_path, "our485/high/*")))
-        self.test_low_light_images = sorted(
-            glob(os.path.join(dataset_path, "eval15/low/*"))
-        )
-        self.test_enhanced_images = sorted(
-            glob(os.path.join(dataset_path, "eval15/high/*"))
+        image_pairs = self.get_image_pairs(
+            dataset_path,
+            splits={
+                "our485": ("our485/low", "our485/high"),
+                "eval15": ("eval15/low", "eval15/high"),
+            },
         )
+        low_light_images, enhanced_images = image_pairs["our485"]
+        self.test_low_light_images, self.test_enhanced_images = image_pairs["eval15"]
         self.num_data_points = len(low_light_images)
         num_train_images = int(self.num_data_points * (1 - val_split))
         self.train_input_images = low_light_images[:num_train_images]
@@ -52,6 +90,24 @@ class LOLDataLoader(LowLightDatasetFactory):
 
 
 class UnsupervisedLOLDataLoader(LOLDataLoader):
+    """
+    Data loader of unpaired low light images, e.g. for zero-reference training, which
+    takes the low light images of the LoL dataset and optionally any number of
+    additional unpaired image corpora.
+
+    Parameters:
+        train_on_all_images (`bool`): Flag to also train on the enhanced images of the
+            LoL dataset.
+        image_sources (`Optional[Sequence[str]]`): Glob patterns of additional unpaired
+            training images, e.g. `"/data/unlabeled/*.jpg"` or `"gs://bucket/*.png"`, or
+            of TFRecord shards written by `DatasetFactory.export_to_tfrecords`, e.g.
+            `"/data/shards/train-*.tfrecord"`, whose input images are used. The images
+            are listed and read like the LoL images, i.e. from the zip archive or the
+            `file_reader` if any. The training images are then streamed from all the
+            sources by `build_streaming_dataset`, which does not support
+            `cache_decoded_images`.
+    """
+
     def __init__(
         self,
         image_size: int,
@@ -61,8 +117,29 @@ class UnsupervisedLOLDataLoader(LOLDataLoader):
         dataset_artifact_address: Union[str, None] = None,
         dataset_url: Union[str, None] = None,
         train_on_all_images: bool = False,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        thumbnail_size: int = 256,
+        max_visualizations_per_split: Optional[int] = 100,
+        read_from_zip: bool = False,
+        file_reader: Optional[RemoteFileReader] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
+        image_sources: Optional[Sequence[str]] = None,
     ):
+        if image_sources and cache_decoded_images:
+            # The streamed corpora can be of any size, their images are never cached.
+            raise ValueError(
+                "cache_decoded_images is not supported along with image_sources."
+            )
         self.train_on_all_images = train_on_all_images
+        self.image_sources = list(image_sources or [])
+        self.num_source_images = None
         super().__init__(
             image_size,
             bit_depth,
@@ -70,6 +147,19 @@ class UnsupervisedLOLDataLoader(LOLDataLoader):
             visualize_on_wandb,
             dataset_artifact_address,
             dataset_url,
+            cache_decoded_images,
+            cache_dir,
+            photometric_jitter,
+            patches_per_image,
+            defer_normalization,
+            data_service_address,
+            thumbnail_size,
+            max_visualizations_per_split,
+            read_from_zip,
+            file_reader,
+            materialize_val_dataset,
+            max_val_memory_bytes,
+            pipeline_options,
         )
 
     def define_dataset_structure(self, dataset_path, val_split):
@@ -94,6 +184,16 @@ class UnsupervisedLOLDataLoader(LOLDataLoader):
 
         return cropped_input_image
 
+    def random_crop_patches(self, input_image: tf.Tensor) -> tf.Tensor:
+        patches = random_crop_patches(
+            input_image, self.image_size, self.patches_per_image
+        )
+
+        # Ensuring the dataset tensor_spec is not None is the spatial dimensions
+        patches.set_shape([self.patches_per_image, self.image_size, self.image_size, 3])
+
+        return patches
+
     def resize(self, input_image: tf.Tensor) -> Tuple[tf.Tensor]:
         # Check whether the image size is smaller than the original image
         image_size = tf.minimum(self.image_size, tf.shape(input_image)[0])
@@ -108,12 +208,44 @@ class UnsupervisedLOLDataLoader(LOLDataLoader):
 
         return resized_input_image
 
+    def read_images(self, input_image_path: tf.Tensor) -> tf.Tensor:
+        return decode_image(self.read_file(input_image_path))
+
+    def preprocess_images(self, input_image: tf.Tensor, apply_crop: bool) -> tf.Tensor:
+        # Apply random cropping based on the boolean flag.
+        input_image = (
+            self.random_crop(input_image) if apply_crop else self.resize(input_image)
+        )
+        return self.normalize(input_image)
+
     def load_image(self, input_image_path: str, apply_crop: bool):
         # Read the image off the file path.
-        input_image = read_image(input_image_path, self.normalization_factor)
+        if apply_crop:
+            input_image = self.read_images(input_image_path)
+        else:
+            # The image is only resized, so that a JPEG is decoded at a reduced scale.
+            input_image = decode_image_for_size(
+                self.read_file(input_image_path), self.image_size
+            )
+        return self.preprocess_images(input_image, apply_crop)
 
-        # Apply random cropping based on the boolean flag.
-        return self.random_crop(input_image) if apply_crop else self.resize(input_image)
+    def augment_batch(self, images: tf.Tensor, seed: tf.Tensor) -> tf.Tensor:
+        return random_batched_augmentation(images, seed, self.photometric_jitter)
+
+    def create_image_dataset(
+        self, input_images: List[str], shuffle: bool = False
+    ) -> tf.data.Dataset:
+        if self.file_reader is not None:
+            # The reader shuffles the images itself, so that it reads ahead in their
+            # order.
+            return self.file_reader.create_path_dataset(
+                input_images,
+                shuffle=shuffle
+                and self.pipeline_options.shuffle_buffer_size is not None,
+                reshuffle_each_iteration=self.pipeline_options.reshuffle_each_iteration,
+            )
+        dataset = tf.data.Dataset.from_tensor_slices(input_images)
+        return self.pipeline_options.shuffle(dataset) if shuffle else dataset
 
     def build_dataset(
         self,
@@ -123,39 +255,289 @@ class UnsupervisedLOLDataLoader(LOLDataLoader):
         apply_augmentations: bool,
     ) -> tf.data.Dataset:
         # Build a `tf.data.Dataset` from the filenames.
-        dataset = tf.data.Dataset.from_tensor_slices(input_images)
+        # Only the training images are shuffled, before they are read.
+        dataset = self.create_image_dataset(
+            input_images, shuffle=apply_crop and not self.cache_decoded_images
+        )
 
         # Build the mapping function and apply it to the dataset.
-        map_fn = partial(self.load_image, apply_crop=apply_crop)
+        extract_patches = apply_crop and self.patches_per_image > 1
+        if self.cache_decoded_images or extract_patches:
+            dataset = dataset.map(self.read_images, num_parallel_calls=_AUTOTUNE)
+            if self.cache_decoded_images:
+                dataset = dataset.cache(self.get_cache_path(input_images, []))
+                if apply_crop:
+                    # The cache replays the order it was written in.
+                    dataset = self.pipeline_options.shuffle(dataset)
+            if extract_patches:
+                dataset = dataset.map(
+                    self.random_crop_patches, num_parallel_calls=_AUTOTUNE
+                )
+                dataset = dataset.unbatch()
+                dataset = dataset.shuffle(self.patches_per_image * batch_size)
+                map_fn = self.normalize
+            else:
+                map_fn = partial(self.preprocess_images, apply_crop=apply_crop)
+        else:
+            map_fn = partial(self.load_image, apply_crop=apply_crop)
         dataset = dataset.map(
             map_fn,
             num_parallel_calls=_AUTOTUNE,
         )
+        dataset = self.distribute_dataset(dataset)
 
-        # Apply augmentations.
+        dataset = dataset.batch(batch_size, drop_remainder=True)
+
+        # Apply augmentations on whole batches with a fresh stateless seed per batch.
         if apply_augmentations:
+            seeds = tf.data.Dataset.random(rerandomize_each_iteration=True).batch(2)
+            dataset = tf.data.Dataset.zip((dataset, seeds))
             dataset = dataset.map(
-                random_unpaired_horiontal_flip,
+                self.augment_batch,
+                num_parallel_calls=_AUTOTUNE,
+            )
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
+
+    def list_source_files(self, image_source: str) -> List[str]:
+        """
+        Function to list the files matching an image source, in the zip archive or the
+        storage of the `file_reader` the images are read from, if any. TFRecord shards
+        are always listed with `tf.io.gfile`, as they are read by `tf.data`.
+
+        Args:
+            image_source (`str`): Glob pattern of the images or TFRecord shards.
+        """
+        if image_source.endswith(_TFRECORD_EXTENSIONS) or (
+            self.file_reader is None and self.zip_archive is None
+        ):
+            files = tf.io.gfile.glob(image_source)
+        else:
+            directory, pattern = posixpath.split(image_source)
+            list_directory = (
+                self.file_reader.storage.list_directory
+                if self.file_reader is not None
+                else self.zip_archive.list_directory
+            )
+            files = [
+                path
+                for path in list_directory(directory)
+                if fnmatch.fnmatch(posixpath.basename(path), pattern)
+            ]
+        if len(files) == 0:
+            raise ValueError(f"No files match the image source {image_source}.")
+        return sorted(files)
+
+    def count_source_images(self, image_source: str) -> int:
+        """
+        Function to count the images of an image source. The examples of TFRecord shards
+        are counted from the `dataset_info.json` written next to them by
+        `DatasetFactory.export_to_tfrecords`, and are only read when the shards are not
+        listed there.
+
+        Args:
+            image_source (`str`): Glob pattern of the images or TFRecord shards.
+        """
+        files = self.list_source_files(image_source)
+        if not image_source.endswith(_TFRECORD_EXTENSIONS):
+            return len(files)
+        num_images = 0
+        shard_dir = os.path.dirname(files[0])
+        shards = {os.path.basename(path) for path in files}
+        if os.path.exists(os.path.join(shard_dir, DATASET_INFO_FILE)):
+            for split_info in read_dataset_info(shard_dir)["splits"].values():
+                if set(split_info["shards"]) <= shards:
+                    num_images += split_info["num_examples"]
+                    shards -= set(split_info["shards"])
+        if len(shards) > 0:
+            unlisted_shards = [os.path.join(shard_dir, shard) for shard in shards]
+            num_images += int(
+                tf.data.TFRecordDataset(unlisted_shards).reduce(
+                    tf.constant(0, tf.int64), lambda count, _: count + 1
+                )
+            )
+        return num_images
+
+    def get_steps_per_epoch(self, batch_size: int) -> int:
+        if len(self.image_sources) == 0:
+            return super().get_steps_per_epoch(batch_size)
+        # The sources are counted once, as the curriculum asks on every epoch.
+        if self.num_source_images is None:
+            self.num_source_images = sum(
+                self.count_source_images(image_source)
+                for image_source in self.image_sources
+            )
+        num_images = len(self.train_input_images) + self.num_source_images
+        return num_images * self.patches_per_image // batch_size
+
+    def create_permuted_image_dataset(self, input_images: List[str]) -> tf.data.Dataset:
+        """
+        Function to create a dataset of image files in a new random order on every epoch,
+        the whole list of files being permuted at once instead of going through a
+        shuffle buffer. The `file_reader`, if any, draws the orders itself, so that it
+        reads ahead in the order the files are read.
+
+        Args:
+            input_images (`List[str]`): A list of image filenames.
+        """
+        if self.file_reader is not None:
+            return self.file_reader.create_path_dataset(input_images, shuffle=True)
+        seeds = tf.data.Dataset.random(rerandomize_each_iteration=True).batch(2)
+        return (
+            seeds.take(1)
+            .map(
+                lambda seed: tf.random.experimental.stateless_shuffle(
+                    tf.constant(input_images), seed
+                )
+            )
+            .unbatch()
+        )
+
+    def create_source_dataset(
+        self,
+        image_source: str,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> tf.data.Dataset:
+        """
+        Function to create a dataset of the encoded images of an image source, in a
+        random order on every epoch.
+
+        Args:
+            image_source (`str`): Glob pattern of the images or TFRecord shards.
+            input_context (`Optional[tf.distribute.InputContext]`): Input context passed by
+                `tf.distribute.Strategy.distribute_datasets_from_function`.
+        """
+        # Only the file names are listed upfront, which stay small even for millions
+        # of images, the images themselves being read as they are consumed.
+        files = shard_image_files(self.list_source_files(image_source), input_context)
+        if image_source.endswith(_TFRECORD_EXTENSIONS):
+            dataset = tf.data.Dataset.from_tensor_slices(files)
+            dataset = dataset.shuffle(len(files), reshuffle_each_iteration=True)
+            return dataset.interleave(
+                lambda shard: tf.data.TFRecordDataset(shard).map(
+                    lambda example: parse_image_pair(example)[0]
+                ),
                 num_parallel_calls=_AUTOTUNE,
+                deterministic=False,
+            )
+        dataset = self.create_permuted_image_dataset(files)
+        return dataset.map(
+            self.read_file, num_parallel_calls=_AUTOTUNE, deterministic=False
+        )
+
+    def build_streaming_dataset(
+        self,
+        batch_size: int,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> tf.data.Dataset:
+        """
+        Function to build the training dataset streamed from the LoL training images and
+        the `image_sources`, for corpora of any size.
+
+        The sources are read concurrently and interleaved one image after the other,
+        every source being read until it is exhausted, so that an epoch is one pass over
+        all the images. The files of every source are read in a new random order on
+        every epoch, without a shuffle buffer of the size of the source. The images are
+        read, decoded and cropped into `patches_per_image` patches by parallel maps, and
+        batched, augmented and prefetched like in `build_dataset`.
+
+        Args:
+            batch_size (`int`): Number of images in a single batch.
+            input_context (`Optional[tf.distribute.InputContext]`): Input context passed by
+                `tf.distribute.Strategy.distribute_datasets_from_function`, every input
+                pipeline reading a disjoint subset of the files of every source.
+        """
+        input_images = shard_image_files(self.train_input_images, input_context)
+        datasets = [
+            self.create_source_dataset(image_source, input_context)
+            for image_source in self.image_sources
+        ]
+        if len(input_images) > 0:
+            dataset = self.create_permuted_image_dataset(input_images)
+            datasets.append(
+                dataset.map(
+                    self.read_file, num_parallel_calls=_AUTOTUNE, deterministic=False
+                )
+            )
+        dataset = tf.data.Dataset.choose_from_datasets(
+            datasets,
+            tf.data.Dataset.range(len(datasets)).repeat(),
+            stop_on_empty_dataset=False,
+        )
+        # The files are already permuted, a bounded buffer mixes the sources further.
+        dataset = self.pipeline_options.shuffle(dataset)
+        if self.patches_per_image > 1:
+            dataset = dataset.map(decode_image, num_parallel_calls=_AUTOTUNE)
+            dataset = dataset.map(
+                self.random_crop_patches, num_parallel_calls=_AUTOTUNE
             )
+            dataset = dataset.unbatch()
+            dataset = dataset.shuffle(self.patches_per_image * batch_size)
+            dataset = dataset.map(self.normalize, num_parallel_calls=_AUTOTUNE)
+        else:
             dataset = dataset.map(
-                random_unpaired_vertical_flip,
+                lambda image_bytes: self.preprocess_images(
+                    decode_image(image_bytes), apply_crop=True
+                ),
                 num_parallel_calls=_AUTOTUNE,
             )
+        dataset = self.distribute_dataset(dataset)
         dataset = dataset.batch(batch_size, drop_remainder=True)
-        return dataset.prefetch(_AUTOTUNE)
 
-    def get_datasets(self, batch_size: int) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
-        train_dataset = self.build_dataset(
-            input_images=self.train_input_images,
-            batch_size=batch_size,
-            apply_crop=True,
-            apply_augmentations=True,
-        )
+        # Apply augmentations on whole batches with a fresh stateless seed per batch.
+        seeds = tf.data.Dataset.random(rerandomize_each_iteration=True).batch(2)
+        dataset = tf.data.Dataset.zip((dataset, seeds))
+        dataset = dataset.map(self.augment_batch, num_parallel_calls=_AUTOTUNE)
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
+
+    def get_datasets(
+        self,
+        batch_size: int,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
+        if input_context is not None:
+            batch_size = input_context.get_per_replica_batch_size(batch_size)
+        if len(self.image_sources) > 0:
+            train_dataset = self.build_streaming_dataset(batch_size, input_context)
+        else:
+            train_dataset = self.build_dataset(
+                input_images=shard_image_files(self.train_input_images, input_context),
+                batch_size=batch_size,
+                apply_crop=True,
+                apply_augmentations=True,
+            )
         val_dataset = self.build_dataset(
-            input_images=self.val_input_images,
+            input_images=shard_image_files(self.val_input_images, input_context),
             batch_size=batch_size,
             apply_crop=False,
             apply_augmentations=False,
         )
+        if self.materialize_val_dataset:
+            val_dataset = self.materialize(
+                val_dataset,
+                shard_image_files(self.val_input_images, input_context),
+                batch_size,
+            )
         return train_dataset, val_dataset
+
+    def get_bucketed_val_dataset(
+        self,
+        batch_size: int,
+        bucket_size: int = 64,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> tf.data.Dataset:
+        if input_context is not None:
+            batch_size = input_context.get_per_replica_batch_size(batch_size)
+        dataset = self.create_image_dataset(
+            shard_image_files(self.val_input_images, input_context)
+        )
+        dataset = dataset.map(self.read_images, num_parallel_calls=_AUTOTUNE)
+        dataset = dataset.map(
+            lambda image: pad_to_bucket(self.normalize(image), bucket_size),
+            num_parallel_calls=_AUTOTUNE,
+        )
+        dataset = dataset.group_by_window(
+            key_func=lambda image, _: get_bucket_key(image, bucket_size),
+            reduce_func=lambda _, window: window.batch(batch_size),
+            window_size=batch_size,
+        )
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
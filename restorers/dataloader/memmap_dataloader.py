@@ -0,0 +1,134 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from absl import logging
+
+from .base import DatasetFactory
+from .base.commons import random_crop_window, read_dataset_info
+from .base.memmap_utils import open_memory_map, read_memory_map_window
+from .base.options import PipelineOptions
+
+
+class MemoryMappedDataLoader(DatasetFactory):
+    """
+    Data loader for image pairs exported using `DatasetFactory.export_to_memory_map`.
+
+    The decoded images are sampled straight from a `uint8` memory-map, so there is no
+    decoding at all and the OS page cache holding the memory-map is shared by all the
+    training processes on the same machine. The train and val splits are the ones that
+    were exported, hence there is no `val_split`.
+
+    Parameters:
+        image_size (`int`): The image resolution.
+        bit_depth (`int`): Bit depth for normalization.
+        memory_map_dir (`str`): Directory containing the exported memory-map.
+        photometric_jitter (`float`): Maximum relative change in brightness and contrast
+            applied by the augmentations.
+        patches_per_image (`int`): Number of random crops extracted from every training
+            image.
+        defer_normalization (`bool`): Flag to keep the images as `uint8` through the input
+            pipeline, so that they are normalized by the model on the accelerator.
+        materialize_val_dataset (`bool`): Flag to store the batched val dataset the first
+            time it is iterated.
+        max_val_memory_bytes (`int`): Maximum size of the val dataset stored in memory,
+            larger val datasets being stored on disk in `cache_dir`.
+        pipeline_options (`Optional[PipelineOptions]`): Performance options of the
+            `tf.data` pipelines.
+    """
+
+    def __init__(
+        self,
+        image_size: int,
+        bit_depth: int,
+        memory_map_dir: str,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
+    ) -> None:
+        self.memory_map_dir = memory_map_dir
+        super().__init__(
+            image_size,
+            bit_depth,
+            val_split=0.0,
+            visualize_on_wandb=False,
+            photometric_jitter=photometric_jitter,
+            patches_per_image=patches_per_image,
+            defer_normalization=defer_normalization,
+            materialize_val_dataset=materialize_val_dataset,
+            max_val_memory_bytes=max_val_memory_bytes,
+            pipeline_options=pipeline_options,
+        )
+
+    def fetch_dataset(self, val_split: float, visualize_on_wandb: bool):
+        self.dataset_info = read_dataset_info(self.memory_map_dir)
+        self.memory_map, self.index = open_memory_map(self.memory_map_dir)
+        self.num_data_points = len(self.index)
+        # The splits are stored one after the other, and are identified by the
+        # position of their images in the index.
+        num_train_images = self.dataset_info["splits"]["train"]["num_examples"]
+        self.train_input_images = list(range(num_train_images))
+        self.train_enhanced_images = self.train_input_images
+        self.val_input_images = list(range(num_train_images, self.num_data_points))
+        self.val_enhanced_images = self.val_input_images
+
+    def sanity_tests(self):
+        logging.warning(f"{self.__class__.__name__} does not support visualization.")
+
+    def __len__(self):
+        return self.num_data_points
+
+    def get_dataset_source(self) -> str:
+        return os.path.abspath(self.memory_map_dir)
+
+    def create_dataset(
+        self, input_images: List[int], enhanced_images: List[int]
+    ) -> tf.data.Dataset:
+        index = self.index[np.asarray(input_images, dtype=np.int64)]
+        return tf.data.Dataset.from_tensor_slices((index[:, 0], index[:, 1:]))
+
+    def read_window(
+        self, offset: tf.Tensor, image_shape: tf.Tensor, window: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        image_pair = tf.numpy_function(
+            lambda *args: read_memory_map_window(self.memory_map, *args),
+            [offset, image_shape[0], image_shape[1], window],
+            Tout=tf.uint8,
+            stateful=False,
+        )
+        image_pair.set_shape([None, None, 6])
+        input_image, enhanced_image = tf.split(
+            image_pair, num_or_size_splits=2, axis=-1
+        )
+        return input_image, enhanced_image
+
+    def read_images(
+        self, offset: tf.Tensor, image_shape: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        window = tf.concat(
+            [tf.zeros([2], dtype=image_shape.dtype), image_shape], axis=0
+        )
+        return self.read_window(offset, image_shape, window)
+
+    def load_image(
+        self, offset: tf.Tensor, image_shape: tf.Tensor, apply_crop: bool
+    ) -> Tuple[tf.Tensor]:
+        if not apply_crop:
+            input_image, enhanced_image = self.read_images(offset, image_shape)
+            return self.preprocess_images(input_image, enhanced_image, apply_crop)
+
+        # Only the random crop window is read off the memory-map.
+        window = random_crop_window(tf.cast(image_shape, tf.int32), self.image_size)
+        input_image, enhanced_image = self.read_window(
+            offset, image_shape, tf.cast(window, image_shape.dtype)
+        )
+
+        # Ensuring the dataset tensor_spec is not None is the spatial dimensions
+        input_image.set_shape([self.image_size, self.image_size, 3])
+        enhanced_image.set_shape([self.image_size, self.image_size, 3])
+
+        return self.normalize_images(input_image, enhanced_image)
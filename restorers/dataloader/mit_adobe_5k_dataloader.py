@@ -1,8 +1,8 @@
-import os
-from glob import glob
-from typing import Union
+from typing import Optional, Union
 
 from .base import LowLightDatasetFactory
+from .base.options import PipelineOptions
+from .base.storage import RemoteFileReader
 
 
 class MITAdobe5KDataLoader(LowLightDatasetFactory):
@@ -14,6 +14,19 @@ class MITAdobe5KDataLoader(LowLightDatasetFactory):
         visualize_on_wandb: bool,
         dataset_artifact_address: Union[str, None] = None,
         dataset_url: Union[str, None] = None,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        thumbnail_size: int = 256,
+        max_visualizations_per_split: Optional[int] = 100,
+        read_from_zip: bool = False,
+        file_reader: Optional[RemoteFileReader] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
     ):
         super().__init__(
             image_size,
@@ -22,11 +35,25 @@ class MITAdobe5KDataLoader(LowLightDatasetFactory):
             visualize_on_wandb,
             dataset_artifact_address,
             dataset_url,
+            cache_decoded_images,
+            cache_dir,
+            photometric_jitter,
+            patches_per_image,
+            defer_normalization,
+            data_service_address,
+            thumbnail_size,
+            max_visualizations_per_split,
+            read_from_zip,
+            file_reader,
+            materialize_val_dataset,
+            max_val_memory_bytes,
+            pipeline_options,
         )
 
     def define_dataset_structure(self, dataset_path, val_split):
-        low_light_images = sorted(glob(os.path.join(dataset_path, "original/*")))
-        enhanced_images = sorted(glob(os.path.join(dataset_path, "expert_c/*")))
+        low_light_images, enhanced_images = self.get_image_pairs(
+            dataset_path, splits={"expert_c": ("original", "expert_c")}
+        )["expert_c"]
         self.num_data_points = len(low_light_images)
         num_train_images = int(self.num_data_points * (1 - val_split))
         self.train_input_images = low_light_images[:num_train_images]
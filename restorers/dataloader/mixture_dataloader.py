@@ -0,0 +1,238 @@
+from typing import List, Optional, Sequence, Tuple
+
+import tensorflow as tf
+
+from .base import DatasetFactory
+from .base.commons import random_paired_batched_augmentation, shard_image_files
+
+_AUTOTUNE = tf.data.AUTOTUNE
+
+
+class MixtureDataLoader:
+    """
+    Data loader mixing the image pairs of several data loaders, e.g. `LOLDataLoader`,
+    `MITAdobe5KDataLoader` and `ImageFolderDataLoader`, into a single training dataset.
+
+    Every training example is drawn from the sources at random following `weights`, using
+    `tf.data.Dataset.sample_from_datasets`. Each source keeps its own decode pipeline,
+    which is autotuned and prefetched independently, so that a source with large images
+    does not starve the others, and keeps its own `pipeline_options` and
+    `data_service_address`. An epoch has as many examples as all the sources
+    together, and the validation dataset is the concatenation of the validation images
+    of all the sources.
+
+    Usage:
+
+    ```py
+    data_loader = MixtureDataLoader(
+        data_loaders=[lol_data_loader, mit_adobe_5k_data_loader],
+        weights=[0.7, 0.3],
+    )
+    train_dataset, val_dataset = data_loader.get_datasets(batch_size=batch_size)
+    ```
+
+    Parameters:
+        data_loaders (`Sequence[DatasetFactory]`): The data loaders of the sources, which
+            must share the same `image_size` and `defer_normalization`.
+        weights (`Optional[Sequence[float]]`): Sampling weight of every source, defaults to
+            the number of training images of the sources, i.e. every image is equally
+            likely to be sampled.
+        photometric_jitter (`float`): Maximum relative change in brightness and contrast
+            applied by the augmentations.
+        seed (`Optional[int]`): Seed of the sampling of the sources.
+    """
+
+    def __init__(
+        self,
+        data_loaders: Sequence[DatasetFactory],
+        weights: Optional[Sequence[float]] = None,
+        photometric_jitter: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        if len(data_loaders) == 0:
+            raise ValueError("MixtureDataLoader needs at least one data loader.")
+        if weights is not None and len(weights) != len(data_loaders):
+            raise ValueError(
+                f"Got {len(weights)} weights for {len(data_loaders)} data loaders."
+            )
+        for attribute in ["image_size", "defer_normalization"]:
+            values = {getattr(data_loader, attribute) for data_loader in data_loaders}
+            if len(values) > 1:
+                raise ValueError(
+                    f"The data loaders must share the same {attribute}, got {values}."
+                )
+        self.data_loaders = list(data_loaders)
+        self.weights = (
+            [float(len(data_loader.train_input_images)) for data_loader in data_loaders]
+            if weights is None
+            else [float(weight) for weight in weights]
+        )
+        self.photometric_jitter = photometric_jitter
+        self.seed = seed
+
+    @property
+    def image_size(self) -> int:
+        return self.data_loaders[0].image_size
+
+    @image_size.setter
+    def image_size(self, image_size: int) -> None:
+        # e.g. set by `ProgressiveResizing`, the crop size is shared by all the sources.
+        for data_loader in self.data_loaders:
+            data_loader.image_size = image_size
+
+    @property
+    def train_input_images(self) -> List:
+        return [
+            image
+            for data_loader in self.data_loaders
+            for image in data_loader.train_input_images
+        ]
+
+    @property
+    def val_input_images(self) -> List:
+        return [
+            image
+            for data_loader in self.data_loaders
+            for image in data_loader.val_input_images
+        ]
+
+    def __len__(self):
+        return sum(len(data_loader) for data_loader in self.data_loaders)
+
+    def augment_batch(
+        self, images: Tuple[tf.Tensor, tf.Tensor], seed: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        input_images, enhanced_images = images
+        return random_paired_batched_augmentation(
+            input_images, enhanced_images, seed, self.photometric_jitter
+        )
+
+    def build_train_dataset(
+        self,
+        batch_size: int,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> tf.data.Dataset:
+        datasets, weights = [], []
+        num_examples = 0
+        for data_loader, weight in zip(self.data_loaders, self.weights):
+            input_images = shard_image_files(
+                data_loader.train_input_images, input_context
+            )
+            if len(input_images) == 0 or weight <= 0:
+                continue
+            dataset = data_loader.build_element_dataset(
+                input_images=input_images,
+                enhanced_images=shard_image_files(
+                    data_loader.train_enhanced_images, input_context
+                ),
+                batch_size=batch_size,
+                apply_crop=True,
+            )
+            # Every source is repeated and prefetched on its own, so that the sampling
+            # never waits on the decoding of a single source.
+            dataset = data_loader.pipeline_options.apply(dataset)
+            datasets.append(dataset.repeat().prefetch(_AUTOTUNE))
+            weights.append(weight)
+            num_examples += len(input_images) * data_loader.patches_per_image
+        if len(datasets) == 0:
+            raise ValueError("None of the data loaders has training images.")
+        dataset = tf.data.Dataset.sample_from_datasets(
+            datasets,
+            weights=[weight / sum(weights) for weight in weights],
+            seed=self.seed,
+        )
+        dataset = dataset.take(num_examples)
+        dataset = dataset.batch(batch_size, drop_remainder=True)
+
+        # Apply augmentations on whole batches with a fresh stateless seed per batch.
+        seeds = tf.data.Dataset.random(rerandomize_each_iteration=True).batch(2)
+        dataset = tf.data.Dataset.zip((dataset, seeds))
+        dataset = dataset.map(self.augment_batch, num_parallel_calls=_AUTOTUNE)
+        return dataset.prefetch(_AUTOTUNE)
+
+    def build_val_dataset(
+        self,
+        batch_size: int,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> tf.data.Dataset:
+        dataset = None
+        for data_loader in self.data_loaders:
+            input_images = shard_image_files(
+                data_loader.val_input_images, input_context
+            )
+            if len(input_images) == 0:
+                continue
+            source_dataset = data_loader.build_element_dataset(
+                input_images=input_images,
+                enhanced_images=shard_image_files(
+                    data_loader.val_enhanced_images, input_context
+                ),
+                batch_size=batch_size,
+                apply_crop=False,
+            )
+            source_dataset = data_loader.pipeline_options.apply(source_dataset)
+            dataset = (
+                source_dataset
+                if dataset is None
+                else dataset.concatenate(source_dataset)
+            )
+        if dataset is None:
+            raise ValueError("None of the data loaders has validation images.")
+        dataset = dataset.batch(batch_size, drop_remainder=True)
+        return dataset.prefetch(_AUTOTUNE)
+
+    def get_steps_per_epoch(self, batch_size: int) -> int:
+        """Returns the number of batches of the training dataset, which has as many
+        examples as the sources with a positive weight together."""
+        num_examples = sum(
+            len(data_loader.train_input_images) * data_loader.patches_per_image
+            for data_loader, weight in zip(self.data_loaders, self.weights)
+            if weight > 0
+        )
+        return num_examples // batch_size
+
+    def get_datasets(
+        self,
+        batch_size: int,
+        input_context: Optional[tf.distribute.InputContext] = None,
+    ) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
+        """
+        Function to retrieve the train and val dataset.
+
+        Args:
+            batch_size (`int`): Number of images in a single batch, the global batch size
+                if `input_context` is passed.
+            input_context (`Optional[tf.distribute.InputContext]`): Input context passed by
+                `tf.distribute.Strategy.distribute_datasets_from_function`.
+
+        Returns:
+            A tuple of `tf.data.Dataset` for training and validation.
+        """
+        if input_context is not None:
+            batch_size = input_context.get_per_replica_batch_size(batch_size)
+        return (
+            self.build_train_dataset(batch_size, input_context),
+            self.build_val_dataset(batch_size, input_context),
+        )
+
+    def get_distributed_datasets(
+        self, strategy: tf.distribute.Strategy, batch_size: int
+    ) -> Tuple[tf.distribute.DistributedDataset, tf.distribute.DistributedDataset]:
+        """
+        Function to retrieve the train and val dataset distributed by `strategy`, with one
+        input pipeline per worker reading its own shard of the images of every source.
+
+        Args:
+            strategy (`tf.distribute.Strategy`): The distribution strategy.
+            batch_size (`int`): Global number of images in a single batch.
+
+        Returns:
+            A tuple of `tf.distribute.DistributedDataset` for training and validation.
+        """
+        train_dataset = strategy.distribute_datasets_from_function(
+            lambda input_context: self.get_datasets(batch_size, input_context)[0]
+        )
+        val_dataset = strategy.distribute_datasets_from_function(
+            lambda input_context: self.get_datasets(batch_size, input_context)[1]
+        )
+        return train_dataset, val_dataset
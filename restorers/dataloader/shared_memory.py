@@ -0,0 +1,160 @@
+import os
+import uuid
+import fcntl
+import atexit
+import shutil
+from contextlib import contextmanager
+from typing import List, Optional
+
+from absl import logging
+
+from .base import DatasetFactory
+from .base.commons import fingerprint_image_files
+from .memmap_dataloader import MemoryMappedDataLoader
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedMemoryDataset:
+    """
+    The decoded train and val images of a data loader, shared by all the processes on a
+    host, e.g. the concurrent trials of a hyperparameter sweep.
+
+    The first process to `acquire` the dataset decodes its images once into a `uint8`
+    memory-map in shared memory (`/dev/shm`), while the other processes wait for it and
+    then map the same pages. The clients read the crops straight from the shared pages
+    using `MemoryMappedDataLoader`, so nothing is copied across the processes. Every
+    acquisition holds a lease, and the shared memory is freed when the last lease is
+    released. The leases of processes which died without releasing them are dropped.
+
+    Usage:
+
+    ```py
+    with SharedMemoryDataset(data_loader) as shared_dataset:
+        memory_mapped_data_loader = shared_dataset.get_data_loader()
+        train_dataset, val_dataset = memory_mapped_data_loader.get_datasets(batch_size)
+        model.fit(train_dataset, validation_data=val_dataset, ...)
+    ```
+
+    Parameters:
+        data_loader (`DatasetFactory`): The data loader whose images are shared.
+        shared_memory_dir (`str`): Directory backed by shared memory.
+        keep_alive (`bool`): Keep the decoded images in shared memory after the last
+            lease is released, e.g. for the next trials of a sweep.
+    """
+
+    def __init__(
+        self,
+        data_loader: DatasetFactory,
+        shared_memory_dir: str = "/dev/shm",
+        keep_alive: bool = False,
+    ) -> None:
+        self.data_loader = data_loader
+        self.keep_alive = keep_alive
+        fingerprint = fingerprint_image_files(
+            list(data_loader.train_input_images)
+            + list(data_loader.val_input_images)
+            + list(data_loader.train_enhanced_images)
+            + list(data_loader.val_enhanced_images),
+            data_loader.bit_depth,
+            data_loader.get_dataset_source(),
+        )
+        self.memory_map_dir = os.path.join(
+            shared_memory_dir, f"restorers-{fingerprint[:32]}"
+        )
+        self.lease_dir = f"{self.memory_map_dir}.leases"
+        self.lease_path: Optional[str] = None
+
+    @contextmanager
+    def lock(self):
+        with open(f"{self.memory_map_dir}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_leases(self) -> List[str]:
+        """Returns the live leases, dropping the leases of the dead processes, must be
+        called with the lock held."""
+        leases = []
+        for lease in sorted(os.listdir(self.lease_dir)):
+            if _is_process_alive(int(lease.split(".")[0])):
+                leases.append(lease)
+            else:
+                logging.warning(f"Dropping the lease {lease} of a dead process.")
+                os.remove(os.path.join(self.lease_dir, lease))
+        return leases
+
+    def acquire(self) -> str:
+        """Acquires a lease on the shared images, decoding them if no other process did
+        yet, and returns the directory of their memory-map."""
+        if self.lease_path is not None:
+            return self.memory_map_dir
+        with self.lock():
+            os.makedirs(self.lease_dir, exist_ok=True)
+            self.get_leases()
+            if not os.path.isdir(self.memory_map_dir):
+                logging.info(f"Decoding the images into {self.memory_map_dir}.")
+                # Decode into a temporary directory first, so that a partially written
+                # memory-map is never visible, e.g. if this process is killed.
+                temp_dir = f"{self.memory_map_dir}.{os.getpid()}.tmp"
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                try:
+                    self.data_loader.export_to_memory_map(temp_dir)
+                    os.rename(temp_dir, self.memory_map_dir)
+                finally:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+            self.lease_path = os.path.join(
+                self.lease_dir, f"{os.getpid()}.{uuid.uuid4().hex}"
+            )
+            open(self.lease_path, "w").close()
+        atexit.register(self.release)
+        return self.memory_map_dir
+
+    def release(self) -> None:
+        """Releases the lease, freeing the shared images if it was the last one."""
+        if self.lease_path is None:
+            return
+        with self.lock():
+            os.remove(self.lease_path)
+            self.lease_path = None
+            if len(self.get_leases()) == 0 and not self.keep_alive:
+                logging.info(f"Freeing {self.memory_map_dir}.")
+                shutil.rmtree(self.memory_map_dir, ignore_errors=True)
+                shutil.rmtree(self.lease_dir, ignore_errors=True)
+        atexit.unregister(self.release)
+
+    def get_data_loader(self, **kwargs) -> MemoryMappedDataLoader:
+        """Returns a `MemoryMappedDataLoader` reading the shared images, `kwargs` being
+        passed to it, e.g. `patches_per_image` or `defer_normalization`. The
+        `patches_per_image` of the shared data loader is used by default."""
+        if self.data_loader.data_service_address is not None:
+            # The memory-map is read by python code wrapped in `tf.numpy_function`,
+            # which can not be serialized to the tf.data service workers.
+            raise ValueError(
+                "The shared images can not be read by the tf.data service workers, "
+                "unset data_service_address or share_decoded_images."
+            )
+        kwargs.setdefault("patches_per_image", self.data_loader.patches_per_image)
+        return MemoryMappedDataLoader(
+            image_size=self.data_loader.image_size,
+            bit_depth=self.data_loader.bit_depth,
+            memory_map_dir=self.acquire(),
+            **kwargs,
+        )
+
+    def __enter__(self) -> "SharedMemoryDataset":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
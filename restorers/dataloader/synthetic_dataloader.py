@@ -0,0 +1,193 @@
+import os
+from functools import partial
+from typing import List, Optional, Tuple
+
+import tensorflow as tf
+from absl import logging
+
+from .base import DatasetFactory
+from .base.commons import decode_image, random_batched_augmentation
+from .base.degradations import RandomDegradation
+from .base.options import PipelineOptions
+
+_AUTOTUNE = tf.data.AUTOTUNE
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+class SyntheticDegradationDataLoader(DatasetFactory):
+    """
+    Data loader generating the degraded input images from clean images on the fly, e.g.
+    for denoising, deblurring or low light enhancement, so that only the clean images
+    are stored and read.
+
+    The clean images are cropped, batched, augmented and then degraded by `degradation`
+    on whole batches, with a fresh random seed per training batch. The val images are
+    degraded with the same seeds on every epoch, so that the val metrics are comparable
+    across epochs.
+
+    Parameters:
+        image_size (`int`): The image resolution.
+        bit_depth (`int`): Bit depth for normalization.
+        val_split (`float`): The percentage of validation split.
+        dataset_path (`str`): Directory containing the clean images.
+        degradation (`RandomDegradation`): The degradation of the clean images.
+        cache_decoded_images (`bool`): Flag to cache the decoded images before cropping.
+        cache_dir (`Optional[str]`): Directory for the decoded image cache.
+        photometric_jitter (`float`): Maximum relative change in brightness and contrast
+            applied by the augmentations, before the degradation.
+        patches_per_image (`int`): Number of random crops extracted from every decoded
+            training image.
+        defer_normalization (`bool`): Flag to keep the images as `uint8` through the input
+            pipeline, so that they are normalized by the model on the accelerator.
+        materialize_val_dataset (`bool`): Flag to store the batched val dataset the first
+            time it is iterated.
+        max_val_memory_bytes (`int`): Maximum size of the val dataset stored in memory,
+            larger val datasets being stored on disk in `cache_dir`.
+        seed (`Optional[int]`): Seed of the degradations.
+        pipeline_options (`Optional[PipelineOptions]`): Performance options of the
+            `tf.data` pipelines.
+    """
+
+    def __init__(
+        self,
+        image_size: int,
+        bit_depth: int,
+        val_split: float,
+        dataset_path: str,
+        degradation: RandomDegradation,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        seed: Optional[int] = None,
+        pipeline_options: Optional[PipelineOptions] = None,
+    ) -> None:
+        self.dataset_path = dataset_path
+        self.degradation = degradation
+        self.seed = seed
+        super().__init__(
+            image_size,
+            bit_depth,
+            val_split=val_split,
+            visualize_on_wandb=False,
+            cache_decoded_images=cache_decoded_images,
+            cache_dir=cache_dir,
+            photometric_jitter=photometric_jitter,
+            patches_per_image=patches_per_image,
+            defer_normalization=defer_normalization,
+            materialize_val_dataset=materialize_val_dataset,
+            max_val_memory_bytes=max_val_memory_bytes,
+            pipeline_options=pipeline_options,
+        )
+
+    def fetch_dataset(self, val_split: float, visualize_on_wandb: bool):
+        images = sorted(
+            os.path.join(self.dataset_path, filename)
+            for filename in os.listdir(self.dataset_path)
+            if filename.lower().endswith(_IMAGE_EXTENSIONS)
+        )
+        self.num_data_points = len(images)
+        num_train_images = int(self.num_data_points * (1 - val_split))
+        # The clean images are the targets, the inputs being generated from them.
+        self.train_input_images = images[:num_train_images]
+        self.train_enhanced_images = self.train_input_images
+        self.val_input_images = images[num_train_images:]
+        self.val_enhanced_images = self.val_input_images
+
+    def sanity_tests(self):
+        logging.warning(f"{self.__class__.__name__} does not support visualization.")
+
+    def __len__(self):
+        return self.num_data_points
+
+    def get_dataset_source(self) -> str:
+        return os.path.abspath(self.dataset_path)
+
+    def read_images(
+        self, input_image_path: tf.Tensor, enhanced_image_path: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        # Both paths are the clean image, which is only read and decoded once.
+        image = decode_image(tf.io.read_file(enhanced_image_path))
+        return image, image
+
+    def read_cached_images(
+        self, input_image_path: tf.Tensor, enhanced_image_path: tf.Tensor
+    ) -> tf.Tensor:
+        # Only the clean image is cached, it is paired with itself after the cache.
+        return decode_image(tf.io.read_file(enhanced_image_path))
+
+    def pair_cached_images(self, image: tf.Tensor) -> Tuple[tf.Tensor]:
+        return image, image
+
+    def get_cache_path(self, input_images: List[str], enhanced_images: List[str]):
+        # The input images are the clean images, which are cached once.
+        return super().get_cache_path([], enhanced_images)
+
+    def load_image(
+        self,
+        input_image_path: tf.Tensor,
+        enhanced_image_path: tf.Tensor,
+        apply_crop: bool,
+    ) -> Tuple[tf.Tensor]:
+        input_image, enhanced_image = self.read_images(
+            input_image_path, enhanced_image_path
+        )
+        return self.preprocess_images(input_image, enhanced_image, apply_crop)
+
+    def degrade_batch(
+        self,
+        images: Tuple[tf.Tensor, tf.Tensor],
+        seed: tf.Tensor,
+        apply_augmentations: bool,
+    ) -> Tuple[tf.Tensor]:
+        """
+        Mapping function for a batched `tf.data.Dataset`. Augments a batch of clean
+        images and generates the degraded input images from them.
+
+        Args:
+            images (`Tuple[tf.Tensor, tf.Tensor]`): Batches of clean images.
+            seed (`tf.Tensor`): A stateless random seed of shape `(2,)`.
+            apply_augmentations (`bool`): Boolean flag to condition augmentations.
+        """
+        _, clean_images = images
+        seeds = tf.random.experimental.stateless_split(seed, num=2)
+        if apply_augmentations:
+            clean_images = random_batched_augmentation(
+                clean_images, seeds[0], self.photometric_jitter
+            )
+        # The degradations run on images in [0, 1], deferred `uint8` images are
+        # converted back and forth.
+        degraded_images = self.degradation(
+            tf.image.convert_image_dtype(clean_images, tf.float32), seeds[1]
+        )
+        degraded_images = tf.image.convert_image_dtype(
+            degraded_images, clean_images.dtype, saturate=True
+        )
+        return degraded_images, clean_images
+
+    def build_dataset(
+        self,
+        input_images: List[str],
+        enhanced_images: List[str],
+        batch_size: int,
+        apply_crop: bool,
+        apply_augmentations: bool,
+    ) -> tf.data.Dataset:
+        dataset = self.build_element_dataset(
+            input_images, enhanced_images, batch_size, apply_crop
+        )
+        dataset = dataset.batch(batch_size, drop_remainder=True)
+
+        # The val batches get the same seeds on every iteration.
+        seeds = tf.data.Dataset.random(
+            seed=self.seed, rerandomize_each_iteration=apply_augmentations
+        ).batch(2)
+        dataset = tf.data.Dataset.zip((dataset, seeds))
+        dataset = dataset.map(
+            partial(self.degrade_batch, apply_augmentations=apply_augmentations),
+            num_parallel_calls=_AUTOTUNE,
+        )
+        return self.pipeline_options.apply(dataset.prefetch(_AUTOTUNE))
@@ -0,0 +1,126 @@
+import os
+from typing import List, Optional, Tuple
+
+import tensorflow as tf
+from absl import logging
+
+from .base import DatasetFactory
+from .base.commons import read_dataset_info
+from .base.options import PipelineOptions
+from .base.tfrecord_utils import read_tfrecord_shards
+
+
+class TFRecordDataLoader(DatasetFactory):
+    """
+    Data loader for image pairs exported using `DatasetFactory.export_to_tfrecords`.
+
+    The shards of a split are read concurrently using `tf.data.Dataset.interleave`,
+    which replaces thousands of small file reads by a few large sequential reads. The
+    train and val splits are the ones that were exported, hence there is no `val_split`.
+
+    Parameters:
+        image_size (`int`): The image resolution.
+        bit_depth (`int`): Bit depth for normalization.
+        tfrecord_dir (`str`): Directory containing the exported shards.
+        cycle_length (`Optional[int]`): Number of shards read concurrently, defaults to
+            the number of shards.
+        cache_decoded_images (`bool`): Flag to cache the decoded images before cropping.
+        cache_dir (`Optional[str]`): Directory for the decoded image cache.
+        photometric_jitter (`float`): Maximum relative change in brightness and contrast
+            applied by the augmentations.
+        patches_per_image (`int`): Number of random crops extracted from every decoded
+            training image.
+        defer_normalization (`bool`): Flag to keep the images as `uint8` through the input
+            pipeline, so that they are normalized by the model on the accelerator.
+        data_service_address (`Optional[str]`): Address of a `tf.data` service
+            dispatcher whose workers run the decoding and cropping.
+        materialize_val_dataset (`bool`): Flag to store the batched val dataset the first
+            time it is iterated.
+        max_val_memory_bytes (`int`): Maximum size of the val dataset stored in memory,
+            larger val datasets being stored on disk in `cache_dir`.
+        pipeline_options (`Optional[PipelineOptions]`): Performance options of the
+            `tf.data` pipelines.
+    """
+
+    def __init__(
+        self,
+        image_size: int,
+        bit_depth: int,
+        tfrecord_dir: str,
+        cycle_length: Optional[int] = None,
+        cache_decoded_images: bool = False,
+        cache_dir: Optional[str] = None,
+        photometric_jitter: float = 0.0,
+        patches_per_image: int = 1,
+        defer_normalization: bool = False,
+        data_service_address: Optional[str] = None,
+        materialize_val_dataset: bool = False,
+        max_val_memory_bytes: int = 2**30,
+        pipeline_options: Optional[PipelineOptions] = None,
+    ) -> None:
+        self.tfrecord_dir = tfrecord_dir
+        self.cycle_length = cycle_length
+        super().__init__(
+            image_size,
+            bit_depth,
+            val_split=0.0,
+            visualize_on_wandb=False,
+            cache_decoded_images=cache_decoded_images,
+            cache_dir=cache_dir,
+            photometric_jitter=photometric_jitter,
+            patches_per_image=patches_per_image,
+            defer_normalization=defer_normalization,
+            data_service_address=data_service_address,
+            materialize_val_dataset=materialize_val_dataset,
+            max_val_memory_bytes=max_val_memory_bytes,
+            pipeline_options=pipeline_options,
+        )
+
+    def _get_shard_paths(self, split: str) -> List[str]:
+        split_info = self.dataset_info["splits"].get(split, {"shards": []})
+        return [
+            os.path.join(self.tfrecord_dir, shard) for shard in split_info["shards"]
+        ]
+
+    def fetch_dataset(self, val_split: float, visualize_on_wandb: bool):
+        self.dataset_info = read_dataset_info(self.tfrecord_dir)
+        self.compression_type = self.dataset_info["compression_type"]
+        self.num_data_points = sum(
+            split_info["num_examples"]
+            for split_info in self.dataset_info["splits"].values()
+        )
+        # Each shard holds both the images of a pair, so the shard lists take the
+        # place of the image lists of the other data loaders.
+        self.train_input_images = self._get_shard_paths("train")
+        self.train_enhanced_images = self.train_input_images
+        self.val_input_images = self._get_shard_paths("val")
+        self.val_enhanced_images = self.val_input_images
+
+    def sanity_tests(self):
+        logging.warning(f"{self.__class__.__name__} does not support visualization.")
+
+    def __len__(self):
+        return self.num_data_points
+
+    def get_dataset_source(self) -> str:
+        return os.path.abspath(self.tfrecord_dir)
+
+    def get_steps_per_epoch(self, batch_size: int) -> int:
+        # The image lists hold the shards, the examples are counted by the export.
+        split_info = self.dataset_info["splits"].get("train", {"num_examples": 0})
+        return split_info["num_examples"] * self.patches_per_image // batch_size
+
+    def create_dataset(
+        self, input_images: List[str], enhanced_images: List[str]
+    ) -> tf.data.Dataset:
+        return read_tfrecord_shards(
+            input_images,
+            compression_type=self.compression_type,
+            cycle_length=self.cycle_length,
+        )
+
+    def read_image_bytes(
+        self, input_image: tf.Tensor, enhanced_image: tf.Tensor
+    ) -> Tuple[tf.Tensor]:
+        # The shards already hold the encoded images.
+        return input_image, enhanced_image
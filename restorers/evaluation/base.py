@@ -1,3 +1,4 @@
+import io
 from time import time
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional, Union, Tuple
@@ -8,6 +9,8 @@ from PIL import Image
 import tensorflow as tf
 from tqdm.auto import tqdm
 
+from ..dataloader.base.commons import resize_image
+from ..dataloader.base.storage import RemoteFileReader
 from ..utils import fetch_wandb_artifact, count_params, calculate_gflops
 
 
@@ -18,12 +21,14 @@ class BaseEvaluator(ABC):
         model: Optional[tf.keras.Model] = None,
         input_size: Optional[int] = None,
         resize_target: Optional[Tuple[int, int]] = None,
+        file_reader: Optional[RemoteFileReader] = None,
     ) -> None:
         super().__init__()
         self.metrics = metrics
         self.model = model
         self.input_size = input_size
         self.resize_target = resize_target
+        self.file_reader = file_reader
         self.image_paths = self.populate_image_paths()
         self.wandb_table = self.create_wandb_table() if wandb.run is not None else None
 
@@ -55,12 +60,26 @@ class BaseEvaluator(ABC):
         self.model_path = fetch_wandb_artifact(artifact_address, artifact_type="model")
         self.model = tf.keras.models.load_model(self.model_path, compile=False)
 
+    def open_image(self, image_path: str) -> Image:
+        if self.file_reader is None:
+            return Image.open(image_path)
+        return Image.open(io.BytesIO(self.file_reader.read(image_path)))
+
     def evaluate_split(
         self,
         input_image_paths: List[str],
         ground_truth_image_paths: List[str],
         split_name: str,
     ):
+        if self.file_reader is not None:
+            # The pairs are read one after the other, which is the read-ahead order.
+            self.file_reader.schedule(
+                [
+                    path
+                    for pair in zip(input_image_paths, ground_truth_image_paths)
+                    for path in pair
+                ]
+            )
         progress_bar = tqdm(
             zip(input_image_paths, ground_truth_image_paths),
             total=len(input_image_paths),
@@ -69,11 +88,13 @@ class BaseEvaluator(ABC):
         total_metric_values = [0.0] * len(self.metrics)
         total_inference_time = 0
         for input_image_path, ground_truth_image_path in progress_bar:
-            input_image = Image.open(input_image_path)
-            ground_truth_image = Image.open(ground_truth_image_path)
+            input_image = self.open_image(input_image_path)
+            ground_truth_image = self.open_image(ground_truth_image_path)
             if self.resize_target is not None:
-                input_image = input_image.resize(self.resize_target[::-1])
-                ground_truth_image = ground_truth_image.resize(self.resize_target[::-1])
+                # JPEGs are decoded straight at a reduced scale when possible.
+                resize_target = tuple(self.resize_target[::-1])
+                input_image = resize_image(input_image, resize_target)
+                ground_truth_image = resize_image(ground_truth_image, resize_target)
             preprocessed_input_image = self.preprocess(input_image)
             preprocessed_ground_truth_image = self.preprocess(ground_truth_image)
             start_time = time()
@@ -83,6 +104,9 @@ class BaseEvaluator(ABC):
             model_output = model_output.numpy()
             metric_results = []
             for idx, metric in enumerate(self.metrics):
+                # The metrics are stateful, so they are reset to score each image
+                # on its own rather than returning the running mean.
+                metric.reset_state()
                 metric_value = (
                     metric(preprocessed_ground_truth_image, model_output).numpy().item()
                 )
@@ -110,6 +134,37 @@ class BaseEvaluator(ABC):
         )
         return metric_values
 
+    def evaluate_dataset(self, dataset: tf.data.Dataset, split_name: str):
+        """Evaluates the model on a batched dataset of `(input_image, ground_truth)`
+        pairs, e.g. the val dataset materialized by
+        `DatasetFactory.materialize`, which is then not read from the images again."""
+        for metric in self.metrics:
+            metric.reset_state()
+        total_inference_time = 0
+        num_images = 0
+        for input_image_batch, ground_truth_batch in tqdm(
+            dataset, desc=f"Evaluating {split_name} split"
+        ):
+            ground_truth_batch = tf.image.convert_image_dtype(
+                ground_truth_batch, tf.float32
+            )
+            start_time = time()
+            model_output = self.model(input_image_batch)
+            total_inference_time += time() - start_time
+            # The metrics average over the images of every batch they are updated
+            # with, so their result is the exact mean over the dataset.
+            for metric in self.metrics:
+                metric.update_state(ground_truth_batch, model_output)
+            num_images += int(tf.shape(input_image_batch)[0])
+        metric_values = {
+            split_name + "/" + type(metric).__name__: metric.result().numpy().item()
+            for metric in self.metrics
+        }
+        metric_values[split_name + "/Inference-Time"] = (
+            total_inference_time / num_images
+        )
+        return metric_values
+
     def evaluate(self):
         log_dict = {}
 
@@ -1,5 +1,3 @@
-import os
-from glob import glob
 from typing import List, Dict, Optional, Union, Tuple
 
 import numpy as np
@@ -7,6 +5,8 @@ from PIL import Image
 import tensorflow as tf
 
 from .base import BaseEvaluator
+from ..dataloader.base.manifest import DatasetManifest
+from ..dataloader.base.storage import RemoteFileReader
 from ..utils import fetch_wandb_artifact
 
 
@@ -18,6 +18,7 @@ class LoLEvaluator(BaseEvaluator):
         input_size: Optional[List[int]] = None,
         resize_target: Optional[Tuple[int, int]] = None,
         dataset_artifact_address: str = None,
+        file_reader: Optional[RemoteFileReader] = None,
     ) -> None:
         """Evaluator for LoL Dataset.
 
@@ -27,9 +28,11 @@ class LoLEvaluator(BaseEvaluator):
             input_size (Optional[List[int]]): input size used for calculating GFLOPs.
             resize_target: (Optional[Tuple[int, int]]): resize to this size for inference.
             dataset_artifact_address (str): address of WandB artifact hosting LoL dataset.
+            file_reader (Optional[RemoteFileReader]): reader of the remote storage hosting
+                LoL dataset, used instead of `dataset_artifact_address`.
         """
         self.dataset_artifact_address = dataset_artifact_address
-        super().__init__(metrics, model, input_size, resize_target)
+        super().__init__(metrics, model, input_size, resize_target, file_reader)
 
     def preprocess(self, image: Image) -> Union[np.ndarray, tf.Tensor]:
         image = tf.keras.preprocessing.image.img_to_array(image)
@@ -45,20 +48,28 @@ class LoLEvaluator(BaseEvaluator):
         return Image.fromarray(np.uint8(image))
 
     def populate_image_paths(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        if self.file_reader is not None:
+            return {
+                "Train-Val": self.file_reader.get_image_pairs(
+                    "our485/low", "our485/high"
+                ),
+                "Eval15": self.file_reader.get_image_pairs("eval15/low", "eval15/high"),
+            }
         dataset_path = fetch_wandb_artifact(
             self.dataset_artifact_address, artifact_type="dataset"
         )
-        train_low_light_images = sorted(
-            glob(os.path.join(dataset_path, "our485", "low", "*"))
+        manifest = DatasetManifest(
+            dataset_path,
+            splits={
+                "our485": ("our485/low", "our485/high"),
+                "eval15": ("eval15/low", "eval15/high"),
+            },
         )
-        train_ground_truth_images = sorted(
-            glob(os.path.join(dataset_path, "our485", "high", "*"))
+        train_low_light_images, train_ground_truth_images = manifest.get_image_pairs(
+            "our485"
         )
-        test_low_light_images = sorted(
-            glob(os.path.join(dataset_path, "eval15", "low", "*"))
-        )
-        test_ground_truth_images = sorted(
-            glob(os.path.join(dataset_path, "eval15", "high", "*"))
+        test_low_light_images, test_ground_truth_images = manifest.get_image_pairs(
+            "eval15"
         )
         return {
             "Train-Val": (train_low_light_images, train_ground_truth_images),
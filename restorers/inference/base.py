@@ -10,6 +10,7 @@ from PIL import Image
 import tensorflow as tf
 from tqdm.auto import tqdm
 
+from ..dataloader.base.commons import resize_image
 from ..utils import fetch_wandb_artifact
 
 
@@ -19,11 +20,13 @@ class BaseInferer(ABC):
         model: Optional[tf.keras.Model] = None,
         resize_factor: Optional[int] = 1,
         model_alias: Optional[str] = None,
+        downscale_factor: int = 1,
     ) -> None:
         super().__init__()
         self.model = model
         self.resize_factor = resize_factor
         self.model_alias = model_alias
+        self.downscale_factor = downscale_factor
         self.create_wandb_table()
 
     @abstractmethod
@@ -44,12 +47,20 @@ class BaseInferer(ABC):
         self.wandb_table = wandb.Table(columns=columns)
 
     def _infer_on_single_image(self, input_path: str, output_path: str):
-        input_image = Image.open(input_path).convert("RGB")
+        input_image = Image.open(input_path)
+        width, height = input_image.size
+        if self.downscale_factor > 1:
+            width = width // self.downscale_factor
+            height = height // self.downscale_factor
         if self.resize_factor > 1:
-            width, height = input_image.size
             width = (width // self.resize_factor) * self.resize_factor
             height = (height // self.resize_factor) * self.resize_factor
-            input_image = input_image.resize((width, height))
+        if (width, height) != input_image.size:
+            # A downscaled JPEG is decoded straight at a reduced scale when possible,
+            # the other images are converted to RGB before being resized.
+            input_image = resize_image(input_image, (width, height))
+        else:
+            input_image = input_image.convert("RGB")
         preprocessed_input_image = self.preprocess(input_image)
         start_time = time()
         model_output = self.model(preprocessed_input_image)
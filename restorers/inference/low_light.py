@@ -13,8 +13,9 @@ class LowLightInferer(BaseInferer):
         model: Optional[tf.keras.Model] = None,
         resize_factor: Optional[int] = 1,
         model_alias: Optional[str] = None,
+        downscale_factor: int = 1,
     ) -> None:
-        super().__init__(model, resize_factor, model_alias)
+        super().__init__(model, resize_factor, model_alias, downscale_factor)
 
     def preprocess(self, image: Image) -> Union[np.ndarray, tf.Tensor]:
         image = tf.keras.preprocessing.image.img_to_array(image)
@@ -14,6 +14,11 @@ class CharbonnierLoss(tf.keras.losses.Loss):
     is less sensitive to outliers than the mean squared error and less computationally expensive
     than the mean absolute error.
 
+    Per-pixel sample weights of shape `(batch, height, width, 1)` are the masks of padded
+    images, e.g. those of `DatasetFactory.get_bucketed_val_dataset`. The loss is then the
+    mean over the images of the loss on the valid pixels of every image, instead of
+    Keras broadcasting the loss over the masks.
+
     Args:
         epsilon (float): a small positive constant.
     """
@@ -25,3 +30,18 @@ class CharbonnierLoss(tf.keras.losses.Loss):
     def call(self, y_true, y_pred):
         squared_difference = tf.square(y_true - y_pred)
         return tf.reduce_mean(tf.sqrt(squared_difference + tf.square(self.epsilon)))
+
+    def __call__(self, y_true, y_pred, sample_weight=None):
+        if sample_weight is not None and sample_weight.shape.rank == 4:
+            mask = tf.cast(sample_weight, y_pred.dtype)
+            charbonnier = tf.sqrt(
+                tf.square(tf.cast(y_true, y_pred.dtype) - y_pred)
+                + tf.square(tf.cast(self.epsilon, y_pred.dtype))
+            )
+            num_valid_values = tf.reduce_sum(mask, axis=[1, 2, 3]) * tf.cast(
+                tf.shape(y_pred)[-1], y_pred.dtype
+            )
+            return tf.reduce_mean(
+                tf.reduce_sum(charbonnier * mask, axis=[1, 2, 3]) / num_valid_values
+            )
+        return super().__call__(y_true, y_pred, sample_weight=sample_weight)
@@ -3,17 +3,47 @@ import tensorflow as tf
 from .utils import scale_tensor
 
 
+def apply_on_valid_regions(metric_fn, y_true, y_pred, mask) -> tf.Tensor:
+    """Applies `metric_fn` to every pair of images cropped to the valid region of its
+    mask, e.g. the images padded by `DatasetFactory.get_bucketed_val_dataset`."""
+
+    def apply_on_valid_region(inputs):
+        image_true, image_pred, image_mask = inputs
+        height = tf.cast(tf.reduce_sum(image_mask[:, 0, 0]), tf.int32)
+        width = tf.cast(tf.reduce_sum(image_mask[0, :, 0]), tf.int32)
+        return metric_fn(image_true[:height, :width], image_pred[:height, :width])
+
+    return tf.map_fn(
+        apply_on_valid_region,
+        (y_true, y_pred, tf.cast(mask, y_true.dtype)),
+        fn_output_signature=tf.float32,
+    )
+
+
 class PSNRMetric(tf.keras.metrics.Metric):
     def __init__(self, max_val: float, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.max_val = max_val
         self.psnr = tf.keras.metrics.Mean(name="psnr")
 
-    def update_state(self, y_true, y_pred, *args, **kwargs):
-        psnr = tf.image.psnr(
-            scale_tensor(y_true), scale_tensor(y_pred), max_val=self.max_val
-        )
-        self.psnr.update_state(psnr, *args, **kwargs)
+    def update_state(self, y_true, y_pred, sample_weight=None):
+        if sample_weight is not None and sample_weight.shape.rank == 4:
+            # Per-pixel weights are the masks of padded images, which are scaled
+            # one by one as when they are evaluated at full resolution.
+            psnr = apply_on_valid_regions(
+                lambda x, y: tf.image.psnr(
+                    scale_tensor(x), scale_tensor(y), max_val=self.max_val
+                ),
+                y_true,
+                y_pred,
+                sample_weight,
+            )
+            sample_weight = None
+        else:
+            psnr = tf.image.psnr(
+                scale_tensor(y_true), scale_tensor(y_pred), max_val=self.max_val
+            )
+        self.psnr.update_state(psnr, sample_weight=sample_weight)
 
     def result(self):
         return self.psnr.result()
@@ -28,11 +58,24 @@ class SSIMMetric(tf.keras.metrics.Metric):
         self.max_val = max_val
         self.ssim = tf.keras.metrics.Mean(name="ssim")
 
-    def update_state(self, y_true, y_pred, *args, **kwargs):
-        ssim = tf.image.ssim(
-            scale_tensor(y_true), scale_tensor(y_pred), max_val=self.max_val
-        )
-        self.ssim.update_state(ssim, *args, **kwargs)
+    def update_state(self, y_true, y_pred, sample_weight=None):
+        if sample_weight is not None and sample_weight.shape.rank == 4:
+            # Per-pixel weights are the masks of padded images, which are scaled
+            # one by one as when they are evaluated at full resolution.
+            ssim = apply_on_valid_regions(
+                lambda x, y: tf.image.ssim(
+                    scale_tensor(x), scale_tensor(y), max_val=self.max_val
+                ),
+                y_true,
+                y_pred,
+                sample_weight,
+            )
+            sample_weight = None
+        else:
+            ssim = tf.image.ssim(
+                scale_tensor(y_true), scale_tensor(y_pred), max_val=self.max_val
+            )
+        self.ssim.update_state(ssim, sample_weight=sample_weight)
 
     def result(self):
         return self.ssim.result()
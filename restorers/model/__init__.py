@@ -1,3 +1,4 @@
 from .mirnetv2 import MirNetv2
 from .nafnet import NAFNet
 from .zero_dce import ZeroDCE, FastZeroDce
+from .normalization import ImageNormalization
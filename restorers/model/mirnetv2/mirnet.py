@@ -1,8 +1,9 @@
-from typing import Dict
+from typing import Dict, Optional
 
 import tensorflow as tf
 
 from .mrb import MultiScaleResidualBlock
+from ..normalization import ImageNormalization, get_image_dtype, normalize_data
 
 
 class RecursiveResidualGroup(tf.keras.layers.Layer):
@@ -86,6 +87,9 @@ class MirNetv2(tf.keras.Model):
         num_mrb_blocks (int): number of multi-scale residual blocks.
         add_residual_connection (bool): add a residual connection between the inputs and the
             outputs or not.
+        bit_depth (Optional[int]): bit depth of integer input images, which are then normalized
+            by the model itself. Leave it to `None` if the images are normalized by the input
+            pipeline.
     """
 
     def __init__(
@@ -95,6 +99,7 @@ class MirNetv2(tf.keras.Model):
         num_mrb_blocks: int,
         add_residual_connection: bool,
         *args,
+        bit_depth: Optional[int] = None,
         **kwargs
     ) -> None:
         super().__init__(*args, **kwargs)
@@ -103,6 +108,11 @@ class MirNetv2(tf.keras.Model):
         self.channel_factor = channel_factor
         self.num_mrb_blocks = num_mrb_blocks
         self.add_residual_connection = add_residual_connection
+        self.bit_depth = bit_depth
+
+        self.image_normalization = (
+            ImageNormalization(bit_depth) if bit_depth is not None else None
+        )
 
         self.conv_in = tf.keras.layers.Conv2D(channels, kernel_size=3, padding="same")
 
@@ -122,6 +132,8 @@ class MirNetv2(tf.keras.Model):
         self.conv_out = tf.keras.layers.Conv2D(3, kernel_size=3, padding="same")
 
     def call(self, inputs: tf.Tensor, training=None, mask=None) -> tf.Tensor:
+        if self.image_normalization is not None:
+            inputs = self.image_normalization(inputs)
         shallow_features = self.conv_in(inputs)
         deep_features = self.rrg_block_1(shallow_features)
         deep_features = self.rrg_block_2(deep_features)
@@ -131,8 +143,16 @@ class MirNetv2(tf.keras.Model):
         output = output + inputs if self.add_residual_connection else output
         return output
 
+    def train_step(self, data):
+        return super().train_step(normalize_data(data, self.image_normalization))
+
+    def test_step(self, data):
+        return super().test_step(normalize_data(data, self.image_normalization))
+
     def save(self, filepath: str, *args, **kwargs) -> None:
-        input_tensor = tf.keras.Input(shape=[None, None, 3])
+        input_tensor = tf.keras.Input(
+            shape=[None, None, 3], dtype=get_image_dtype(self.bit_depth)
+        )
         saved_model = tf.keras.Model(
             inputs=input_tensor, outputs=self.call(input_tensor)
         )
@@ -144,4 +164,5 @@ class MirNetv2(tf.keras.Model):
             "num_mrb_blocks": self.num_mrb_blocks,
             "channel_factor": self.channel_factor,
             "add_residual_connection": self.add_residual_connection,
+            "bit_depth": self.bit_depth,
         }
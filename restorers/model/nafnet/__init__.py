@@ -1,2 +1,8 @@
 from .nafnet import NAFNet, PixelShuffle, UpScale
-from .nafblock import NAFBlock, SimpleGate, SimplifiedChannelAttention, ChannelAttention
+from .nafblock import (
+    NAFBlock,
+    SimpleGate,
+    SimplifiedChannelAttention,
+    ChannelAttention,
+    PointwiseDepthwiseConv,
+)
@@ -0,0 +1,181 @@
+"""
+Latency benchmark of NAFNet before and after `NAFNet.fuse_for_inference`, e.g.
+
+```
+python -m restorers.model.nafnet.benchmark --image_shape 256 256 --output nafnet.json
+```
+"""
+
+import json
+import time
+import argparse
+import platform
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+from absl import logging
+
+from .nafnet import NAFNet
+from ...dataloader.benchmark import get_commit
+
+
+def time_model(
+    model: tf.keras.Model,
+    inputs: tf.Tensor,
+    num_iterations: int,
+    num_warmup_iterations: int = 2,
+) -> float:
+    """
+    Times the inference of a model traced as a `tf.function`, after warming it up so
+    that the tracing is not timed.
+
+    Args:
+        model (`tf.keras.Model`): The model.
+        inputs (`tf.Tensor`): A batch of input images.
+        num_iterations (`int`): Number of inferences timed.
+        num_warmup_iterations (`int`): Number of inferences run before the timing.
+
+    Returns:
+        The median latency of an inference in milliseconds.
+    """
+    model_fn = tf.function(model)
+    for _ in range(num_warmup_iterations):
+        model_fn(inputs).numpy()
+    latencies = []
+    for _ in range(num_iterations):
+        start_time = time.perf_counter()
+        model_fn(inputs).numpy()
+        latencies.append(1000 * (time.perf_counter() - start_time))
+    return float(np.median(latencies))
+
+
+def benchmark_fused_nafnet(
+    block_type: str = "nafblock",
+    filters: int = 16,
+    batch_size: int = 1,
+    image_shape: Tuple[int, int] = (256, 256),
+    num_iterations: int = 20,
+    seed: int = 0,
+) -> Dict:
+    """
+    Benchmarks a NAFNet with random weights against its fused versions.
+
+    Args:
+        block_type (`str`): The block type of the NAFNet.
+        filters (`int`): The starting filter size of the NAFNet.
+        batch_size (`int`): Number of images in a single batch.
+        image_shape (`Tuple[int, int]`): The height and width of the images.
+        num_iterations (`int`): Number of inferences timed.
+        seed (`int`): Seed of the random weights and images.
+
+    Returns:
+        The latency in milliseconds of the unfused model, of the fused model and of the
+        model fused without its depthwise convolutions, with the maximum difference of the
+        outputs of every model from the unfused one, relative to the largest output.
+    """
+    tf.random.set_seed(seed)
+    inputs = tf.random.uniform((batch_size, *image_shape, 3))
+    random_state = np.random.RandomState(seed)
+    models = [NAFNet(filters=filters, block_type=block_type) for _ in range(3)]
+    for model in models:
+        model(inputs)
+    # Perturb the weights, so that the folded scales and shifts are not identities.
+    weights = [
+        weight + random_state.normal(0.0, 0.1, weight.shape).astype(weight.dtype)
+        for weight in models[0].get_weights()
+    ]
+    for model in models:
+        model.set_weights(weights)
+    models[1].fuse_for_inference()
+    models[2].fuse_for_inference(fuse_depthwise=False)
+
+    outputs = [model(inputs).numpy() for model in models]
+    results = {}
+    for name, model, output in zip(
+        ["unfused", "fused", "fused_without_depthwise"], models, outputs
+    ):
+        results[name] = {
+            "latency_ms": time_model(model, inputs, num_iterations),
+            "max_relative_error": float(
+                np.abs(output - outputs[0]).max() / np.abs(outputs[0]).max()
+            ),
+        }
+    return results
+
+
+def run_benchmarks(
+    block_types: Sequence[str],
+    filters: int = 16,
+    batch_size: int = 1,
+    image_shape: Tuple[int, int] = (256, 256),
+    num_iterations: int = 20,
+) -> Dict:
+    """
+    Benchmarks the fused NAFNets of several block types.
+
+    Args:
+        block_types (`Sequence[str]`): The block types, among `"plain"`, `"baseline"`
+            and `"nafblock"`.
+        filters (`int`): The starting filter size of the NAFNets.
+        batch_size (`int`): Number of images in a single batch.
+        image_shape (`Tuple[int, int]`): The height and width of the images.
+        num_iterations (`int`): Number of inferences timed.
+
+    Returns:
+        The results of every block type, along with the configuration and the
+        environment of the benchmark.
+    """
+    results = {}
+    for block_type in block_types:
+        results[block_type] = benchmark_fused_nafnet(
+            block_type, filters, batch_size, image_shape, num_iterations
+        )
+        logging.info(f"{block_type}: {results[block_type]}")
+    return {
+        "commit": get_commit(),
+        "environment": {
+            "tensorflow_version": tf.__version__,
+            "python_version": platform.python_version(),
+            "devices": [device.name for device in tf.config.list_logical_devices()],
+        },
+        "config": dict(
+            filters=filters,
+            batch_size=batch_size,
+            image_shape=list(image_shape),
+            num_iterations=num_iterations,
+        ),
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the latency of NAFNet fused for inference."
+    )
+    parser.add_argument(
+        "--block_types",
+        nargs="+",
+        default=["nafblock"],
+        choices=["plain", "baseline", "nafblock"],
+    )
+    parser.add_argument("--filters", type=int, default=16)
+    parser.add_argument("--batch_size", type=int, default=1)
+    parser.add_argument("--image_shape", type=int, nargs=2, default=[256, 256])
+    parser.add_argument("--num_iterations", type=int, default=20)
+    parser.add_argument("--output", default="nafnet_fusion_benchmark.json")
+    args = parser.parse_args(argv)
+    report = run_benchmarks(
+        args.block_types,
+        filters=args.filters,
+        batch_size=args.batch_size,
+        image_shape=tuple(args.image_shape),
+        num_iterations=args.num_iterations,
+    )
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from tensorflow import keras
 
 from .nafblock import NAFBlock
 from .nafblock import PLAIN, BASELINE, NAFBLOCK
+from ..normalization import ImageNormalization, get_image_dtype, normalize_data
 
 
 class PixelShuffle(keras.layers.Layer):
@@ -106,6 +107,8 @@ class NAFNet(keras.models.Model):
             Each tuple entry denotes the number of NAFBlocks in the corresponding decoder block.
             len(decoder_block_nums) should be the same as the len(encoder_block_nums)
         block_type: (str) denotes what block to use in NAFNet
+        bit_depth: (Optional[int]) bit depth of integer input images, which are then normalized
+            by the model itself. Leave it to None if the images are normalized by the input pipeline.
     """
 
     def __init__(
@@ -115,6 +118,7 @@ class NAFNet(keras.models.Model):
         encoder_block_nums: Optional[Tuple[int]] = (1, 1, 1, 1),
         decoder_block_nums: Optional[Tuple[int]] = (1, 1, 1, 1),
         block_type: Optional[str] = NAFBLOCK,
+        bit_depth: Optional[int] = None,
         **kwargs,
     ) -> None:
         super().__init__(**kwargs)
@@ -124,6 +128,11 @@ class NAFNet(keras.models.Model):
         self.encoder_block_nums = encoder_block_nums
         self.decoder_block_nums = decoder_block_nums
         self.block_type = block_type
+        self.bit_depth = bit_depth
+
+        self.image_normalization = (
+            ImageNormalization(bit_depth) if bit_depth is not None else None
+        )
 
         self.intro = keras.layers.Conv2D(filters=filters, kernel_size=3, padding="same")
 
@@ -229,7 +238,10 @@ class NAFNet(keras.models.Model):
         return channels
 
     def call(self, inputs: tf.Tensor, *args, **kwargs) -> tf.Tensor:
-        _, H, W, _ = inputs.shape
+        if self.image_normalization is not None:
+            inputs = self.image_normalization(inputs)
+
+        H, W = tf.shape(inputs)[1], tf.shape(inputs)[2]
 
         # Scale the image to the next nearest multiple of self.expected_image_scale
         inputs = self.fix_input_shape(inputs)
@@ -267,22 +279,47 @@ class NAFNet(keras.models.Model):
         Hence the image is padded to match that shape
         """
 
-        _, H, W, _ = inputs.shape
+        H, W = tf.shape(inputs)[1], tf.shape(inputs)[2]
 
-        # Calculating how much padding is required
-        height_padding, width_padding = 0, 0
-        if H % self.expected_image_scale != 0:
-            height_padding = self.expected_image_scale - H % self.expected_image_scale
-        if W % self.expected_image_scale != 0:
-            width_padding = self.expected_image_scale - W % self.expected_image_scale
+        # Calculating how much padding is required, the shape may only be known
+        # at runtime, e.g. for batches of varying resolutions
+        height_padding = -H % self.expected_image_scale
+        width_padding = -W % self.expected_image_scale
 
-        paddings = tf.constant(
-            [[0, 0], [0, height_padding], [0, width_padding], [0, 0]]
-        )
+        paddings = [[0, 0], [0, height_padding], [0, width_padding], [0, 0]]
         return tf.pad(inputs, paddings)
 
+    def fuse_for_inference(self, fuse_depthwise: Optional[bool] = True) -> "NAFNet":
+        """
+        Reparameterizes every NAFBlock of the built model into an equivalent block with
+        fewer ops, see `NAFBlock.fuse_for_inference`. The fused model produces the same
+        outputs up to float rounding, but should no longer be trained.
+        Parameters:
+            fuse_depthwise: (bool) fuses the 1x1 and the depthwise convolutions of
+                every block into a single dense 3x3 convolution, which is what makes
+                the fused model faster on CPU.
+        """
+        if not self.built:
+            raise ValueError("The model must be built before being fused.")
+        for blocks in self.encoders + [self.middle_blocks] + self.decoders:
+            for block in blocks.layers:
+                if isinstance(block, NAFBlock):
+                    block.fuse_for_inference(fuse_depthwise)
+        # The functions traced by `predict` and `evaluate` still run the unfused ops.
+        self.predict_function = None
+        self.test_function = None
+        return self
+
+    def train_step(self, data):
+        return super().train_step(normalize_data(data, self.image_normalization))
+
+    def test_step(self, data):
+        return super().test_step(normalize_data(data, self.image_normalization))
+
     def save(self, filepath: str, *args, **kwargs) -> None:
-        input_tensor = tf.keras.Input(shape=[None, None, 3])
+        input_tensor = tf.keras.Input(
+            shape=[None, None, 3], dtype=get_image_dtype(self.bit_depth)
+        )
         saved_model = tf.keras.Model(
             inputs=input_tensor, outputs=self.call(input_tensor)
         )
@@ -298,6 +335,7 @@ class NAFNet(keras.models.Model):
                 "encoder_block_nums": self.encoder_block_nums,
                 "decoder_block_nums": self.decoder_block_nums,
                 "block_type": self.block_type,
+                "bit_depth": self.bit_depth,
             }
         )
         return config
@@ -0,0 +1,46 @@
+from typing import Dict, Optional
+
+import tensorflow as tf
+
+
+def get_image_dtype(bit_depth: Optional[int]) -> tf.dtypes.DType:
+    """Returns the dtype of the images fed to a model normalizing images of `bit_depth`."""
+    if bit_depth is None:
+        return tf.float32
+    return tf.uint8 if bit_depth <= 8 else tf.uint16
+
+
+class ImageNormalization(tf.keras.layers.Layer):
+    """Casts integer images to `float32` and scales them to `[0, 1]`.
+
+    Placing this layer at the input of a model lets the input pipeline keep the images
+    in their integer dtype, which moves 4x less bytes on the host than `float32`, and
+    makes the normalization part of the saved model. Floating point images are assumed
+    to be normalized already and are passed through unchanged.
+
+    Args:
+        bit_depth (int): bit depth of the integer images.
+    """
+
+    def __init__(self, bit_depth: int, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.bit_depth = bit_depth
+        self.normalization_factor = (2**bit_depth) - 1
+
+    def call(self, inputs: tf.Tensor, *args, **kwargs) -> tf.Tensor:
+        if inputs.dtype.is_floating:
+            return inputs
+        return tf.cast(inputs, dtype=tf.float32) / self.normalization_factor
+
+    def get_config(self) -> Dict:
+        config = super().get_config()
+        config.update({"bit_depth": self.bit_depth})
+        return config
+
+
+def normalize_data(data, image_normalization: Optional[ImageNormalization]):
+    """Normalizes all the images of a batch, e.g. the `(inputs, targets)` tuple
+    passed to `tf.keras.Model.train_step`."""
+    if image_normalization is None:
+        return data
+    return tf.nest.map_structure(image_normalization, data)
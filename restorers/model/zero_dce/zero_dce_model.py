@@ -1,4 +1,4 @@
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 import tensorflow as tf
 
@@ -10,6 +10,7 @@ from restorers.losses.zero_reference import (
 )
 
 from .dce_layer import DeepCurveEstimationLayer, FastDeepCurveEstimationLayer
+from ..normalization import ImageNormalization, get_image_dtype, normalize_data
 
 
 class ZeroDCE(tf.keras.Model):
@@ -39,6 +40,9 @@ class ZeroDCE(tf.keras.Model):
         num_iterations (int): number of iterations of enhancement.
         decoder_channel_factor (int): factor by which number filters in the decoder of deep curve
             estimation layer is multiplied.
+        bit_depth (Optional[int]): bit depth of integer input images, which are then normalized
+            by the model itself. Leave it to `None` if the images are normalized by the input
+            pipeline.
     """
 
     def __init__(
@@ -47,6 +51,7 @@ class ZeroDCE(tf.keras.Model):
         num_iterations: int,
         decoder_channel_factor: int,
         *args,
+        bit_depth: Optional[int] = None,
         **kwargs
     ) -> None:
         super().__init__(*args, **kwargs)
@@ -54,6 +59,11 @@ class ZeroDCE(tf.keras.Model):
         self.num_intermediate_filters = num_intermediate_filters
         self.num_iterations = num_iterations
         self.decoder_channel_factor = decoder_channel_factor
+        self.bit_depth = bit_depth
+
+        self.image_normalization = (
+            ImageNormalization(bit_depth) if bit_depth is not None else None
+        )
 
         self.deep_curve_estimation = DeepCurveEstimationLayer(
             num_intermediate_filters=self.num_intermediate_filters,
@@ -105,6 +115,7 @@ class ZeroDCE(tf.keras.Model):
         return enhanced_image
 
     def call(self, data: tf.Tensor, training=None, mask=None) -> Tuple[tf.Tensor]:
+        data = normalize_data(data, self.image_normalization)
         dce_net_output = self.deep_curve_estimation(data)
         return self.get_enhanced_image(data, dce_net_output)
 
@@ -133,6 +144,7 @@ class ZeroDCE(tf.keras.Model):
         }
 
     def train_step(self, data: tf.Tensor) -> Dict[str, tf.Tensor]:
+        data = normalize_data(data, self.image_normalization)
         with tf.GradientTape() as tape:
             output = self.deep_curve_estimation(data)
             losses = self.compute_losses(data, output)
@@ -141,6 +153,7 @@ class ZeroDCE(tf.keras.Model):
         return losses
 
     def test_step(self, data: tf.Tensor) -> Dict[str, tf.Tensor]:
+        data = normalize_data(data, self.image_normalization)
         output = self.deep_curve_estimation(data)
         return self.compute_losses(data, output)
 
@@ -149,10 +162,13 @@ class ZeroDCE(tf.keras.Model):
             "num_intermediate_filters": self.num_intermediate_filters,
             "num_iterations": self.num_iterations,
             "decoder_channel_factor": self.decoder_channel_factor,
+            "bit_depth": self.bit_depth,
         }
 
     def save(self, filepath: str, *args, **kwargs) -> None:
-        input_tensor = tf.keras.Input(shape=[None, None, 3])
+        input_tensor = tf.keras.Input(
+            shape=[None, None, 3], dtype=get_image_dtype(self.bit_depth)
+        )
         saved_model = tf.keras.Model(
             inputs=input_tensor, outputs=self.call(input_tensor)
         )
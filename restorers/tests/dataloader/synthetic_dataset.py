@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from restorers.dataloader import LOLDataLoader, UnsupervisedLOLDataLoader
+
+
+def create_synthetic_lol_dataset(
+    dataset_path: str,
+    num_train_images: int = 10,
+    num_test_images: int = 2,
+    image_shape=(64, 96),
+    extension: str = "png",
+) -> str:
+    """Creates a tiny LoL-style directory tree with random images."""
+    random_state = np.random.RandomState(42)
+    for split, num_images in [
+        ("our485", num_train_images),
+        ("eval15", num_test_images),
+    ]:
+        for subdirectory in ["low", "high"]:
+            os.makedirs(os.path.join(dataset_path, split, subdirectory), exist_ok=True)
+        for idx in range(num_images):
+            for subdirectory in ["low", "high"]:
+                image = random_state.randint(
+                    0, 256, size=(*image_shape, 3), dtype=np.uint8
+                )
+                Image.fromarray(image).save(
+                    os.path.join(
+                        dataset_path, split, subdirectory, f"{idx + 1}.{extension}"
+                    )
+                )
+    return dataset_path
+
+
+class LocalLOLDataLoader(LOLDataLoader):
+    """`LOLDataLoader` reading a dataset from a local directory instead of wandb."""
+
+    def __init__(self, dataset_path: str, *args, **kwargs):
+        self.dataset_path = dataset_path
+        super().__init__(*args, **kwargs)
+
+    def fetch_dataset(self, val_split, visualize_on_wandb: bool):
+        self.define_dataset_structure(
+            dataset_path=self.dataset_path, val_split=val_split
+        )
+
+
+class LocalUnsupervisedLOLDataLoader(UnsupervisedLOLDataLoader):
+    """`UnsupervisedLOLDataLoader` reading a dataset from a local directory instead of
+    wandb."""
+
+    def __init__(self, dataset_path: str, *args, **kwargs):
+        self.dataset_path = dataset_path
+        super().__init__(*args, **kwargs)
+
+    def fetch_dataset(self, val_split, visualize_on_wandb: bool):
+        self.define_dataset_structure(
+            dataset_path=self.dataset_path, val_split=val_split
+        )
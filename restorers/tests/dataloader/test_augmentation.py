@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.dataloader.base.commons import (
+    random_batched_augmentation,
+    random_paired_batched_augmentation,
+)
+
+
+class BatchedAugmentationTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.images = tf.random.uniform((16, 8, 8, 3), seed=0)
+        self.seed = tf.constant([1, 2], dtype=tf.int64)
+
+    def test_paired_augmentation(self) -> None:
+        low_images, enhanced_images = random_paired_batched_augmentation(
+            self.images, self.images, self.seed, photometric_jitter=0.2
+        )
+        self.assertEqual(low_images.shape, self.images.shape)
+        np.testing.assert_allclose(low_images.numpy(), enhanced_images.numpy())
+
+    def test_per_sample_transforms(self) -> None:
+        images = tf.tile(self.images[:1], [16, 1, 1, 1])
+        augmented_images = random_batched_augmentation(images, self.seed).numpy()
+        unique_images = {image.tobytes() for image in augmented_images}
+        self.assertGreater(len(unique_images), 1)
+        # Without jitter, the augmentations only permute the pixels.
+        np.testing.assert_allclose(
+            np.sort(augmented_images[0].ravel()), np.sort(images[0].numpy().ravel())
+        )
+
+    def test_stateless(self) -> None:
+        np.testing.assert_allclose(
+            random_batched_augmentation(self.images, self.seed).numpy(),
+            random_batched_augmentation(self.images, self.seed).numpy(),
+        )
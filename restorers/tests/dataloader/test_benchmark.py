@@ -0,0 +1,44 @@
+import os
+import json
+import tempfile
+import unittest
+
+from restorers.dataloader.benchmark import main
+
+
+class InputPipelineBenchmarkTester(unittest.TestCase):
+    def test_benchmark_report(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "benchmark.json")
+            main(
+                [
+                    "--data_loaders",
+                    "lol",
+                    "unsupervised_lol",
+                    "--dataset_dir",
+                    temp_dir,
+                    "--image_size",
+                    "32",
+                    "--batch_size",
+                    "2",
+                    "--num_batches",
+                    "2",
+                    "--num_images",
+                    "8",
+                    "--image_shape",
+                    "48",
+                    "64",
+                    "--output",
+                    output_path,
+                ]
+            )
+            with open(output_path) as output_file:
+                report = json.load(output_file)
+        self.assertEqual(set(report["results"]), {"lol", "unsupervised_lol"})
+        for results in report["results"].values():
+            self.assertGreater(results["samples_per_second"], 0)
+            self.assertGreaterEqual(results["cpu_utilization"], 0)
+            self.assertEqual(
+                list(results["stage_latency_ms"]),
+                ["read", "decode", "crop", "batch", "augment"],
+            )
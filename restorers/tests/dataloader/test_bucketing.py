@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from restorers.losses import CharbonnierLoss
+from restorers.metrics import PSNRMetric, SSIMMetric
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class BucketedValidationTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol"), image_shape=(50, 70)
+        )
+        # A validation pair at another resolution, hence in another bucket.
+        for subdirectory in ["low", "high"]:
+            Image.fromarray(
+                np.random.RandomState(0).randint(0, 256, (40, 40, 3), dtype=np.uint8)
+            ).save(os.path.join(dataset_path, "our485", subdirectory, "99.png"))
+        self.data_loader = LocalLOLDataLoader(
+            dataset_path=dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_bucketed_val_dataset(self) -> None:
+        self.assertEqual(len(self.data_loader.val_input_images), 3)
+        val_dataset = self.data_loader.get_bucketed_val_dataset(
+            batch_size=4, bucket_size=32
+        )
+        shapes = {}
+        for input_images, enhanced_images, masks in val_dataset:
+            shape = tuple(input_images.shape[1:3])
+            shapes[shape] = shapes.get(shape, 0) + input_images.shape[0]
+            self.assertEqual(masks.shape[1:3], shape)
+            self.assertEqual(enhanced_images.shape, input_images.shape)
+            # The padding is outside of the mask.
+            np.testing.assert_allclose(input_images * (1.0 - masks), 0.0)
+        self.assertEqual(shapes, {(64, 96): 2, (64, 64): 1})
+
+    def test_masked_metrics(self) -> None:
+        val_dataset = self.data_loader.get_bucketed_val_dataset(
+            batch_size=4, bucket_size=32
+        )
+        input_images, enhanced_images, masks = next(iter(val_dataset))
+        for metric in [PSNRMetric(max_val=1.0), SSIMMetric(max_val=1.0)]:
+            metric.update_state(enhanced_images, input_images, sample_weight=masks)
+            expected_metric = type(metric)(max_val=1.0)
+            for idx in range(input_images.shape[0]):
+                height = int(tf.reduce_sum(masks[idx, :, 0, 0]))
+                width = int(tf.reduce_sum(masks[idx, 0, :, 0]))
+                expected_metric.update_state(
+                    enhanced_images[idx : idx + 1, :height, :width],
+                    input_images[idx : idx + 1, :height, :width],
+                )
+            np.testing.assert_allclose(
+                metric.result(), expected_metric.result(), rtol=1e-5
+            )
+
+    def test_masked_loss(self) -> None:
+        val_dataset = self.data_loader.get_bucketed_val_dataset(
+            batch_size=2, bucket_size=32
+        )
+        # A per-pixel model, whose outputs do not depend on the padding.
+        model = tf.keras.Sequential(
+            [tf.keras.layers.Conv2D(3, kernel_size=1, input_shape=(None, None, 3))]
+        )
+        model.compile(
+            loss=CharbonnierLoss(epsilon=1e-3, reduction=tf.keras.losses.Reduction.SUM),
+            metrics=[PSNRMetric(max_val=1.0)],
+        )
+        loss = model.evaluate(val_dataset, verbose=0)[0]
+        expected_losses = []
+        for input_images, enhanced_images, masks in val_dataset.unbatch():
+            height = int(tf.reduce_sum(masks[:, 0, 0]))
+            width = int(tf.reduce_sum(masks[0, :, 0]))
+            expected_losses.append(
+                CharbonnierLoss(epsilon=1e-3)(
+                    enhanced_images[None, :height, :width],
+                    model(input_images[None, :height, :width]),
+                )
+            )
+        np.testing.assert_allclose(loss, np.mean(expected_losses), rtol=1e-5)
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+import tensorflow as tf
+
+from restorers.dataloader import ProgressiveResizing
+from restorers.dataloader.curriculum import parse_curriculum_stages
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class ProgressiveResizingTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_loader = LocalLOLDataLoader(
+            dataset_path=create_synthetic_lol_dataset(
+                os.path.join(self.temp_dir.name, "lol")
+            ),
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+        self.curriculum = ProgressiveResizing(
+            self.data_loader, stages=[(2, 32, 2), (0, 16, 4)]
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_schedule(self) -> None:
+        self.assertEqual(
+            self.curriculum.get_stage_bounds(epochs=3), [(0, 2, 16, 4), (2, 3, 32, 2)]
+        )
+        self.assertEqual(self.curriculum.get_stage_bounds(epochs=1), [(0, 1, 16, 4)])
+        # 8 training images in batches of 4 for 2 epochs, then of 2 for 1 epoch.
+        self.assertEqual(self.curriculum.get_total_steps(epochs=3), 2 * 2 + 4)
+        self.data_loader.patches_per_image = 2
+        self.assertEqual(self.curriculum.get_total_steps(epochs=3), 2 * 4 + 8)
+        with self.assertRaises(ValueError):
+            ProgressiveResizing(self.data_loader, stages=[(1, 16, 4)])
+
+    def test_parse_stages(self) -> None:
+        self.assertEqual(
+            parse_curriculum_stages("0:128:16, 30:192:8"), [(0, 128, 16), (30, 192, 8)]
+        )
+        curriculum = ProgressiveResizing(self.data_loader, stages="2:32:2,0:16:4")
+        self.assertEqual(
+            curriculum.get_stage_bounds(epochs=3), [(0, 2, 16, 4), (2, 3, 32, 2)]
+        )
+        with self.assertRaises(ValueError):
+            parse_curriculum_stages("0:128")
+
+    def test_train_datasets(self) -> None:
+        x, y = next(iter(self.curriculum.get_train_dataset(epoch=1)))
+        self.assertEqual(x.shape, (4, 16, 16, 3))
+        self.assertEqual(y.shape, (4, 16, 16, 3))
+        x, _ = next(iter(self.curriculum.get_train_dataset(epoch=2)))
+        self.assertEqual(x.shape, (2, 32, 32, 3))
+        self.assertEqual(self.data_loader.image_size, 32)
+
+    def test_fit(self) -> None:
+        model = tf.keras.Sequential(
+            [tf.keras.layers.Conv2D(3, 3, padding="same", input_shape=(None, None, 3))]
+        )
+        model.compile(optimizer="sgd", loss="mse")
+        _, val_dataset = self.data_loader.get_datasets(batch_size=2)
+        history = self.curriculum.fit(
+            model, epochs=3, validation_data=val_dataset, verbose=0
+        )
+        self.assertEqual(len(history["loss"]), 3)
+        self.assertEqual(len(history["val_loss"]), 3)
+        self.assertEqual(
+            int(model.optimizer.iterations), self.curriculum.get_total_steps(epochs=3)
+        )
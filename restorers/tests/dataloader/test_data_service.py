@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from restorers.dataloader import LocalDataService
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class DataServiceTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_data_loader(self, data_service_address=None) -> LocalLOLDataLoader:
+        return LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            data_service_address=data_service_address,
+        )
+
+    def test_local_data_service(self) -> None:
+        _, expected_val_dataset = self.get_data_loader().get_datasets(batch_size=1)
+        expected_val_images = sorted(
+            image.tobytes() for x, _ in expected_val_dataset for image in x.numpy()
+        )
+        with LocalDataService(num_workers=2) as data_service:
+            data_loader = self.get_data_loader(data_service.address)
+            train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+            # Every training image is still visited once per epoch.
+            self.assertEqual(len(list(train_dataset)), 4)
+            x, y = next(iter(train_dataset))
+            self.assertEqual(x.shape, (2, 32, 32, 3))
+            # The validation images are the same, up to their order.
+            val_images = sorted(
+                image.tobytes() for x, _ in val_dataset for image in x.numpy()
+            )
+            self.assertEqual(val_images, expected_val_images)
+
+    def test_python_readers_are_rejected(self) -> None:
+        for reader_kwargs in [{"read_from_zip": True}, {"file_reader": mock.Mock()}]:
+            with self.assertRaises(ValueError):
+                LocalLOLDataLoader(
+                    dataset_path=self.dataset_path,
+                    image_size=32,
+                    bit_depth=8,
+                    val_split=0.2,
+                    visualize_on_wandb=False,
+                    data_service_address="grpc://localhost:5000",
+                    **reader_kwargs,
+                )
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class DecodedImageCacheTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_data_loader(self, cache_decoded_images: bool, bit_depth: int = 8):
+        return LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=bit_depth,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            cache_decoded_images=cache_decoded_images,
+            cache_dir=self.cache_dir,
+        )
+
+    def test_cache(self) -> None:
+        data_loader = self.get_data_loader(cache_decoded_images=True)
+        cached_train_dataset, cached_val_dataset = data_loader.get_datasets(
+            batch_size=1
+        )
+        for _ in range(2):
+            for x, y in cached_train_dataset:
+                self.assertEqual(x.shape, (1, 32, 32, 3))
+        cache_path = data_loader.get_cache_path(
+            data_loader.train_input_images, data_loader.train_enhanced_images
+        )
+        self.assertTrue(os.path.exists(cache_path + ".index"))
+
+        # The fingerprint only changes when the files or the bit depth change.
+        self.assertEqual(
+            cache_path,
+            self.get_data_loader(cache_decoded_images=True).get_cache_path(
+                data_loader.train_input_images, data_loader.train_enhanced_images
+            ),
+        )
+        self.assertNotEqual(
+            cache_path,
+            self.get_data_loader(True, bit_depth=16).get_cache_path(
+                data_loader.train_input_images, data_loader.train_enhanced_images
+            ),
+        )
+
+        _, val_dataset = self.get_data_loader(False).get_datasets(batch_size=1)
+        for (x, y), (x_cached, y_cached) in zip(val_dataset, cached_val_dataset):
+            np.testing.assert_allclose(x.numpy(), x_cached.numpy())
+            np.testing.assert_allclose(y.numpy(), y_cached.numpy())
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class DeferredNormalizationTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_val_batch(self, defer_normalization: bool):
+        data_loader = LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            photometric_jitter=0.2,
+            defer_normalization=defer_normalization,
+        )
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        x, y = next(iter(train_dataset))
+        self.assertEqual(x.dtype, tf.uint8 if defer_normalization else tf.float32)
+        self.assertEqual(y.dtype, x.dtype)
+        return next(iter(val_dataset))
+
+    def test_uint8_datasets(self) -> None:
+        x, y = self.get_val_batch(defer_normalization=True)
+        normalized_x, normalized_y = self.get_val_batch(defer_normalization=False)
+        self.assertEqual(x.dtype, tf.uint8)
+        # Resizing is rounded back to uint8, hence the half step tolerance.
+        np.testing.assert_allclose(
+            x.numpy() / 255.0, normalized_x.numpy(), atol=0.5 / 255.0 + 1e-6
+        )
+        np.testing.assert_allclose(
+            y.numpy() / 255.0, normalized_y.numpy(), atol=0.5 / 255.0 + 1e-6
+        )
+
+    def test_high_bit_depth(self) -> None:
+        # The images are decoded to uint8, which cannot be normalized as 16-bit images.
+        with self.assertRaises(ValueError):
+            LocalLOLDataLoader(
+                dataset_path=self.dataset_path,
+                image_size=32,
+                bit_depth=16,
+                val_split=0.2,
+                visualize_on_wandb=False,
+                defer_normalization=True,
+            )
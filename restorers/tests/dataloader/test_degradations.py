@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from restorers.dataloader import RandomDegradation, SyntheticDegradationDataLoader
+from restorers.dataloader.base.degradations import (
+    batched_depthwise_blur,
+    random_blur,
+    random_downsampling,
+    random_exposure,
+    random_poisson_gaussian_noise,
+)
+
+
+class DegradationsTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.images = tf.random.stateless_uniform([4, 24, 32, 3], seed=[0, 1])
+        self.seed = tf.constant([4, 2], dtype=tf.int64)
+
+    def test_batched_depthwise_blur(self) -> None:
+        kernels = tf.random.stateless_uniform([4, 5, 5], seed=[1, 2])
+        blurred_images = batched_depthwise_blur(self.images, kernels)
+        self.assertEqual(blurred_images.shape, self.images.shape)
+        # Every image is convolved with its own kernel.
+        for idx in range(4):
+            padded_image = tf.pad(
+                self.images[idx : idx + 1], [[0, 0], [2, 2], [2, 2], [0, 0]], "REFLECT"
+            )
+            expected_image = tf.nn.depthwise_conv2d(
+                padded_image,
+                tf.tile(kernels[idx][:, :, None, None], [1, 1, 3, 1]),
+                strides=[1, 1, 1, 1],
+                padding="VALID",
+            )
+            np.testing.assert_allclose(
+                blurred_images[idx].numpy(), expected_image[0].numpy(), atol=1e-5
+            )
+        # A blur kernel keeps a constant image constant, borders included.
+        constant_images = tf.fill([4, 24, 32, 3], 0.5)
+        np.testing.assert_allclose(
+            random_blur(constant_images, self.seed, kernel_size=7).numpy(),
+            constant_images.numpy(),
+            atol=1e-5,
+        )
+
+    def test_degradations(self) -> None:
+        darkened_images = random_exposure(
+            self.images, self.seed, gamma_range=(2.0, 3.0), exposure_range=(0.2, 0.5)
+        )
+        self.assertLess(
+            float(tf.reduce_mean(darkened_images)),
+            0.5 * float(tf.reduce_mean(self.images)),
+        )
+        noisy_images = random_poisson_gaussian_noise(
+            self.images, self.seed, shot_noise_range=(0.01, 0.02)
+        )
+        self.assertGreater(float(tf.reduce_mean(tf.abs(noisy_images - self.images))), 0)
+        self.assertLessEqual(float(tf.reduce_max(noisy_images)), 1.0)
+        downsampled_images = random_downsampling(self.images, self.seed, (2, 4))
+        self.assertEqual(downsampled_images.shape, self.images.shape)
+
+        degradation = RandomDegradation(
+            gamma_range=(1.5, 2.0),
+            shot_noise_range=(0.0, 0.01),
+            blur_kernel_size=5,
+            scale_factors=(2,),
+        )
+        degraded_images = tf.function(degradation)(self.images, self.seed)
+        self.assertEqual(degraded_images.shape, self.images.shape)
+        np.testing.assert_array_equal(
+            degraded_images.numpy(), degradation(self.images, self.seed).numpy()
+        )
+
+
+class SyntheticDegradationDataLoaderTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        random_state = np.random.RandomState(0)
+        for idx in range(10):
+            Image.fromarray(
+                random_state.randint(0, 256, size=(40, 48, 3), dtype=np.uint8)
+            ).save(os.path.join(self.temp_dir.name, f"{idx}.png"))
+        self.degradation = RandomDegradation(
+            gamma_range=(1.5, 2.5), read_noise_range=(0.01, 0.05)
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_datasets(self) -> None:
+        data_loader = SyntheticDegradationDataLoader(
+            image_size=16,
+            bit_depth=8,
+            val_split=0.2,
+            dataset_path=self.temp_dir.name,
+            degradation=self.degradation,
+        )
+        self.assertEqual(len(data_loader.train_input_images), 8)
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        self.assertEqual(sum(1 for _ in train_dataset), 4)
+        x, y = next(iter(train_dataset))
+        self.assertEqual(x.shape, (2, 16, 16, 3))
+        self.assertEqual(y.shape, (2, 16, 16, 3))
+        self.assertLess(float(tf.reduce_mean(x)), float(tf.reduce_mean(y)))
+        # The val images are degraded identically on every epoch.
+        (x1, y1), (x2, y2) = next(iter(val_dataset)), next(iter(val_dataset))
+        np.testing.assert_array_equal(x1.numpy(), x2.numpy())
+        np.testing.assert_array_equal(y1.numpy(), y2.numpy())
+
+    def test_deferred_normalization(self) -> None:
+        data_loader = SyntheticDegradationDataLoader(
+            image_size=16,
+            bit_depth=8,
+            val_split=0.2,
+            dataset_path=self.temp_dir.name,
+            degradation=self.degradation,
+            defer_normalization=True,
+        )
+        x, y = next(iter(data_loader.get_datasets(batch_size=2)[0]))
+        self.assertEqual(x.dtype, tf.uint8)
+        self.assertEqual(y.dtype, tf.uint8)
+
+    def test_clean_images_cached_once(self) -> None:
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        data_loader = SyntheticDegradationDataLoader(
+            image_size=16,
+            bit_depth=8,
+            val_split=0.2,
+            dataset_path=self.temp_dir.name,
+            degradation=self.degradation,
+            cache_decoded_images=True,
+            cache_dir=cache_dir,
+        )
+        train_dataset, _ = data_loader.get_datasets(batch_size=2)
+        for x, y in train_dataset:
+            self.assertEqual(x.shape, (2, 16, 16, 3))
+            self.assertEqual(y.shape, (2, 16, 16, 3))
+        cache_size = sum(
+            os.path.getsize(os.path.join(cache_dir, filename))
+            for filename in os.listdir(cache_dir)
+        )
+        # The cache holds a single copy of every decoded clean image.
+        decoded_size = 8 * 40 * 48 * 3
+        self.assertGreater(cache_size, decoded_size)
+        self.assertLess(cache_size, 1.5 * decoded_size)
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import tensorflow as tf
+
+from restorers.dataloader import ProgressiveResizing
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+# Split the CPU into 2 virtual devices to test the per-replica datasets, this has to
+# happen before the runtime is initialized by any other test.
+try:
+    tf.config.set_logical_device_configuration(
+        tf.config.list_physical_devices("CPU")[0],
+        [tf.config.LogicalDeviceConfiguration()] * 2,
+    )
+except RuntimeError:
+    pass
+
+
+class DistributedDatasetTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_loader = LocalLOLDataLoader(
+            dataset_path=create_synthetic_lol_dataset(
+                os.path.join(self.temp_dir.name, "lol"), num_train_images=16
+            ),
+            image_size=32,
+            bit_depth=8,
+            val_split=0.25,
+            visualize_on_wandb=False,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_sharded_input_pipelines(self) -> None:
+        num_train_batches = []
+        for input_pipeline_id in range(2):
+            input_context = tf.distribute.InputContext(
+                num_input_pipelines=2,
+                input_pipeline_id=input_pipeline_id,
+                num_replicas_in_sync=4,
+            )
+            train_dataset, _ = self.data_loader.get_datasets(
+                batch_size=8, input_context=input_context
+            )
+            batches = list(train_dataset)
+            num_train_batches.append(len(batches))
+            # 2 replicas per input pipeline, so the per-replica batch size is 8 / 4.
+            self.assertEqual(batches[0][0].shape, (2, 32, 32, 3))
+        # Each pipeline reads half of the 12 training images.
+        self.assertEqual(num_train_batches, [3, 3])
+
+    def test_distribute_datasets_from_function(self) -> None:
+        devices = tf.config.list_logical_devices("CPU")
+        if len(devices) < 2:
+            self.skipTest("The CPU could not be split into virtual devices.")
+        strategy = tf.distribute.MirroredStrategy([device.name for device in devices])
+        train_dataset, val_dataset = self.data_loader.get_distributed_datasets(
+            strategy, batch_size=4
+        )
+        x, y = next(iter(train_dataset))
+        per_replica_x = strategy.experimental_local_results(x)
+        self.assertEqual(len(per_replica_x), 2)
+        self.assertEqual(per_replica_x[0].shape, (2, 32, 32, 3))
+        x, _ = next(iter(val_dataset))
+        self.assertEqual(strategy.experimental_local_results(x)[0].shape[0], 2)
+
+    def test_curriculum_without_distributed_datasets(self) -> None:
+        devices = tf.config.list_logical_devices("CPU")
+        if len(devices) < 2:
+            self.skipTest("The CPU could not be split into virtual devices.")
+        strategy = tf.distribute.MirroredStrategy([device.name for device in devices])
+        curriculum = ProgressiveResizing(
+            self.data_loader,
+            stages=[(0, 16, 2)],
+            strategy=strategy,
+            distribute_datasets=False,
+        )
+        # The stages are per replica, Keras splits the global batches of 2 x 2 images.
+        x, _ = next(iter(curriculum.get_train_dataset(epoch=0)))
+        self.assertIsInstance(x, tf.Tensor)
+        self.assertEqual(x.shape, (4, 16, 16, 3))
+        # 12 training images in global batches of 4.
+        self.assertEqual(curriculum.get_total_steps(epochs=2), 2 * 3)
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class JPEGCropTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_size = 32
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_data_loader(self, extension: str) -> LocalLOLDataLoader:
+        dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, extension), extension=extension
+        )
+        # Identical pairs make it easy to check that both crops share the window.
+        shutil.rmtree(os.path.join(dataset_path, "our485", "high"))
+        shutil.copytree(
+            os.path.join(dataset_path, "our485", "low"),
+            os.path.join(dataset_path, "our485", "high"),
+        )
+        return LocalLOLDataLoader(
+            dataset_path=dataset_path,
+            image_size=self.image_size,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+
+    def test_decode_and_random_crop(self) -> None:
+        for extension in ["jpg", "png"]:
+            data_loader = self.get_data_loader(extension)
+            image_bytes = tf.io.read_file(data_loader.train_input_images[0])
+            full_image = tf.io.decode_image(image_bytes, channels=3).numpy()
+            x, y = data_loader.decode_and_random_crop(image_bytes, image_bytes)
+            self.assertEqual(x.shape, (self.image_size, self.image_size, 3))
+            np.testing.assert_array_equal(x.numpy(), y.numpy())
+            # The crop has to be a window of the fully decoded image, up to the
+            # chroma upsampling on the borders of partially decoded JPEGs.
+            windows = np.lib.stride_tricks.sliding_window_view(
+                full_image.astype(np.float32),
+                (self.image_size, self.image_size, 3),
+            )
+            errors = np.mean(np.abs(windows - x.numpy()), axis=(-3, -2, -1))
+            self.assertLess(np.min(errors), 1.0 if extension == "jpg" else 1e-6)
+
+    def test_train_dataset(self) -> None:
+        train_dataset, _ = self.get_data_loader("jpg").get_datasets(batch_size=2)
+        x, y = next(iter(train_dataset))
+        self.assertEqual(x.shape, (2, self.image_size, self.image_size, 3))
+        np.testing.assert_allclose(x.numpy(), y.numpy())
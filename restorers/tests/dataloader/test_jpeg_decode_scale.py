@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import unittest
+from typing import Union
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from restorers.dataloader.base.commons import (
+    decode_image,
+    decode_image_for_size,
+    resize_image,
+)
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+def encode_image(image: Union[np.ndarray, Image.Image], image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class JPEGDecodeScaleTester(unittest.TestCase):
+    def setUp(self) -> None:
+        # A smooth image, whose reduced scale decodes match the resized images.
+        gradient = np.linspace(0, 255, 384, dtype=np.float32)
+        self.image = np.broadcast_to(gradient[None, :, None], (256, 384, 3)).astype(
+            np.uint8
+        )
+
+    def test_decode_ratio(self) -> None:
+        jpeg_bytes = tf.constant(encode_image(self.image, "JPEG"))
+        for target_size, expected_shape in [
+            (64, (64, 96, 3)),
+            (100, (128, 192, 3)),
+            ((32, 150), (128, 192, 3)),
+            (200, (256, 384, 3)),
+            (512, (256, 384, 3)),
+        ]:
+            image = decode_image_for_size(jpeg_bytes, target_size)
+            self.assertEqual(tuple(image.shape), expected_shape)
+
+        full_image = tf.image.resize(decode_image(jpeg_bytes), (64, 96), "area")
+        reduced_image = tf.cast(decode_image_for_size(jpeg_bytes, 64), tf.float32)
+        self.assertLess(np.abs(full_image - reduced_image).mean(), 4.0)
+
+    def test_decode_png_at_full_scale(self) -> None:
+        png_bytes = tf.constant(encode_image(self.image, "PNG"))
+        image = decode_image_for_size(png_bytes, 64)
+        np.testing.assert_array_equal(image.numpy(), self.image)
+
+    def test_resize_image(self) -> None:
+        image = Image.open(io.BytesIO(encode_image(self.image, "JPEG")))
+        resized_image = resize_image(image, (48, 32))
+        self.assertEqual(resized_image.size, (48, 32))
+        # The draft mode decoded the JPEG at 1/8 scale, which covers the size.
+        self.assertEqual(image.size, (48, 32))
+
+    def test_resize_palette_image(self) -> None:
+        # Black and white columns, which are blended when resized as an RGB image.
+        stripes = np.zeros((32, 64), dtype=np.uint8)
+        stripes[:, 1::2] = 1
+        palette_image = Image.fromarray(stripes, mode="P")
+        palette_image.putpalette([0, 0, 0, 255, 255, 255])
+        image = Image.open(io.BytesIO(encode_image(palette_image, "PNG")))
+        self.assertEqual(image.mode, "P")
+        resized_image = resize_image(image, (32, 16))
+        self.assertEqual(resized_image.mode, "RGB")
+        resized_image = np.asarray(resized_image)
+        self.assertTrue(np.all((resized_image > 0) & (resized_image < 255)))
+
+    def test_val_dataset(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dataset_path = create_synthetic_lol_dataset(
+                os.path.join(temp_dir, "lol"), extension="jpg"
+            )
+            data_loader = LocalLOLDataLoader(
+                dataset_path=dataset_path,
+                image_size=16,
+                bit_depth=8,
+                val_split=0.2,
+                visualize_on_wandb=False,
+            )
+            _, val_dataset = data_loader.get_datasets(batch_size=2)
+            input_images, enhanced_images = next(iter(val_dataset))
+        self.assertEqual(input_images.shape, (2, 16, 16, 3))
+        self.assertEqual(enhanced_images.shape, (2, 16, 16, 3))
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from restorers.dataloader.base import manifest as manifest_lib
+from restorers.dataloader.base.manifest import DatasetManifest
+from restorers.tests.dataloader.synthetic_dataset import create_synthetic_lol_dataset
+
+
+class DatasetManifestTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol"), num_train_images=12
+        )
+        self.splits = {
+            "our485": ("our485/low", "our485/high"),
+            "eval15": ("eval15/low", "eval15/high"),
+        }
+        self.manifest_dir = os.path.join(self.temp_dir.name, "manifests")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_manifest(self) -> DatasetManifest:
+        with mock.patch.object(
+            manifest_lib,
+            "create_image_record",
+            wraps=manifest_lib.create_image_record,
+        ) as create_image_record:
+            manifest = DatasetManifest(
+                self.dataset_path,
+                self.splits,
+                manifest_dir=self.manifest_dir,
+                num_workers=4,
+            )
+        self.num_hashed_images = create_image_record.call_count
+        return manifest
+
+    def test_manifest(self) -> None:
+        manifest = self.get_manifest()
+        self.assertEqual(self.num_hashed_images, 28)
+        # The manifest is not written in the dataset directory.
+        self.assertTrue(os.path.isfile(manifest.manifest_path))
+        self.assertEqual(os.path.dirname(manifest.manifest_path), self.manifest_dir)
+        self.assertEqual(sorted(os.listdir(self.dataset_path)), ["eval15", "our485"])
+        input_images, target_images = manifest.get_image_pairs("our485")
+        self.assertEqual(len(input_images), 12)
+        for input_image, target_image in zip(input_images, target_images):
+            self.assertEqual(
+                os.path.basename(input_image), os.path.basename(target_image)
+            )
+        input_record, _ = manifest.get_image_records("eval15")[0]
+        self.assertEqual((input_record["width"], input_record["height"]), (96, 64))
+        self.assertEqual(
+            input_record["size"],
+            os.path.getsize(manifest.get_image_pairs("eval15")[0][0]),
+        )
+
+        # A valid manifest is loaded without reading any image.
+        self.assertEqual(self.get_manifest().manifest, manifest.manifest)
+        self.assertEqual(self.num_hashed_images, 0)
+
+    def test_incremental_update(self) -> None:
+        self.get_manifest()
+        # Pairs are matched by filename, an unpaired image is skipped.
+        os.remove(os.path.join(self.dataset_path, "our485", "high", "3.png"))
+        manifest = self.get_manifest()
+        self.assertEqual(self.num_hashed_images, 0)
+        input_images, target_images = manifest.get_image_pairs("our485")
+        self.assertEqual(len(input_images), 11)
+        self.assertNotIn(
+            os.path.join(self.dataset_path, "our485", "low", "3.png"), input_images
+        )
+        self.assertEqual(
+            [os.path.basename(path) for path in input_images],
+            [os.path.basename(path) for path in target_images],
+        )
+
+    def test_failed_write(self) -> None:
+        # A file in place of the manifest directory makes the write fail.
+        open(self.manifest_dir, "w").close()
+        with self.assertRaises(OSError):
+            self.get_manifest()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.dataloader.base.commons import get_dataset_size
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class MaterializedValDatasetTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.kwargs = dict(
+            dataset_path=self.dataset_path,
+            image_size=16,
+            bit_depth=8,
+            val_split=0.4,
+            visualize_on_wandb=False,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def check_materialized(self, data_loader: LocalLOLDataLoader) -> None:
+        _, expected_val_dataset = LocalLOLDataLoader(**self.kwargs).get_datasets(
+            batch_size=2
+        )
+        expected_batches = [(x.numpy(), y.numpy()) for x, y in expected_val_dataset]
+        _, val_dataset = data_loader.get_datasets(batch_size=2)
+        batches = [(x.numpy(), y.numpy()) for x, y in val_dataset]
+        # Once materialized, the val dataset is not read from the images anymore.
+        shutil.rmtree(self.dataset_path)
+        for _ in range(2):
+            batches_again = [(x.numpy(), y.numpy()) for x, y in val_dataset]
+            self.assertEqual(len(batches_again), len(expected_batches))
+            for (x, y), (x_again, y_again), (expected_x, expected_y) in zip(
+                batches, batches_again, expected_batches
+            ):
+                np.testing.assert_array_equal(x, expected_x)
+                np.testing.assert_array_equal(y, expected_y)
+                np.testing.assert_array_equal(x_again, expected_x)
+                np.testing.assert_array_equal(y_again, expected_y)
+
+    def test_in_memory(self) -> None:
+        self.check_materialized(
+            LocalLOLDataLoader(**self.kwargs, materialize_val_dataset=True)
+        )
+
+    def test_on_disk(self) -> None:
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        data_loader = LocalLOLDataLoader(
+            **self.kwargs,
+            cache_dir=cache_dir,
+            materialize_val_dataset=True,
+            max_val_memory_bytes=0,
+        )
+        self.check_materialized(data_loader)
+        self.assertTrue(
+            any(name.startswith("materialized-") for name in os.listdir(cache_dir))
+        )
+
+    def test_dataset_size(self) -> None:
+        dataset = tf.data.Dataset.from_tensor_slices(
+            (np.zeros((6, 4, 4, 3), np.uint8), np.zeros((6, 4, 4, 3), np.float32))
+        ).batch(2, drop_remainder=True)
+        self.assertEqual(get_dataset_size(dataset), 6 * 4 * 4 * 3 * (1 + 4))
+        self.assertIsNone(get_dataset_size(dataset.batch(2)))
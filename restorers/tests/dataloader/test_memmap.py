@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from restorers.dataloader import MemoryMappedDataLoader
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class MemoryMappedDataLoaderTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.image_size = 32
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_export_and_read(self) -> None:
+        data_loader = LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=self.image_size,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+        memory_map_dir = os.path.join(self.temp_dir.name, "memmap")
+        data_loader.export_to_memory_map(memory_map_dir)
+        memmap_loader = MemoryMappedDataLoader(
+            image_size=self.image_size, bit_depth=8, memory_map_dir=memory_map_dir
+        )
+        self.assertEqual(len(memmap_loader), len(data_loader))
+        self.assertEqual(len(memmap_loader.train_input_images), 8)
+
+        _, val_dataset = data_loader.get_datasets(batch_size=1)
+        _, memmap_val_dataset = memmap_loader.get_datasets(batch_size=1)
+        for (x, y), (x_memmap, y_memmap) in zip(val_dataset, memmap_val_dataset):
+            np.testing.assert_allclose(x.numpy(), x_memmap.numpy(), atol=1e-6)
+            np.testing.assert_allclose(y.numpy(), y_memmap.numpy(), atol=1e-6)
+
+        train_dataset, _ = memmap_loader.get_datasets(batch_size=2)
+        self.assertEqual(sum(1 for _ in train_dataset), 4)
+        x, y = next(iter(train_dataset))
+        self.assertEqual(x.shape, (2, self.image_size, self.image_size, 3))
+        self.assertEqual(y.shape, (2, self.image_size, self.image_size, 3))
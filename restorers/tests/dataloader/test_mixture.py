@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+import wandb
+from PIL import Image
+
+from restorers.dataloader import (
+    ImageFolderDataLoader,
+    LocalDataService,
+    MixtureDataLoader,
+    PipelineOptions,
+    ProgressiveResizing,
+)
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+def create_constant_image_folder(dataset_path: str, num_images: int = 10) -> str:
+    """Creates a folder dataset whose images are all white."""
+    for subdirectory in ["low", "high"]:
+        os.makedirs(os.path.join(dataset_path, subdirectory), exist_ok=True)
+        for idx in range(num_images):
+            Image.fromarray(np.full((48, 48, 3), 255, dtype=np.uint8)).save(
+                os.path.join(dataset_path, subdirectory, f"image_{idx}.png")
+            )
+    return dataset_path
+
+
+class MixtureDataLoaderTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        kwargs = dict(
+            image_size=16, bit_depth=8, val_split=0.2, visualize_on_wandb=False
+        )
+        self.lol_data_loader = LocalLOLDataLoader(
+            create_synthetic_lol_dataset(os.path.join(self.temp_dir.name, "lol")),
+            **kwargs,
+        )
+        self.folder_data_loader = ImageFolderDataLoader(
+            create_constant_image_folder(os.path.join(self.temp_dir.name, "folder")),
+            **kwargs,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_image_folder(self) -> None:
+        self.assertEqual(len(self.folder_data_loader.train_input_images), 8)
+        self.assertEqual(len(self.folder_data_loader.val_input_images), 2)
+        self.assertTrue(
+            self.folder_data_loader.train_enhanced_images[0].endswith(
+                os.path.join("high", "image_0.png")
+            )
+        )
+
+    def test_datasets(self) -> None:
+        data_loader = MixtureDataLoader(
+            [self.lol_data_loader, self.folder_data_loader], seed=0
+        )
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        batches = [x.numpy() for x, _ in train_dataset]
+        self.assertEqual(len(batches), 8)
+        self.assertEqual(batches[0].shape, (2, 16, 16, 3))
+        images = np.concatenate(batches)
+        num_white_images = np.sum(np.all(images == 1.0, axis=(1, 2, 3)))
+        self.assertGreater(num_white_images, 0)
+        self.assertLess(num_white_images, len(images))
+        self.assertEqual(sum(1 for _ in val_dataset), 2)
+
+    def test_image_ids(self) -> None:
+        self.folder_data_loader.table = wandb.Table(
+            columns=["Image-ID", "Split", "Low-Light-Image", "Ground-Truth-Image"]
+        )
+        self.folder_data_loader._create_data_table(
+            self.folder_data_loader.val_input_images,
+            self.folder_data_loader.val_enhanced_images,
+            split="Validation",
+        )
+        image_ids = [row[0] for row in self.folder_data_loader.table.data]
+        self.assertEqual(image_ids, ["image_8", "image_9"])
+
+    def test_steps_per_epoch(self) -> None:
+        self.lol_data_loader.patches_per_image = 2
+        data_loader = MixtureDataLoader(
+            [self.lol_data_loader, self.folder_data_loader], seed=0
+        )
+        train_dataset, _ = data_loader.get_datasets(batch_size=4)
+        self.assertEqual(data_loader.get_steps_per_epoch(batch_size=4), 6)
+        self.assertEqual(len(list(train_dataset)), 6)
+        data_loader.weights = [1.0, 0.0]
+        self.assertEqual(data_loader.get_steps_per_epoch(batch_size=4), 4)
+
+    def test_curriculum(self) -> None:
+        data_loader = MixtureDataLoader(
+            [self.lol_data_loader, self.folder_data_loader], seed=0
+        )
+        curriculum = ProgressiveResizing(data_loader, stages=[(0, 8, 4)])
+        x, _ = next(iter(curriculum.get_train_dataset(epoch=0)))
+        self.assertEqual(x.shape, (4, 8, 8, 3))
+        self.assertEqual(curriculum.get_steps_per_epoch(epoch=0), 4)
+        # The crop size of every source is restored after the stage is built.
+        self.assertEqual(self.lol_data_loader.image_size, 16)
+        self.assertEqual(self.folder_data_loader.image_size, 16)
+
+    def test_distributed_datasets(self) -> None:
+        data_loader = MixtureDataLoader(
+            [self.lol_data_loader, self.folder_data_loader], seed=0
+        )
+        train_dataset, val_dataset = data_loader.get_distributed_datasets(
+            tf.distribute.get_strategy(), batch_size=2
+        )
+        self.assertEqual(sum(1 for _ in train_dataset), 8)
+        self.assertEqual(sum(1 for _ in val_dataset), 2)
+
+    def test_pipeline_options(self) -> None:
+        self.folder_data_loader.pipeline_options = PipelineOptions(
+            private_threadpool_size=2
+        )
+        data_loader = MixtureDataLoader(
+            [self.lol_data_loader, self.folder_data_loader], seed=0
+        )
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        for dataset in [train_dataset, val_dataset]:
+            self.assertEqual(dataset.options().threading.private_threadpool_size, 2)
+
+    def test_data_service(self) -> None:
+        with LocalDataService(num_workers=1) as data_service:
+            self.folder_data_loader.data_service_address = data_service.address
+            data_loader = MixtureDataLoader(
+                [self.lol_data_loader, self.folder_data_loader], seed=0
+            )
+            train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+            self.assertEqual(len(list(train_dataset)), 8)
+            self.assertEqual(len(list(val_dataset)), 2)
+
+    def test_weights(self) -> None:
+        data_loader = MixtureDataLoader(
+            [self.lol_data_loader, self.folder_data_loader], weights=[0.0, 1.0]
+        )
+        train_dataset, _ = data_loader.get_datasets(batch_size=2)
+        # The epoch only draws from the sources with a non-zero weight.
+        images = np.concatenate([x.numpy() for x, _ in train_dataset])
+        self.assertEqual(len(images), 8)
+        np.testing.assert_array_equal(images, np.ones_like(images))
+
+    def test_mismatched_image_size(self) -> None:
+        self.lol_data_loader.image_size = 32
+        with self.assertRaises(ValueError):
+            MixtureDataLoader([self.lol_data_loader, self.folder_data_loader])
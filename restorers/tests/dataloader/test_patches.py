@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class MultiPatchSamplingTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_patches_per_image(self) -> None:
+        data_loader = LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=16,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            patches_per_image=4,
+        )
+        image = tf.ones((64, 96, 3))
+        x, y = data_loader.random_crop_patches(image, image)
+        self.assertEqual(x.shape, (4, 16, 16, 3))
+        self.assertEqual(y.shape, (4, 16, 16, 3))
+
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        num_batches = sum(1 for _ in train_dataset)
+        self.assertEqual(num_batches, len(data_loader.train_input_images) * 4 // 2)
+        self.assertEqual(sum(1 for _ in val_dataset), 1)
+        x, y = next(iter(train_dataset))
+        self.assertEqual(x.shape, (2, 16, 16, 3))
+        self.assertLessEqual(np.max(x.numpy()), 1.0)
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.dataloader import PipelineOptions
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    LocalUnsupervisedLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class PipelineOptionsTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.pipeline_options = PipelineOptions(
+            private_threadpool_size=2,
+            max_intra_op_parallelism=1,
+            autotune_ram_budget=2**28,
+            deterministic=False,
+            shuffle_buffer_size=8,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def assert_options(self, dataset: tf.data.Dataset) -> None:
+        options = dataset.options()
+        self.assertEqual(options.threading.private_threadpool_size, 2)
+        self.assertEqual(options.threading.max_intra_op_parallelism, 1)
+        self.assertEqual(options.autotune.ram_budget, 2**28)
+        self.assertFalse(options.deterministic)
+
+    def test_default_options(self) -> None:
+        dataset = tf.data.Dataset.range(8)
+        self.assertIs(PipelineOptions().shuffle(dataset), dataset)
+        options = PipelineOptions().apply(dataset).options()
+        self.assertIsNone(options.threading.private_threadpool_size)
+        self.assertIsNone(options.deterministic)
+
+    def test_shuffle(self) -> None:
+        dataset = PipelineOptions(
+            shuffle_buffer_size=64, reshuffle_each_iteration=False
+        ).shuffle(tf.data.Dataset.range(64))
+        first_epoch = [int(x) for x in dataset]
+        self.assertEqual(sorted(first_epoch), list(range(64)))
+        self.assertNotEqual(first_epoch, list(range(64)))
+        self.assertEqual([int(x) for x in dataset], first_epoch)
+
+    def test_data_loader_options(self) -> None:
+        data_loader = LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            pipeline_options=self.pipeline_options,
+        )
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        self.assert_options(train_dataset)
+        self.assert_options(val_dataset)
+        self.assertEqual(sum(1 for _ in train_dataset), 4)
+
+    def test_unsupervised_data_loader_options(self) -> None:
+        data_loader = LocalUnsupervisedLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            pipeline_options=self.pipeline_options,
+        )
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        self.assert_options(train_dataset)
+        self.assert_options(val_dataset)
+        images = next(iter(train_dataset))
+        self.assertEqual(images.shape, (2, 32, 32, 3))
+        self.assertTrue(np.all(np.isfinite(images.numpy())))
+
+    def test_shuffle_cached_images(self) -> None:
+        # Square images cropped at their size, so that an image is identified by its
+        # pixels.
+        dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "square"), image_shape=(32, 32)
+        )
+        data_loader = LocalLOLDataLoader(
+            dataset_path=dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            cache_decoded_images=True,
+            cache_dir=os.path.join(self.temp_dir.name, "cache"),
+            pipeline_options=PipelineOptions(shuffle_buffer_size=8),
+        )
+        dataset = data_loader.build_element_dataset(
+            data_loader.train_input_images,
+            data_loader.train_enhanced_images,
+            batch_size=1,
+            apply_crop=True,
+        )
+        epoch_orders = [
+            tuple(x.numpy().tobytes() for x, _ in dataset) for _ in range(3)
+        ]
+        self.assertEqual(len(set(epoch_orders[0])), 8)
+        # The cache is written on the first epoch, and must not replay its order.
+        self.assertGreater(len(set(epoch_orders)), 1)
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from restorers.dataloader import SharedMemoryDataset
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class SharedMemoryDatasetTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.shared_memory_dir = os.path.join(self.temp_dir.name, "shm")
+        os.makedirs(self.shared_memory_dir)
+        self.data_loader = LocalLOLDataLoader(
+            dataset_path=dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_decode_once_and_refcount(self) -> None:
+        first = SharedMemoryDataset(self.data_loader, self.shared_memory_dir)
+        second = SharedMemoryDataset(self.data_loader, self.shared_memory_dir)
+        with mock.patch.object(
+            self.data_loader,
+            "export_to_memory_map",
+            wraps=self.data_loader.export_to_memory_map,
+        ) as export_to_memory_map:
+            memory_map_dir = first.acquire()
+            self.assertEqual(second.acquire(), memory_map_dir)
+        self.assertEqual(export_to_memory_map.call_count, 1)
+
+        memmap_loader = second.get_data_loader()
+        self.assertEqual(len(memmap_loader.train_input_images), 8)
+        _, val_dataset = self.data_loader.get_datasets(batch_size=1)
+        _, memmap_val_dataset = memmap_loader.get_datasets(batch_size=1)
+        for (x, _), (x_memmap, _) in zip(val_dataset, memmap_val_dataset):
+            np.testing.assert_allclose(x.numpy(), x_memmap.numpy(), atol=1e-6)
+
+        first.release()
+        self.assertTrue(os.path.isdir(memory_map_dir))
+        second.release()
+        self.assertFalse(os.path.exists(memory_map_dir))
+
+    def test_dead_leases_are_dropped(self) -> None:
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        with SharedMemoryDataset(
+            self.data_loader, self.shared_memory_dir
+        ) as shared_dataset:
+            dead_lease = os.path.join(shared_dataset.lease_dir, f"{process.pid}.dead")
+            open(dead_lease, "w").close()
+        self.assertFalse(os.path.exists(shared_dataset.memory_map_dir))
+
+    def test_keep_alive(self) -> None:
+        with SharedMemoryDataset(
+            self.data_loader, self.shared_memory_dir, keep_alive=True
+        ) as shared_dataset:
+            pass
+        self.assertTrue(os.path.isdir(shared_dataset.memory_map_dir))
+
+    def test_data_loader_options(self) -> None:
+        self.data_loader.patches_per_image = 2
+        with SharedMemoryDataset(
+            self.data_loader, self.shared_memory_dir
+        ) as shared_dataset:
+            memmap_loader = shared_dataset.get_data_loader()
+            self.assertEqual(memmap_loader.patches_per_image, 2)
+            self.assertEqual(
+                shared_dataset.get_data_loader(patches_per_image=1).patches_per_image, 1
+            )
+            self.data_loader.data_service_address = "grpc://localhost:5000"
+            with self.assertRaises(ValueError):
+                shared_dataset.get_data_loader()
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from restorers.dataloader import (
+    HTTPStorage,
+    LocalStorage,
+    LOLDataLoader,
+    PipelineOptions,
+    RemoteFileReader,
+)
+from restorers.dataloader.base.manifest import MANIFEST_FILE, DatasetManifest
+from restorers.evaluation import LoLEvaluator
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+class CountingStorage(LocalStorage):
+    """`LocalStorage` counting the files read from it."""
+
+    def __init__(self, root: str) -> None:
+        super().__init__(root)
+        self.num_reads = 0
+
+    def read(self, path: str) -> bytes:
+        self.num_reads += 1
+        return super().read(path)
+
+
+class RemoteFileReaderTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_read_ahead_and_cache(self) -> None:
+        storage = CountingStorage(self.dataset_path)
+        reader = RemoteFileReader(
+            storage, cache_dir=os.path.join(self.temp_dir.name, "cache"), read_ahead=4
+        )
+        paths = storage.list_directory("our485/low")
+        reader.schedule(paths)
+        self.assertEqual(reader.read(paths[0]), storage.read(paths[0]))
+        self.assertEqual(list(reader.pending), paths[1:5])
+        for path in paths[1:]:
+            self.assertEqual(reader.read(path), storage.read(path))
+        reader.close()
+
+        # The next epoch is read from the disk cache, even by a new reader.
+        storage.num_reads = 0
+        reader = RemoteFileReader(
+            storage, cache_dir=os.path.join(self.temp_dir.name, "cache"), read_ahead=4
+        )
+        reader.schedule(paths)
+        for path in paths:
+            reader.read(path)
+        reader.close()
+        self.assertEqual(storage.num_reads, 0)
+
+    def test_read_ahead_in_shuffled_order(self) -> None:
+        storage = LocalStorage(self.dataset_path)
+        reader = RemoteFileReader(storage, read_ahead=4)
+        paths = storage.list_directory("our485/low")
+        dataset = reader.create_path_dataset(paths, shuffle=True, seed=0)
+        epoch_orders = []
+        for _ in range(2):
+            order = [path.decode() for path in dataset.as_numpy_iterator()]
+            # The read-ahead follows the order the paths were produced in.
+            reader.read(order[0])
+            self.assertEqual(list(reader.pending), order[1:5])
+            for path in order[1:]:
+                reader.read(path)
+            self.assertEqual(sorted(order), paths)
+            epoch_orders.append(order)
+        self.assertNotEqual(epoch_orders[0], epoch_orders[1])
+        reader.close()
+
+    def test_paired_path_dataset(self) -> None:
+        storage = LocalStorage(self.dataset_path)
+        reader = RemoteFileReader(storage)
+        input_paths = storage.list_directory("our485/low")
+        enhanced_paths = storage.list_directory("our485/high")
+        dataset = reader.create_path_dataset(
+            input_paths, enhanced_paths, shuffle=True, reshuffle_each_iteration=False
+        )
+        pairs = [(x.decode(), y.decode()) for x, y in dataset.as_numpy_iterator()]
+        self.assertEqual(sorted(pairs), list(zip(input_paths, enhanced_paths)))
+        self.assertEqual(
+            [(x.decode(), y.decode()) for x, y in dataset.as_numpy_iterator()], pairs
+        )
+        reader.close()
+
+    def test_shuffled_data_loader(self) -> None:
+        reader = RemoteFileReader(LocalStorage(self.dataset_path), read_ahead=4)
+        data_loader = LOLDataLoader(
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            file_reader=reader,
+            pipeline_options=PipelineOptions(shuffle_buffer_size=4),
+        )
+        train_dataset, _ = data_loader.get_datasets(batch_size=2)
+        for _ in range(2):
+            self.assertEqual(len(list(train_dataset)), 4)
+        reader.close()
+
+    def test_eviction(self) -> None:
+        storage = LocalStorage(self.dataset_path)
+        paths = storage.list_directory("our485/high")
+        file_size = len(storage.read(paths[0]))
+        reader = RemoteFileReader(
+            storage, max_cache_size=3 * file_size, read_ahead=1, num_workers=1
+        )
+        for path in paths:
+            reader.read(path)
+        reader.close()
+        self.assertLessEqual(reader.cache_size, 3 * file_size)
+        self.assertLessEqual(len(os.listdir(reader.cache_dir)), 4)
+
+    def test_http_storage(self) -> None:
+        # HTTP has no directory listing, the images are listed from the manifest.
+        DatasetManifest(
+            self.dataset_path,
+            splits={
+                "our485": ("our485/low", "our485/high"),
+                "eval15": ("eval15/low", "eval15/high"),
+            },
+            manifest_path=os.path.join(self.dataset_path, MANIFEST_FILE),
+        )
+        server = ThreadingHTTPServer(
+            ("localhost", 0),
+            partial(QuietHTTPRequestHandler, directory=self.dataset_path),
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            storage = HTTPStorage(f"http://localhost:{server.server_address[1]}")
+            kwargs = dict(
+                image_size=32, bit_depth=8, val_split=0.2, visualize_on_wandb=False
+            )
+            data_loader = LOLDataLoader(
+                **kwargs, file_reader=RemoteFileReader(storage, read_ahead=4)
+            )
+            expected_data_loader = LocalLOLDataLoader(self.dataset_path, **kwargs)
+            self.assertEqual(len(data_loader.train_input_images), 8)
+            self.assertEqual(data_loader.train_input_images[0], "our485/low/1.png")
+            _, val_dataset = data_loader.get_datasets(batch_size=2)
+            _, expected_val_dataset = expected_data_loader.get_datasets(batch_size=2)
+            for (x, y), (expected_x, expected_y) in zip(
+                val_dataset, expected_val_dataset
+            ):
+                np.testing.assert_array_equal(x.numpy(), expected_x.numpy())
+                np.testing.assert_array_equal(y.numpy(), expected_y.numpy())
+            train_dataset, _ = data_loader.get_datasets(batch_size=2)
+            self.assertEqual(sum(1 for _ in train_dataset), 4)
+
+            evaluator = LoLEvaluator(metrics=[], file_reader=RemoteFileReader(storage))
+            self.assertEqual(len(evaluator.image_paths["Train-Val"][0]), 10)
+            self.assertEqual(evaluator.open_image("eval15/high/2.png").size, (96, 64))
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from restorers.dataloader import TFRecordDataLoader
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class TFRecordDataLoaderTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.image_size = 32
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_export_and_read(self) -> None:
+        data_loader = LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=self.image_size,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+        tfrecord_dir = os.path.join(self.temp_dir.name, "tfrecords")
+        data_loader.export_to_tfrecords(
+            tfrecord_dir, num_shards=3, compression_type="GZIP"
+        )
+        tfrecord_loader = TFRecordDataLoader(
+            image_size=self.image_size, bit_depth=8, tfrecord_dir=tfrecord_dir
+        )
+        self.assertEqual(len(tfrecord_loader), len(data_loader))
+        self.assertEqual(len(tfrecord_loader.train_input_images), 3)
+        self.assertEqual(len(tfrecord_loader.val_input_images), 2)
+        # The steps count the exported examples, not the shards.
+        self.assertEqual(
+            tfrecord_loader.get_steps_per_epoch(batch_size=2),
+            data_loader.get_steps_per_epoch(batch_size=2),
+        )
+        tfrecord_loader.patches_per_image = 2
+        self.assertEqual(
+            tfrecord_loader.get_steps_per_epoch(batch_size=2),
+            len(data_loader.train_input_images),
+        )
+        tfrecord_loader.patches_per_image = 1
+
+        _, val_dataset = data_loader.get_datasets(batch_size=1)
+        _, tfrecord_val_dataset = tfrecord_loader.get_datasets(batch_size=1)
+        for (x, y), (x_record, y_record) in zip(val_dataset, tfrecord_val_dataset):
+            np.testing.assert_allclose(x.numpy(), x_record.numpy())
+            np.testing.assert_allclose(y.numpy(), y_record.numpy())
+
+        train_dataset, _ = tfrecord_loader.get_datasets(batch_size=2)
+        x, y = next(iter(train_dataset))
+        self.assertEqual(x.shape, (2, self.image_size, self.image_size, 3))
+        self.assertEqual(y.shape, (2, self.image_size, self.image_size, 3))
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from restorers.dataloader import UnsupervisedLOLDataLoader
+from restorers.dataloader.base.commons import DATASET_INFO_FILE
+from restorers.dataloader.base.storage import LocalStorage, RemoteFileReader
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    LocalUnsupervisedLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class UnpairedStreamingTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol")
+        )
+        self.image_directory = os.path.join(self.temp_dir.name, "unlabeled")
+        os.makedirs(self.image_directory)
+        random_state = np.random.RandomState(0)
+        for idx in range(6):
+            Image.fromarray(
+                random_state.randint(0, 256, size=(48, 80, 3), dtype=np.uint8)
+            ).save(os.path.join(self.image_directory, f"{idx}.jpg"))
+        self.shard_directory = os.path.join(self.temp_dir.name, "shards")
+        LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        ).export_to_tfrecords(self.shard_directory, num_shards=2)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_stream_all_sources(self) -> None:
+        data_loader = LocalUnsupervisedLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            image_sources=[
+                os.path.join(self.image_directory, "*.jpg"),
+                os.path.join(self.shard_directory, "train-*.tfrecord"),
+            ],
+        )
+        train_dataset, val_dataset = data_loader.get_datasets(batch_size=2)
+        # 8 LoL training images, 6 unlabeled images and 8 images in the shards.
+        batches = list(train_dataset)
+        self.assertEqual(len(batches), 11)
+        self.assertEqual(data_loader.get_steps_per_epoch(batch_size=2), 11)
+        for images in batches:
+            self.assertEqual(images.shape, (2, 32, 32, 3))
+            self.assertTrue(np.all((images.numpy() >= 0) & (images.numpy() <= 1)))
+        self.assertEqual(sum(1 for _ in val_dataset), 1)
+
+    def test_missing_source(self) -> None:
+        data_loader = LocalUnsupervisedLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            image_sources=[os.path.join(self.image_directory, "*.png")],
+        )
+        with self.assertRaises(ValueError):
+            data_loader.get_datasets(batch_size=2)
+
+    def test_count_unlisted_shards(self) -> None:
+        os.remove(os.path.join(self.shard_directory, DATASET_INFO_FILE))
+        data_loader = LocalUnsupervisedLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            image_sources=[os.path.join(self.shard_directory, "train-*.tfrecord")],
+        )
+        self.assertEqual(
+            data_loader.count_source_images(data_loader.image_sources[0]), 8
+        )
+        self.assertEqual(data_loader.get_steps_per_epoch(batch_size=4), 4)
+
+    def test_sources_read_by_file_reader(self) -> None:
+        # The unlabeled images are stored next to the LoL images on the storage.
+        shutil.copytree(
+            self.image_directory, os.path.join(self.dataset_path, "unlabeled")
+        )
+        file_reader = RemoteFileReader(LocalStorage(self.dataset_path))
+        data_loader = UnsupervisedLOLDataLoader(
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            file_reader=file_reader,
+            image_sources=["unlabeled/*.jpg"],
+        )
+        self.assertEqual(
+            data_loader.list_source_files("unlabeled/*.jpg")[0], "unlabeled/0.jpg"
+        )
+        train_dataset, _ = data_loader.get_datasets(batch_size=2)
+        self.assertEqual(len(list(train_dataset)), 7)
+        self.assertEqual(data_loader.get_steps_per_epoch(batch_size=2), 7)
+        file_reader.close()
+
+    def test_permuted_files(self) -> None:
+        data_loader = LocalUnsupervisedLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+        )
+        files = [f"{idx}.jpg" for idx in range(64)]
+        dataset = data_loader.create_permuted_image_dataset(files)
+        epoch_orders = [[path.decode() for path in dataset.as_numpy_iterator()]]
+        epoch_orders.append([path.decode() for path in dataset.as_numpy_iterator()])
+        self.assertEqual(sorted(epoch_orders[0]), sorted(files))
+        self.assertNotEqual(epoch_orders[0], files)
+        self.assertNotEqual(epoch_orders[0], epoch_orders[1])
+
+    def test_streamed_patches(self) -> None:
+        data_loader = LocalUnsupervisedLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=16,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            patches_per_image=2,
+            image_sources=[os.path.join(self.image_directory, "*.jpg")],
+        )
+        train_dataset, _ = data_loader.get_datasets(batch_size=2)
+        # 8 LoL training images and 6 unlabeled images, 2 patches each.
+        self.assertEqual(len(list(train_dataset)), 14)
+        self.assertEqual(data_loader.get_steps_per_epoch(batch_size=2), 14)
+        with self.assertRaises(ValueError):
+            LocalUnsupervisedLOLDataLoader(
+                dataset_path=self.dataset_path,
+                image_size=16,
+                bit_depth=8,
+                val_split=0.2,
+                visualize_on_wandb=False,
+                cache_decoded_images=True,
+                image_sources=[os.path.join(self.image_directory, "*.jpg")],
+            )
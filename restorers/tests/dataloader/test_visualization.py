@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import wandb
+
+from restorers.dataloader.base.commons import load_thumbnail
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class VisualizationTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol"),
+            num_train_images=20,
+            image_shape=(128, 192),
+            extension="jpg",
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_load_thumbnail(self) -> None:
+        image_path = os.path.join(self.dataset_path, "our485", "low", "1.jpg")
+        thumbnail = load_thumbnail(image_path, thumbnail_size=48)
+        self.assertEqual(thumbnail.size, (48, 32))
+        self.assertEqual(thumbnail.mode, "RGB")
+
+    def get_table_data(self):
+        data_loader = LocalLOLDataLoader(
+            dataset_path=self.dataset_path,
+            image_size=32,
+            bit_depth=8,
+            val_split=0.2,
+            visualize_on_wandb=False,
+            thumbnail_size=48,
+            max_visualizations_per_split=5,
+        )
+        data_loader.table = wandb.Table(
+            columns=["Image-ID", "Split", "Low-Light-Image", "Ground-Truth-Image"]
+        )
+        data_loader._create_data_table(
+            data_loader.train_input_images,
+            data_loader.train_enhanced_images,
+            split="Train",
+        )
+        return data_loader.table.data
+
+    def test_data_table(self) -> None:
+        data = self.get_table_data()
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0][2].image.size, (48, 32))
+        # The visualized images are sampled deterministically.
+        image_ids = [row[0] for row in data]
+        self.assertEqual(image_ids, sorted(image_ids, key=str))
+        self.assertEqual(image_ids, [row[0] for row in self.get_table_data()])
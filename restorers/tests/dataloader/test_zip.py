@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+import numpy as np
+
+from restorers.dataloader import LOLDataLoader
+from restorers.dataloader.base.zip_utils import ZipArchive
+from restorers.tests.dataloader.synthetic_dataset import (
+    LocalLOLDataLoader,
+    create_synthetic_lol_dataset,
+)
+
+
+class LocalZipLOLDataLoader(LOLDataLoader):
+    """`LOLDataLoader` reading a local zip archive instead of downloading it."""
+
+    def __init__(self, zip_path: str, *args, **kwargs):
+        self.zip_path = zip_path
+        super().__init__(*args, **kwargs)
+
+    def fetch_dataset(self, val_split, visualize_on_wandb: bool):
+        self.zip_archive = ZipArchive(self.zip_path)
+        self.define_dataset_structure(dataset_path=None, val_split=val_split)
+
+
+class ZipArchiveTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_path = create_synthetic_lol_dataset(
+            os.path.join(self.temp_dir.name, "lol_dataset")
+        )
+        self.zip_path = os.path.join(self.temp_dir.name, "lol_dataset.zip")
+        with zipfile.ZipFile(self.zip_path, "w") as zip_file:
+            for root, _, filenames in os.walk(self.dataset_path):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    # Store the low light images and deflate the enhanced ones.
+                    zip_file.write(
+                        path,
+                        os.path.relpath(path, self.temp_dir.name),
+                        compress_type=zipfile.ZIP_STORED
+                        if "low" in root
+                        else zipfile.ZIP_DEFLATED,
+                    )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_read_members(self) -> None:
+        zip_archive = ZipArchive(self.zip_path)
+        self.assertEqual(zip_archive.find_root("our485/low"), "lol_dataset")
+        for name in zip_archive.list_directory("lol_dataset/our485/high")[:2] + [
+            "lol_dataset/eval15/low/1.png"
+        ]:
+            with open(os.path.join(self.temp_dir.name, name), "rb") as image_file:
+                self.assertEqual(zip_archive.read(name), image_file.read())
+
+    def test_datasets(self) -> None:
+        kwargs = dict(
+            image_size=32, bit_depth=8, val_split=0.2, visualize_on_wandb=False
+        )
+        data_loader = LocalZipLOLDataLoader(self.zip_path, **kwargs)
+        expected_data_loader = LocalLOLDataLoader(self.dataset_path, **kwargs)
+        self.assertEqual(len(data_loader.train_input_images), 8)
+        self.assertEqual(len(data_loader.test_low_light_images), 2)
+        _, val_dataset = data_loader.get_datasets(batch_size=2)
+        _, expected_val_dataset = expected_data_loader.get_datasets(batch_size=2)
+        for (x, y), (expected_x, expected_y) in zip(val_dataset, expected_val_dataset):
+            np.testing.assert_array_equal(x.numpy(), expected_x.numpy())
+            np.testing.assert_array_equal(y.numpy(), expected_y.numpy())
+        train_dataset, _ = data_loader.get_datasets(batch_size=2)
+        x, _ = next(iter(train_dataset))
+        self.assertEqual(x.shape, (2, 32, 32, 3))
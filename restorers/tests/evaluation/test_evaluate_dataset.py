@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.evaluation.base import BaseEvaluator
+from restorers.metrics import PSNRMetric
+from restorers.utils import scale_tensor
+
+
+class IdentityEvaluator(BaseEvaluator):
+    def preprocess(self, image_path):
+        return image_path
+
+    def postprocess(self, model_output):
+        return model_output
+
+    def populate_image_paths(self):
+        return {}
+
+
+class EvaluateDatasetTester(unittest.TestCase):
+    def test_mean_over_unequal_batches(self):
+        rng = np.random.default_rng(0)
+        ground_truth = rng.uniform(0.2, 0.8, (5, 8, 8, 3)).astype(np.float32)
+        # The batches are of unequal sizes and are degraded by different amounts.
+        noise_levels = np.array([0.01, 0.01, 0.01, 0.1, 0.1], dtype=np.float32)
+        noise = rng.normal(size=ground_truth.shape).astype(np.float32)
+        input_images = ground_truth + noise * noise_levels[:, None, None, None]
+        dataset = tf.data.Dataset.from_tensor_slices(
+            (input_images, ground_truth)
+        ).batch(3)
+        evaluator = IdentityEvaluator(
+            metrics=[PSNRMetric(max_val=1.0)], model=lambda images: images
+        )
+        # The metric scales every batch as a whole, so the per-image values are
+        # computed batch by batch before their mean over all the images.
+        image_psnrs = [
+            tf.image.psnr(
+                scale_tensor(ground_truth_batch),
+                scale_tensor(input_image_batch),
+                max_val=1.0,
+            )
+            for input_image_batch, ground_truth_batch in dataset
+        ]
+        expected_psnr = np.mean(tf.concat(image_psnrs, axis=0).numpy())
+        for _ in range(2):
+            metric_values = evaluator.evaluate_dataset(dataset, "Val")
+            self.assertAlmostEqual(
+                metric_values["Val/PSNRMetric"], expected_psnr, places=3
+            )
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from restorers.model.nafnet import NAFBlock, NAFNet, PointwiseDepthwiseConv
+from restorers.model.nafnet.benchmark import benchmark_fused_nafnet
+
+
+def perturb_weights(layer: tf.keras.layers.Layer, seed: int = 0) -> None:
+    # Perturb the weights, so that the folded scales and shifts are not identities.
+    random_state = np.random.RandomState(seed)
+    layer.set_weights(
+        [
+            weight + random_state.normal(0.0, 0.1, weight.shape).astype(weight.dtype)
+            for weight in layer.get_weights()
+        ]
+    )
+
+
+class NAFBlockFusionTest(unittest.TestCase):
+    def setUp(self):
+        self.block_types = ["plain", "baseline", "nafblock"]
+
+    def test_fused_block(self) -> None:
+        # An odd size checks the borders of the fused depthwise convolution.
+        x = tf.random.uniform((2, 17, 23, 8))
+        for block_type in self.block_types:
+            for fuse_depthwise in [False, True]:
+                block = NAFBlock(mode=block_type, balanced_skip_connection=True)
+                block(x)
+                perturb_weights(block)
+                y = block(x).numpy()
+                block.fuse_for_inference(fuse_depthwise)
+                self.assertTrue(block.fused)
+                self.assertEqual(block.fused_conv is not None, fuse_depthwise)
+                np.testing.assert_allclose(block(x).numpy(), y, rtol=1e-4, atol=1e-4)
+
+    def test_layer_norm_folded(self) -> None:
+        block = NAFBlock()
+        block(tf.ones((1, 8, 8, 4)))
+        block.fuse_for_inference()
+        # The depthwise convolution is fused by default, as only that saves time.
+        self.assertIsNotNone(block.fused_conv)
+        self.assertFalse(block.layer_norm1.center or block.layer_norm1.scale)
+        self.assertFalse(block.layer_norm2.center or block.layer_norm2.scale)
+
+    def test_fusion_is_idempotent(self) -> None:
+        x = tf.random.uniform((1, 8, 8, 4))
+        block = NAFBlock(balanced_skip_connection=True)
+        block(x)
+        perturb_weights(block)
+        block.fuse_for_inference()
+        y = block(x).numpy()
+        block.fuse_for_inference()
+        np.testing.assert_allclose(block(x).numpy(), y)
+
+    def test_save_and_load_fused_block(self) -> None:
+        x = tf.random.uniform((1, 8, 8, 4))
+        for block_type in self.block_types:
+            for fuse_depthwise in [False, True]:
+                inputs = tf.keras.Input(shape=(None, None, 4))
+                block = NAFBlock(mode=block_type, balanced_skip_connection=True)
+                model = tf.keras.Model(inputs=inputs, outputs=block(inputs))
+                perturb_weights(block)
+                block.fuse_for_inference(fuse_depthwise)
+                y = model(x).numpy()
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    model_path = os.path.join(temp_dir, "model.keras")
+                    model.save(model_path)
+                    loaded_model = tf.keras.models.load_model(
+                        model_path, custom_objects={"NAFBlock": NAFBlock}
+                    )
+                # The block is restored fused, with the weights of the fused block.
+                loaded_block = loaded_model.layers[-1]
+                self.assertTrue(loaded_block.fused)
+                self.assertEqual(loaded_block.fused_conv is not None, fuse_depthwise)
+                np.testing.assert_allclose(
+                    loaded_model(x).numpy(), y, rtol=1e-6, atol=1e-6
+                )
+
+
+class PointwiseDepthwiseConvTest(unittest.TestCase):
+    def test_pointwise_depthwise_conv(self) -> None:
+        x = tf.random.uniform((2, 9, 11, 3))
+        pointwise_conv = tf.keras.layers.Conv2D(6, kernel_size=1)
+        depthwise_conv = tf.keras.layers.Conv2D(
+            6, kernel_size=3, padding="same", groups=6
+        )
+        depthwise_conv(pointwise_conv(x))
+        perturb_weights(pointwise_conv)
+        perturb_weights(depthwise_conv, seed=1)
+        y = depthwise_conv(pointwise_conv(x)).numpy()
+        fused_conv = PointwiseDepthwiseConv(6)
+        fused_conv.fuse(pointwise_conv, depthwise_conv)
+        np.testing.assert_allclose(fused_conv(x).numpy(), y, rtol=1e-5, atol=1e-5)
+
+
+class NAFNetFusionTest(unittest.TestCase):
+    def test_fused_nafnet(self) -> None:
+        x = tf.random.uniform((1, 30, 34, 3))
+        for fuse_depthwise in [False, True]:
+            nafnet = NAFNet(
+                filters=8, encoder_block_nums=(1, 1), decoder_block_nums=(1, 1)
+            )
+            nafnet(x)
+            perturb_weights(nafnet)
+            # `predict` traces a function which must not be reused once fused.
+            y = nafnet.predict(x, verbose=0)
+            self.assertIs(nafnet.fuse_for_inference(fuse_depthwise), nafnet)
+            # The outputs reach about 15 with perturbed weights, the float32 rounding
+            # of the reassociated products stays around 1e-5 at that scale.
+            np.testing.assert_allclose(
+                nafnet.predict(x, verbose=0), y, rtol=1e-5, atol=1e-4
+            )
+
+    def test_unbuilt_nafnet(self) -> None:
+        with self.assertRaises(ValueError):
+            NAFNet().fuse_for_inference()
+
+    def test_benchmark(self) -> None:
+        results = benchmark_fused_nafnet(
+            filters=8, image_shape=(32, 32), num_iterations=1
+        )
+        self.assertEqual(set(results), {"unfused", "fused", "fused_without_depthwise"})
+        for result in results.values():
+            self.assertGreater(result["latency_ms"], 0.0)
+            self.assertLess(result["max_relative_error"], 1e-4)
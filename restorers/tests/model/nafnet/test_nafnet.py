@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import tensorflow as tf
 
 from restorers.model.nafnet import (
@@ -108,6 +109,15 @@ class NAFNetTest(unittest.TestCase):
             y = nafnet(x)
             self.assertEqual(y.shape, x.shape)
 
+    def test_integer_inputs(self) -> None:
+        x = tf.random.uniform((1, 64, 64, 3), maxval=256, dtype=tf.int32)
+        nafnet = NAFNet(bit_depth=8)
+        y = nafnet(tf.cast(x, tf.uint8))
+        self.assertEqual(y.dtype, tf.float32)
+        self.assertTrue(
+            np.allclose(y.numpy(), nafnet(tf.cast(x, tf.float32) / 255.0).numpy())
+        )
+
     def test_input_reshaping(self) -> None:
         for input_shape, reshaped_shapes in zip(
             self.input_shapes, self.reshaped_shapes
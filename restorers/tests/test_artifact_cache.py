@@ -0,0 +1,141 @@
+import os
+import fcntl
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from restorers.artifact_cache import (
+    ArtifactCache,
+    LocalArtifactStore,
+    WandbArtifactStore,
+)
+from restorers.utils import fetch_wandb_artifact
+
+
+class ArtifactCacheTester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store_dir = os.path.join(self.temp_dir.name, "store")
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.store = LocalArtifactStore(self.store_dir)
+        for alias, content in [("v0", b"a" * 100), ("v1", b"b" * 100)]:
+            self.add_artifact(f"lol:{alias}", content)
+        self.add_artifact("lol:latest", b"b" * 100)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def add_artifact(self, artifact_address: str, content: bytes) -> None:
+        artifact_path = self.store.get_artifact_path(artifact_address)
+        os.makedirs(artifact_path)
+        with open(os.path.join(artifact_path, "data.bin"), "wb") as artifact_file:
+            artifact_file.write(content)
+
+    def get_cache(self, **kwargs) -> ArtifactCache:
+        return ArtifactCache(self.cache_dir, store=self.store, **kwargs)
+
+    def test_content_addressed(self) -> None:
+        cache = self.get_cache()
+        with mock.patch.object(
+            self.store, "download", wraps=self.store.download
+        ) as download:
+            v1_path = fetch_wandb_artifact("lol:v1", "dataset", artifact_cache=cache)
+            latest_path = cache.fetch("lol:latest", "dataset")
+            self.assertEqual(cache.fetch("lol:v1", "dataset"), v1_path)
+        # Both aliases point to the same content, which is downloaded once.
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(v1_path, latest_path)
+        with open(os.path.join(v1_path, "data.bin"), "rb") as artifact_file:
+            self.assertEqual(artifact_file.read(), b"b" * 100)
+        self.assertEqual(
+            [
+                name
+                for name in os.listdir(os.path.dirname(v1_path))
+                if not name.endswith(".lock")
+            ],
+            [os.path.basename(v1_path)],
+        )
+
+    def test_offline(self) -> None:
+        path = self.get_cache().fetch("lol:latest", "dataset")
+        offline_cache = self.get_cache(offline=True)
+        with mock.patch.object(self.store, "get_digest") as get_digest:
+            self.assertEqual(offline_cache.fetch("lol:latest", "dataset"), path)
+            with self.assertRaises(ValueError):
+                offline_cache.fetch("lol:v0", "dataset")
+        get_digest.assert_not_called()
+
+    def test_version_alias_resolved_locally(self) -> None:
+        cache = self.get_cache()
+        cache.fetch("lol:v1", "dataset")
+        cache.fetch("lol:latest", "dataset")
+        with mock.patch.object(
+            self.store, "get_digest", wraps=self.store.get_digest
+        ) as get_digest:
+            cache.fetch("lol:v1", "dataset")
+            get_digest.assert_not_called()
+            # Other aliases can move, hence they are resolved by the store.
+            cache.fetch("lol:latest", "dataset")
+            self.assertEqual(get_digest.call_count, 1)
+            cache.fetch("lol:v1", "dataset", refresh=True)
+            self.assertEqual(get_digest.call_count, 2)
+
+    def test_download_outside_of_lock(self) -> None:
+        cache = self.get_cache()
+        store_download = self.store.download
+
+        def download(*args):
+            # Other processes can still use the cache during the download.
+            with open(os.path.join(self.cache_dir, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            store_download(*args)
+
+        with mock.patch.object(self.store, "download", side_effect=download):
+            cache.fetch("lol:v0", "dataset")
+
+    def test_lru_eviction(self) -> None:
+        cache = self.get_cache(max_size=250)
+        v0_path = cache.fetch("lol:v0", "dataset")
+        self.add_artifact("lol:v2", b"c" * 100)
+        v1_path = cache.fetch("lol:v1", "dataset")
+        cache.fetch("lol:v0", "dataset")
+        cache.release(v0_path)
+        cache.release(v1_path)
+        v2_path = cache.fetch("lol:v2", "dataset")
+        # v1 is the least recently used artifact.
+        self.assertFalse(os.path.exists(v1_path))
+        self.assertTrue(os.path.exists(v0_path))
+        self.assertTrue(os.path.exists(v2_path))
+        self.assertNotIn("dataset:lol:v1", cache.read_index()["aliases"])
+        cache.release(v2_path)
+
+    def test_artifacts_in_use_are_not_evicted(self) -> None:
+        cache = self.get_cache(max_size=150)
+        v0_path = cache.fetch("lol:v0", "dataset")
+        v1_path = cache.fetch("lol:v1", "dataset")
+        # v0 is still in use, so the cache is left above its maximum size.
+        self.assertTrue(os.path.exists(v0_path))
+        cache.release(v0_path)
+        self.add_artifact("lol:v2", b"c" * 100)
+        cache.fetch("lol:v2", "dataset")
+        self.assertFalse(os.path.exists(v0_path))
+        self.assertTrue(os.path.exists(v1_path))
+        cache.release(v1_path)
+
+    def test_cache_hits_used_by_wandb_run(self) -> None:
+        wandb_artifact = mock.Mock(digest="digest")
+        wandb_artifact.download.side_effect = lambda root: shutil.copytree(
+            self.store.get_artifact_path("lol:v0"), root
+        )
+        with mock.patch("restorers.artifact_cache.wandb") as wandb:
+            wandb.use_artifact.return_value = wandb_artifact
+            for _ in range(2):
+                # A new store for every process sharing the cache.
+                cache = ArtifactCache(self.cache_dir, store=WandbArtifactStore())
+                cache.fetch("lol:v0", "dataset")
+            # The cache hit is not downloaded but it is still an input of the run.
+            self.assertEqual(wandb_artifact.download.call_count, 1)
+            self.assertEqual(wandb.use_artifact.call_count, 2)
+            wandb.use_artifact.assert_called_with("lol:v0", type="dataset")
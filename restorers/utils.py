@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
@@ -6,9 +6,10 @@ from absl import logging
 from matplotlib import pyplot as plt
 from PIL import Image
 
-import wandb
 from wandb.keras import WandbModelCheckpoint
 
+from .artifact_cache import ArtifactCache, get_default_artifact_cache
+
 
 def initialize_device() -> tf.distribute.Strategy:
     devices = tf.config.list_physical_devices("GPU")
@@ -64,12 +65,16 @@ def plot_results(
     plt.show()
 
 
-def fetch_wandb_artifact(artifact_address: str, artifact_type: str):
-    return (
-        wandb.Api().artifact(artifact_address, type=artifact_type).download()
-        if wandb.run is None
-        else wandb.use_artifact(artifact_address, type=artifact_type).download()
-    )
+def fetch_wandb_artifact(
+    artifact_address: str,
+    artifact_type: str,
+    artifact_cache: Optional[ArtifactCache] = None,
+):
+    """Fetches a WandB artifact through a local cache keyed by the artifact digest, the
+    default cache being configured by environment variables (see
+    `restorers.artifact_cache.get_default_artifact_cache`)."""
+    artifact_cache = artifact_cache or get_default_artifact_cache()
+    return artifact_cache.fetch(artifact_address, artifact_type)
 
 
 def count_params(weights) -> int: